@@ -0,0 +1,244 @@
+"""End-to-end benchmarks of the CLI on synthetic template libraries.
+
+    python benchmarks/suite.py run --sizes 10,1000 --output results.json
+    python benchmarks/suite.py run --save-baseline main
+    python benchmarks/suite.py compare main results.json
+
+Each library has `size` simple and `size` cookiecutter templates. The first template of each kind carries the
+workload of the profile (`small` files, `large` files or a `deep` tree); the others are small, so large libraries
+stay cheap to generate while `list` and `doc` still see every template. Every command runs in a new interpreter,
+as from a shell, with `HOME` pointing to a directory holding the configuration and the caches of the library.
+
+A command is run once to fill the caches (reported as `first_ms`), then `--repeat` times (`median_ms`, `min_ms`).
+Baselines are JSON files under `benchmarks/baselines`; they are machine specific, record them on the machine
+the comparison runs on.
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Tuple
+
+import click
+
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+
+PROFILES = {
+    # (files, bytes per file, directory depth)
+    'small': (10, 1 << 10, 1),
+    'large': (4, 4 << 20, 1),
+    'deep': (40, 1 << 10, 20),
+}
+
+LINE = "{{ name }} {{ package | snake_case }} 0123456789 abcdefghijklmnopqrstuvwxyz ABCDEFGHIJKLMNOPQRSTUVWXYZ\n"
+# Stock cookiecutter has no CookiecutterX filters
+CC_LINE = LINE.replace('{{ name }}', '{{ cookiecutter.app_name }}') \
+    .replace('package | snake_case', "cookiecutter.package | replace('.', '/')")
+
+
+def _write_tree(root: str, files: int, size: int, depth: int, line: str) -> None:
+    for n in range(files):
+        directory = os.path.join(root, *(f"level{d}" for d in range(n % depth)))
+        os.makedirs(directory, exist_ok=True)
+
+        with open(os.path.join(directory, f"file{n}.txt"), 'w') as f:
+            f.write(line * max(1, size // len(line)))
+
+
+def generate_library(root: str, size: int, profile: str) -> None:
+    files, file_size, depth = PROFILES[profile]
+
+    for i in range(size):
+        template = os.path.join(root, 'simple', f"simple{i:05d}")
+        os.makedirs(template)
+        with open(os.path.join(template, 'ccx.yml'), 'w') as f:
+            f.write(f'''description: Synthetic simple template {i}
+variables:
+  name:
+    required: true
+  package:
+    default: com.example.{i}
+files:
+  - glob: "tree/**/*.txt"
+    output: "{{{{ name }}}}"
+''')
+        _write_tree(os.path.join(template, 'tree'), files if i == 0 else 1, file_size if i == 0 else 64, depth, LINE)
+
+        template = os.path.join(root, 'cookiecutter', f"cc{i:05d}")
+        os.makedirs(template)
+        with open(os.path.join(template, 'cookiecutter.json'), 'w') as f:
+            json.dump({'app_name': 'demo', 'package': f"com.example.{i}"}, f)
+        with open(os.path.join(template, 'ccx.yml'), 'w') as f:
+            f.write(f"description: Synthetic cookiecutter template {i}\n")
+        _write_tree(
+            os.path.join(template, '{{cookiecutter.app_name}}'),
+            files if i == 0 else 1, file_size if i == 0 else 64, depth, CC_LINE
+        )
+
+
+def write_config(home: str, library: str) -> None:
+    base = os.path.join(home, '.cookiecutter-x')
+    os.makedirs(base)
+    with open(os.path.join(base, 'ccx-config.yml'), 'w') as f:
+        f.write(f'''simple_templates:
+  paths:
+    - {os.path.join(library, 'simple')}
+cookiecutter_templates:
+  paths:
+    - {os.path.join(library, 'cookiecutter')}
+''')
+
+    with open(os.path.join(home, '.cookiecutterrc'), 'w') as f:
+        f.write(f"cookiecutters_dir: {home}/cookiecutters\nreplay_dir: {home}/replay\n")
+
+
+COMMANDS: Dict[str, List[str]] = {
+    'startup': ['--help'],
+    'simple list': ['simple', 'list'],
+    'simple doc': ['simple', 'doc', 'simple00000'],
+    'simple process': ['simple', 'process', 'simple00000', '-w', '--name', 'bench'],
+    'cc list': ['cc', 'list'],
+    'cc doc': ['cc', 'doc', 'cc00000'],
+    'cc process': ['cc', 'process', 'cc00000', '-w', '--app_name', 'bench'],
+    'cc process (ccx engine)': ['cc', 'process', 'cc00000', '-w', '-e', 'ccx', '--app_name', 'bench'],
+}
+
+
+def time_command(arguments: List[str], home: str, repeat: int) -> Dict[str, Any]:
+    env = dict(os.environ, HOME=home)
+    command = [sys.executable, '-m', 'cookiecutter_x.main'] + arguments
+    output_dir = os.path.join(home, 'output')
+    os.makedirs(output_dir, exist_ok=True)
+
+    runs = []
+    for _ in range(repeat + 1):
+        start = time.perf_counter()
+        result = subprocess.run(command, env=env, cwd=output_dir, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        runs.append((time.perf_counter() - start) * 1000)
+
+        if result.returncode != 0:
+            raise click.ClickException(f"{' '.join(arguments)} failed:\n{result.stderr.decode()}")
+
+    return {
+        'first_ms': round(runs[0], 2),
+        'median_ms': round(statistics.median(runs[1:]), 2),
+        'min_ms': round(min(runs[1:]), 2),
+    }
+
+
+def run_suite(sizes: List[int], profiles: List[str], repeat: int) -> Dict[str, Any]:
+    results = {}
+
+    for profile in profiles:
+        for size in sizes:
+            with tempfile.TemporaryDirectory(prefix='ccx-bench-') as tmp:
+                library, home = os.path.join(tmp, 'library'), os.path.join(tmp, 'home')
+
+                start = time.perf_counter()
+                generate_library(library, size, profile)
+                write_config(home, library)
+                seconds = time.perf_counter() - start
+                click.echo(f"Generated {size} + {size} {profile} templates in {seconds:.1f}s", err=True)
+
+                for name, arguments in COMMANDS.items():
+                    key = f"{name} [{profile}, {size}]"
+                    results[key] = time_command(arguments, home, repeat)
+                    click.echo(f"{key:<45} {results[key]['median_ms']:10.1f} ms", err=True)
+
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def compare_results(
+        baseline: Dict[str, Any], current: Dict[str, Any], threshold: float, noise_ms: float
+) -> Tuple[List[List[Any]], int]:
+    """Table rows of the benchmarks in both results and the number of regressions"""
+    rows = []
+    regressions = 0
+
+    for key in (k for k in current['results'] if k in baseline['results']):
+        before = baseline['results'][key]['median_ms']
+        after = current['results'][key]['median_ms']
+        change = (after - before) / before if before else 0
+
+        regressed = change > threshold and after - before > noise_ms
+        regressions += regressed
+        rows.append([key, before, after, f"{change:+.1%}", 'REGRESSION' if regressed else ''])
+
+    return rows, regressions
+
+
+def _results_path(name: str) -> str:
+    if os.path.exists(name):
+        return name
+
+    return os.path.join(BASELINES_PATH, f"{name}.json")
+
+
+@click.group(help="Benchmarks of the CLI on synthetic template libraries")
+def bench():
+    pass
+
+
+@bench.command(name='run', help="Run the benchmarks")
+@click.option('--sizes', default='10,100,1000', help="Comma separated numbers of templates of each kind")
+@click.option('--profiles', default=','.join(PROFILES), help="Comma separated profiles: small, large, deep")
+@click.option('--repeat', type=click.IntRange(min=1), default=5, help="Timed runs of each command")
+@click.option('-o', '--output', type=click.Path(dir_okay=False), help="Write the results to the file")
+@click.option('--save-baseline', help="Write the results as the named baseline")
+def run(sizes: str, profiles: str, repeat: int, output: str, save_baseline: str):
+    profile_names = [p.strip() for p in profiles.split(',')]
+    unknown = set(profile_names) - set(PROFILES)
+    if unknown:
+        raise click.BadParameter(f"Unknown profiles {', '.join(sorted(unknown))}", param_hint='--profiles')
+
+    results = run_suite([int(s) for s in sizes.split(',')], profile_names, repeat)
+
+    paths = [output] if output else []
+    if save_baseline:
+        os.makedirs(BASELINES_PATH, exist_ok=True)
+        paths.append(os.path.join(BASELINES_PATH, f"{save_baseline}.json"))
+
+    for path in paths:
+        with open(path, 'w') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
+
+    if not paths:
+        json.dump(results, sys.stdout, indent=2)
+
+
+@bench.command(name='compare', help="Compare results with a baseline; exits with 1 on regressions")
+@click.argument('baseline')
+@click.argument('current')
+@click.option('--threshold', type=float, default=0.10, help="Relative slowdown of the median flagged as regression")
+@click.option('--noise-ms', type=float, default=5.0, help="Absolute slowdown ignored as noise")
+def compare(baseline: str, current: str, threshold: float, noise_ms: float):
+    from tabulate import tabulate
+
+    with open(_results_path(baseline)) as f:
+        baseline_results = json.load(f)
+    with open(_results_path(current)) as f:
+        current_results = json.load(f)
+
+    rows, regressions = compare_results(baseline_results, current_results, threshold, noise_ms)
+    print(tabulate(rows, headers=['benchmark', 'baseline ms', 'current ms', 'change', ''], tablefmt='pipe'))
+
+    if regressions:
+        click.echo(f"{regressions} regressions", err=True)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    bench()
@@ -17,6 +17,7 @@ Usage:
     ${CMD} test                 Run unit tests
     ${CMD} coverage             Run coverages and generate html reports
     ${CMD} build                Build the binary
+    ${CMD} bench <command>      Run (run) or compare (compare) the CLI benchmarks; see benchmarks/suite.py
 
     ${CMD} docs-install [-r]    Create virtualenv (docs/venv) and install docs generation dependencies
     ${CMD} docs-requirements    Generate the requirements.txt from doc generation venv
@@ -107,6 +108,10 @@ function cmd-build() {
     venv/bin/python3 -m build
 }
 
+function cmd-bench() {
+    venv/bin/python3 benchmarks/suite.py "$@"
+}
+
 function cmd-docs-install() {
     if [[ -z $* ]]; then
         create_virtual_env "docs"
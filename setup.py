@@ -36,6 +36,7 @@ setuptools.setup(
     ],
     extras_require={
         'test': ['coverage', 'pyfakefs'],
+        'watch': ['watchdog'],
     },
     entry_points='''
         [console_scripts]
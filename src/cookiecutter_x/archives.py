@@ -0,0 +1,209 @@
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+ARCHIVE_SUFFIXES = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+ARCHIVES_DIR_NAME = 'archives'
+
+
+def is_archive(path: str) -> bool:
+    return path.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+class TemplateArchive:
+    """A zip or tar bundle of templates, one top level directory per template.
+
+    The member list is read once (the central directory of a zip file) and kept in memory; the members of a
+    template are read only when the template is used. A tar file has no index, a file read from it (e.g. the
+    manifest) is read for all templates in one pass and kept in memory.
+    """
+
+    def __init__(self, path: str) -> None:
+        super().__init__()
+        self.path = path
+        self._members: Optional[Dict[str, bool]] = None
+        self._zip = None
+        # Tar only; file name to the content of the file in each template
+        self._files: Dict[str, Dict[str, bytes]] = {}
+
+    @property
+    def is_zip(self) -> bool:
+        return self.path.lower().endswith('.zip')
+
+    @property
+    def zip(self):
+        # Opening reads the central directory; the handle is kept, members are read from it on demand
+        if self._zip is None:
+            import zipfile
+
+            self._zip = zipfile.ZipFile(self.path)
+
+        return self._zip
+
+    def close(self) -> None:
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+
+    @property
+    def members(self) -> Dict[str, bool]:
+        """Member name to is-directory mapping"""
+        if self._members is None:
+            if self.is_zip:
+                self._members = {i.filename.rstrip('/'): i.is_dir() for i in self.zip.infolist()}
+            else:
+                import tarfile
+
+                with tarfile.open(self.path) as archive:
+                    self._members = {m.name.rstrip('/'): m.isdir() for m in archive.getmembers()}
+
+        return self._members
+
+    def templates(self) -> List[str]:
+        names = set()
+        for name, is_dir in self.members.items():
+            parts = name.split('/')
+            if self._safe(name) and (len(parts) > 1 or is_dir):
+                names.add(parts[0])
+
+        names.discard('')
+        names.discard('.')
+        return sorted(names)
+
+    @staticmethod
+    def _safe(name: str) -> bool:
+        return not name.startswith('/') and '..' not in name.split('/')
+
+    def read(self, template: str, filename: str) -> Optional[bytes]:
+        """Content of a file of the template, without extracting the template; None if there is no such file"""
+        name = f"{template}/{filename}"
+        if self.members.get(name) is not False or not self._safe(name):
+            return None
+
+        if self.is_zip:
+            return self.zip.read(name)
+
+        if filename not in self._files:
+            self._files[filename] = self._read_all(filename)
+
+        return self._files[filename].get(template)
+
+    def _read_all(self, filename: str) -> Dict[str, bytes]:
+        """Content of the file in each template of the tar file, in one pass through the stream"""
+        import tarfile
+
+        contents = {}
+        with tarfile.open(self.path) as archive:
+            for member in archive:
+                template, _, rest = member.name.partition('/')
+                if rest == filename and member.isfile() and self._safe(member.name):
+                    with archive.extractfile(member) as f:
+                        contents[template] = f.read()
+
+        return contents
+
+    def extract(self, template: str, destination: str) -> None:
+        """Write the files of the template into the destination directory"""
+        prefix = template + '/'
+
+        if self.is_zip:
+            for info in self.zip.infolist():
+                if not info.filename.startswith(prefix) or info.is_dir() or not self._safe(info.filename):
+                    continue
+
+                target = os.path.join(destination, info.filename[len(prefix):])
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with self.zip.open(info) as src, open(target, 'wb') as dst:
+                    shutil.copyfileobj(src, dst)
+
+                mode = (info.external_attr >> 16) & 0o777
+                if mode:
+                    os.chmod(target, mode)
+
+            return
+
+        import tarfile
+
+        # Tar files have no index; the stream is read through once
+        with tarfile.open(self.path) as archive:
+            for member in archive:
+                if not member.name.startswith(prefix) or not self._safe(member.name):
+                    continue
+
+                if not member.isfile():
+                    if not member.isdir():
+                        logging.debug(f"Skipping {member.name} of {self.path}; not a regular file")
+                    continue
+
+                target = os.path.join(destination, member.name[len(prefix):])
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with archive.extractfile(member) as src, open(target, 'wb') as dst:
+                    shutil.copyfileobj(src, dst)
+
+                os.chmod(target, member.mode & 0o777)
+
+
+_archives: Dict[Tuple[str, int, int], TemplateArchive] = {}
+
+
+def archive(path: str) -> TemplateArchive:
+    """The archive, its member list is read again only when the file changes"""
+    st = os.stat(path)
+    key = (path, st.st_mtime_ns, st.st_size)
+
+    if key not in _archives:
+        for stale in [k for k in _archives if k[0] == path]:
+            # The daemon runs for long; don't leak the handle of the replaced file
+            _archives.pop(stale).close()
+
+        _archives[key] = TemplateArchive(path)
+
+    return _archives[key]
+
+
+def list_templates(path: str) -> List[str]:
+    return archive(path).templates()
+
+
+def materialize(archive_path: str, template: str, cache_path: str) -> str:
+    """Directory with the files of the template, written on first use under the cache directory.
+
+    The directory is keyed by the archive path, size and mtime; replacing the archive drops its old templates.
+    """
+    st = os.stat(archive_path)
+    prefix = hashlib.sha256(os.path.abspath(archive_path).encode()).hexdigest()[:16]
+    stamp = f"{prefix}-{st.st_mtime_ns}-{st.st_size}"
+    base = os.path.join(cache_path, ARCHIVES_DIR_NAME)
+    template_path = os.path.join(base, stamp, template)
+
+    if os.path.isdir(template_path):
+        return template_path
+
+    if template not in list_templates(archive_path):
+        from .core import CCXError
+
+        raise CCXError(f"Template {template} not found in {archive_path}")
+
+    if os.path.isdir(base):
+        for name in os.listdir(base):
+            if name.startswith(prefix + '-') and name != stamp:
+                shutil.rmtree(os.path.join(base, name), ignore_errors=True)
+
+    os.makedirs(os.path.dirname(template_path), exist_ok=True)
+    staging = tempfile.mkdtemp(prefix='.tmp-', dir=os.path.dirname(template_path))
+    try:
+        archive(archive_path).extract(template, staging)
+
+        try:
+            os.rename(staging, template_path)
+        except OSError:
+            # Written by a concurrent run in the meantime
+            pass
+    finally:
+        if os.path.exists(staging):
+            shutil.rmtree(staging)
+
+    return template_path
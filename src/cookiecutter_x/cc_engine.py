@@ -0,0 +1,221 @@
+import contextlib
+import fnmatch
+import os
+import shutil
+import sys
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple, TYPE_CHECKING
+
+from . import profiler
+from . import utils
+
+if TYPE_CHECKING:
+    from jinja2 import Environment
+
+ENGINES = ('cookiecutter', 'ccx')
+
+
+class UnsupportedTemplate(Exception):
+    """The template uses a cookiecutter feature the native engine does not implement"""
+
+
+@contextlib.contextmanager
+def _import_path(repo_dir: str) -> Iterator[None]:
+    # Local jinja extensions of the template are importable while rendering, as with cookiecutter
+    sys.path.insert(0, repo_dir)
+    try:
+        yield
+    finally:
+        sys.path.remove(repo_dir)
+
+
+def build_context(repo_dir: str, extra_context: Dict[str, Any], output_dir: str) -> Dict[str, Any]:
+    """The cookiecutter context of a non-interactive run, built with cookiecutter's own functions"""
+    from cookiecutter.config import get_user_config
+    from cookiecutter.generate import generate_context
+    from cookiecutter.prompt import prompt_for_config
+
+    config_dict = get_user_config()
+    context = generate_context(
+        context_file=os.path.join(repo_dir, 'cookiecutter.json'),
+        default_context=config_dict['default_context'],
+        extra_context=extra_context
+    )
+    context['_cookiecutter'] = {k: v for k, v in context['cookiecutter'].items() if not k.startswith('_')}
+
+    if {'template', 'templates'} & set(context['cookiecutter']):
+        raise UnsupportedTemplate("nested templates")
+
+    with _import_path(repo_dir):
+        if context['cookiecutter']:
+            context['cookiecutter'].update(prompt_for_config(context, no_input=True))
+
+    context['cookiecutter']['_template'] = repo_dir
+    context['cookiecutter']['_output_dir'] = os.path.abspath(output_dir)
+    context['cookiecutter']['_repo_dir'] = repo_dir
+    context['cookiecutter']['_checkout'] = None
+
+    return context
+
+
+def is_copy_only_path(path: str, context: Dict[str, Any]) -> bool:
+    return any(fnmatch.fnmatch(path, p) for p in context['cookiecutter'].get('_copy_without_render', []))
+
+
+class FileJob(NamedTuple):
+    # Path relative to the template directory, i.e., the path matched against `_copy_without_render`
+    infile: str
+    copy_only: bool
+
+
+class TreeRenderer:
+    """Renders the files of a cookiecutter project template; instances are shared by the worker threads
+    or sent to the worker processes, the jinja environment is created on first use in each process"""
+
+    def __init__(self, repo_dir: str, template_dir: str, project_dir: str, context: Dict[str, Any]) -> None:
+        super().__init__()
+        self.repo_dir = repo_dir
+        self.template_dir = template_dir
+        self.project_dir = project_dir
+        self.context = context
+        self._env: Optional["Environment"] = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state['_env'] = None
+        return state
+
+    @property
+    def env(self) -> "Environment":
+        if self._env is None:
+            from cookiecutter.utils import create_env_with_context
+            from jinja2 import FileSystemLoader
+
+            with _import_path(self.repo_dir):
+                env = create_env_with_context(self.context)
+
+            # Absolute search paths; the workers can't change into the template directory as cookiecutter does
+            env.loader = FileSystemLoader([self.template_dir, os.path.join(self.template_dir, '..', 'templates')])
+            self._env = env
+
+        return self._env
+
+    def render_path(self, path: str) -> str:
+        return self.env.from_string(path).render(**self.context)
+
+    def __call__(self, job: FileJob) -> Optional[str]:
+        """Generate a single file; returns the output path, or None if the rendered file name is empty"""
+        in_path = os.path.join(self.template_dir, job.infile)
+        outfile = os.path.join(self.project_dir, self.render_path(job.infile))
+
+        if os.path.isdir(outfile):
+            return None
+
+        from binaryornot.check import is_binary
+
+        if job.copy_only or is_binary(in_path):
+            with profiler.span('write', file=outfile, copy=True):
+                shutil.copyfile(in_path, outfile)
+                shutil.copymode(in_path, outfile)
+
+            return outfile
+
+        with profiler.span('render', file=job.infile):
+            template = self.env.get_template(job.infile.replace(os.path.sep, '/'))
+            rendered = template.render(**self.context)
+
+        newline = self.context['cookiecutter'].get('_new_lines', False)
+        if not newline:
+            # Keep the line ending of the template file
+            with open(in_path, encoding='utf-8') as rd:
+                rd.readline()
+            newline = rd.newlines[0] if isinstance(rd.newlines, tuple) else rd.newlines
+
+        with profiler.span('write', file=outfile), open(outfile, 'w', encoding='utf-8', newline=newline) as f:
+            f.write(rendered)
+
+        shutil.copymode(in_path, outfile)
+        return outfile
+
+
+def _walk(renderer: TreeRenderer, context: Dict[str, Any]) -> Iterator[FileJob]:
+    """Walk the template, creating the directories and copying the copy only directories on the way"""
+    from cookiecutter.utils import make_sure_path_exists
+
+    for root, dirs, files in os.walk(renderer.template_dir):
+        rel_root = os.path.relpath(root, renderer.template_dir)
+
+        render_dirs = []
+        for d in sorted(dirs):
+            rel_dir = os.path.normpath(os.path.join(rel_root, d))
+            out_dir = os.path.join(renderer.project_dir, renderer.render_path(rel_dir))
+
+            if is_copy_only_path(rel_dir, context):
+                if os.path.isdir(out_dir):
+                    shutil.rmtree(out_dir)
+                shutil.copytree(os.path.join(root, d), out_dir)
+            else:
+                make_sure_path_exists(out_dir)
+                render_dirs.append(d)
+
+        dirs[:] = render_dirs
+
+        for f in sorted(files):
+            infile = os.path.normpath(os.path.join(rel_root, f))
+            yield FileJob(infile, is_copy_only_path(infile, context))
+
+
+def generate(
+        repo_dir: str, extra_context: Dict[str, Any], output_dir: str, overwrite_if_exists: bool = False,
+        jobs: int = 1, processes: bool = False
+) -> Tuple[str, List[str]]:
+    """Generate the project like `cookiecutter.main.cookiecutter(..., no_input=True)`, rendering the files
+    with `jobs` workers; returns the project directory and the generated files.
+
+    Raises UnsupportedTemplate for templates with a pre prompt hook or nested templates; use cookiecutter
+    for those.
+    """
+    from cookiecutter.exceptions import UndefinedVariableInTemplate
+    from cookiecutter.find import find_template
+    from cookiecutter.generate import render_and_create_dir
+    from cookiecutter.hooks import run_hook_from_repo_dir
+    from cookiecutter.utils import create_env_with_context, rmtree
+    from jinja2 import UndefinedError
+
+    repo_dir = os.path.abspath(repo_dir)
+    if any(os.path.splitext(h)[0] == 'pre_prompt' for h in _hooks(repo_dir)):
+        raise UnsupportedTemplate("pre prompt hook")
+
+    context = build_context(repo_dir, extra_context, output_dir)
+
+    with _import_path(repo_dir):
+        env = create_env_with_context(context)
+
+    template_dir = str(find_template(repo_dir, env))
+    unrendered_dir = os.path.basename(template_dir)
+    try:
+        project_dir, created = render_and_create_dir(unrendered_dir, context, output_dir, env, overwrite_if_exists)
+    except UndefinedError as err:
+        raise UndefinedVariableInTemplate(f"Unable to create project directory '{unrendered_dir}'", err, context)
+
+    project_dir = os.path.abspath(project_dir)
+    delete_project_on_failure = created
+
+    run_hook_from_repo_dir(repo_dir, 'pre_gen_project', project_dir, context, delete_project_on_failure)
+
+    renderer = TreeRenderer(repo_dir, template_dir, project_dir, context)
+    try:
+        generated = [f for f in utils.ordered_map(renderer, _walk(renderer, context), jobs, processes) if f]
+    except UndefinedError as err:
+        if delete_project_on_failure:
+            rmtree(project_dir)
+
+        raise UndefinedVariableInTemplate("Unable to generate the project files", err, context)
+
+    run_hook_from_repo_dir(repo_dir, 'post_gen_project', project_dir, context, delete_project_on_failure)
+
+    return project_dir, generated
+
+
+def _hooks(repo_dir: str) -> List[str]:
+    hooks_dir = os.path.join(repo_dir, 'hooks')
+    return os.listdir(hooks_dir) if os.path.isdir(hooks_dir) else []
@@ -1,6 +1,118 @@
+import importlib
+import logging
+from typing import Dict, List, Optional
+
 import click
 
-cli = click.Group(
+# Commands generating files; only their runs are appended to the span log
+SPAN_LOG_COMMANDS = {'cc process', 'run', 'simple process', 'simple process-batch'}
+
+
+class LazyGroup(click.Group):
+    """Click group loading its sub commands from modules on first use.
+
+    The sub commands are given as `{name: 'module:attribute'}`; the module is imported only when
+    the command is invoked (or listed in help), keeping the start-up time of other commands low.
+    """
+
+    def __init__(self, *args, lazy_commands: Dict[str, str] = None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = lazy_commands or {}
+
+    def list_commands(self, ctx: click.Context) -> List[str]:
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_commands))
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> Optional[click.Command]:
+        if cmd_name not in self.commands and cmd_name in self.lazy_commands:
+            module_name, attribute = self.lazy_commands[cmd_name].split(':')
+            command = getattr(importlib.import_module(module_name), attribute)
+            self.add_command(command, cmd_name)
+
+        return super().get_command(ctx, cmd_name)
+
+    def resolve_command(self, ctx: click.Context, args: List[str]):
+        cmd_name, cmd, rest = super().resolve_command(ctx, args)
+
+        # Name of the command in the span records, e.g. `simple process`
+        path = [cmd_name]
+        if isinstance(cmd, click.Group) and rest and rest[0] in cmd.list_commands(ctx):
+            path.append(rest[0])
+        ctx.meta['ccx.command'] = ' '.join(path)
+
+        return cmd_name, cmd, rest
+
+    def invoke(self, ctx: click.Context):
+        try:
+            return super().invoke(ctx)
+        except Exception as e:
+            if not (isinstance(e, click.exceptions.Exit) and e.exit_code == 0):
+                ctx.meta['ccx.error'] = str(e) or type(e).__name__
+
+            raise
+
+
+def _start_profiler(profile: Optional[str]) -> None:
+    """Record the phases of the command; written to the profile file as Chrome trace events and summarized
+    in the span log configured in `ccx-config.yml`"""
+    from . import profiler
+    from .core import config
+
+    ctx = click.get_current_context()
+    logged = ctx.meta.get('ccx.command') in SPAN_LOG_COMMANDS
+    if profile is None and not logged:
+        return
+
+    # Started before reading the configuration to record its load; dropped if neither output is requested
+    profiler.start()
+    try:
+        span_log = config.span_log_path if logged else None
+    except Exception:
+        profiler.stop()
+        raise
+
+    if profile is None and span_log is None:
+        profiler.stop()
+        return
+
+    def finish():
+        run = profiler.stop()
+
+        if profile is not None:
+            run.write(profile)
+            logging.info(f"Profile written to {profile}")
+
+        if span_log is not None:
+            error = ctx.meta.get('ccx.error')
+            run.metadata.update(command=ctx.meta.get('ccx.command'), status='error' if error else 'ok')
+            if error:
+                run.metadata['error'] = error
+
+            try:
+                run.write_span_log(span_log)
+            except OSError as e:
+                logging.warning(f"Unable to write the span log {span_log} ({e})")
+
+    ctx.call_on_close(finish)
+
+
+cli = LazyGroup(
     name='cookiecutter-x', help="Cookiecutter eXtended",
-    context_settings={'help_option_names': ['-h', '--help']}
+    context_settings={'help_option_names': ['-h', '--help']},
+    params=[
+        click.Option(
+            ['--profile'], type=click.Path(dir_okay=False, writable=True),
+            help="Write the wall and CPU time of each phase to the file as Chrome trace events"
+        )
+    ],
+    callback=_start_profiler,
+    lazy_commands={
+        'cc': 'cookiecutter_x.cookiecutter_templates:cookiecutter_cmd',
+        'completion': 'cookiecutter_x.completion:completion',
+        'index': 'cookiecutter_x.template_index:index',
+        'quick-start': 'cookiecutter_x.quick_start:quick_start',
+        'run': 'cookiecutter_x.plan:run',
+        'search': 'cookiecutter_x.search:search',
+        'serve': 'cookiecutter_x.daemon:serve',
+        'simple': 'cookiecutter_x.simple_templates:simple',
+    }
 )
@@ -0,0 +1,280 @@
+import json
+import logging
+import os
+import shlex
+import shutil
+import tempfile
+from typing import Dict, List
+
+import click
+
+from . import utils
+from .core import config, CCXError, read_template_file
+
+COMPLETION_DIR_NAME = 'completion'
+SHELLS = ('bash', 'zsh', 'fish')
+
+# Age of the cache (in minutes) after which the shell refreshes it in the background
+REFRESH_MINUTES = 10
+# Touched by the shell before starting a refresh and removed by a successful refresh; while it is more recent than
+# REFRESH_MINUTES no other refresh is started, i.e., one is running or failed recently
+REFRESHING_SUFFIX = '.refreshing'
+
+# The shell functions only read the cache files; the interpreter runs only to refresh them
+BASH_SCRIPT = r'''
+_cookiecutter_x_completion() {
+    local cache=%(cache)s
+    local cur="${COMP_WORDS[COMP_CWORD]}" kind="${COMP_WORDS[1]}" command="${COMP_WORDS[2]}" words=""
+
+    if [[ -z "$(find %(marker)s -mmin -%(minutes)d 2>/dev/null)" ]]; then
+        if [[ ! -f "$cache/commands" ]]; then
+            mkdir -p "$(dirname %(marker)s)" && touch %(marker)s
+            %(refresh)s >/dev/null 2>&1
+        elif [[ -n "$(find "$cache/commands" -mmin +%(minutes)d 2>/dev/null)" ]]; then
+            touch %(marker)s
+            (%(refresh)s >/dev/null 2>&1 &)
+        fi
+    fi
+
+    if [[ $COMP_CWORD -eq 1 ]]; then
+        words="$(cat "$cache/commands" 2>/dev/null)"
+    elif [[ $COMP_CWORD -eq 2 ]]; then
+        words="$(cat "$cache/$kind/commands" 2>/dev/null)"
+    elif [[ "$cur" == -* ]]; then
+        words="$(cat "$cache/$kind/options/$command" "$cache/$kind/variables/${COMP_WORDS[3]}" 2>/dev/null)"
+    elif [[ $COMP_CWORD -eq 3 ]] && grep -qxF -- "$command" "$cache/$kind/template-commands" 2>/dev/null; then
+        words="$(cat "$cache/$kind/templates" 2>/dev/null)"
+    fi
+
+    COMPREPLY=($(compgen -W "$words" -- "$cur"))
+}
+
+complete -o default -F _cookiecutter_x_completion %(prog)s
+'''
+
+ZSH_SCRIPT = r'''
+_cookiecutter_x_completion() {
+    local cache=%(cache)s kind="${words[2]}" command="${words[3]}"
+    local -a candidates
+
+    if [[ -z "$(find %(marker)s -mmin -%(minutes)d 2>/dev/null)" ]]; then
+        if [[ ! -f "$cache/commands" ]]; then
+            mkdir -p "$(dirname %(marker)s)" && touch %(marker)s
+            %(refresh)s >/dev/null 2>&1
+        elif [[ -n "$(find "$cache/commands" -mmin +%(minutes)d 2>/dev/null)" ]]; then
+            touch %(marker)s
+            (%(refresh)s >/dev/null 2>&1 &)
+        fi
+    fi
+
+    if (( CURRENT == 2 )); then
+        candidates=(${(f)"$(cat "$cache/commands" 2>/dev/null)"})
+    elif (( CURRENT == 3 )); then
+        candidates=(${(f)"$(cat "$cache/$kind/commands" 2>/dev/null)"})
+    elif [[ "$PREFIX" == -* ]]; then
+        candidates=(${(f)"$(cat "$cache/$kind/options/$command" "$cache/$kind/variables/${words[4]}" 2>/dev/null)"})
+    elif (( CURRENT == 4 )) && grep -qxF -- "$command" "$cache/$kind/template-commands" 2>/dev/null; then
+        candidates=(${(f)"$(cat "$cache/$kind/templates" 2>/dev/null)"})
+    else
+        _files
+        return
+    fi
+
+    compadd -- $candidates
+}
+
+compdef _cookiecutter_x_completion %(prog)s
+'''
+
+FISH_SCRIPT = r'''
+function __cookiecutter_x_completion
+    set -l cache %(cache)s
+    set -l tokens (commandline -opc)
+    set -l current (commandline -ct)
+
+    set -l recent (find %(marker)s -mmin -%(minutes)d 2>/dev/null)
+    set -l stale (find "$cache/commands" -mmin +%(minutes)d 2>/dev/null)
+    if test -z "$recent"
+        if not test -f "$cache/commands"
+            mkdir -p (dirname %(marker)s); and touch %(marker)s
+            %(refresh)s >/dev/null 2>&1
+        else if test -n "$stale"
+            touch %(marker)s
+            %(refresh)s >/dev/null 2>&1 &
+        end
+    end
+
+    set -l n (count $tokens)
+    if test $n -eq 1
+        cat "$cache/commands" 2>/dev/null
+    else if test $n -eq 2
+        cat "$cache/$tokens[2]/commands" 2>/dev/null
+    else if string match -q -- '-*' "$current"
+        cat "$cache/$tokens[2]/options/$tokens[3]" "$cache/$tokens[2]/variables/$tokens[4]" 2>/dev/null
+    else if test $n -eq 3; and grep -qxF -- "$tokens[3]" "$cache/$tokens[2]/template-commands" 2>/dev/null
+        cat "$cache/$tokens[2]/templates" 2>/dev/null
+    end
+end
+
+complete -c %(prog)s -f -a '(__cookiecutter_x_completion)'
+'''
+
+SCRIPTS = {'bash': BASH_SCRIPT, 'zsh': ZSH_SCRIPT, 'fish': FISH_SCRIPT}
+
+
+def options(command: click.Command) -> List[str]:
+    return sorted(o for p in command.params if isinstance(p, click.Option) for o in p.opts + p.secondary_opts)
+
+
+class CompletionCache:
+    """Command names, options, template names and template variable flags, one sorted file per completion point.
+
+    The layout mirrors the command line, e.g. `simple/templates` holds the simple template names and
+    `simple/variables/<template>` the `--variable` flags of a template, so the shell completes a word by reading
+    a single small file. The cache is rebuilt by `refresh`; template variables come from the manifest cache,
+    i.e., only changed templates are parsed again.
+    """
+
+    def __init__(self, path: str) -> None:
+        super().__init__()
+        self.path = path
+
+    @property
+    def marker_path(self) -> str:
+        return self.path + REFRESHING_SUFFIX
+
+    @staticmethod
+    def _commands(group: click.Group) -> Dict[str, List[str]]:
+        ctx = click.Context(group, info_name=group.name)
+        files = {'commands': group.list_commands(ctx)}
+
+        for name in group.list_commands(ctx):
+            command = group.get_command(ctx, name)
+            if not isinstance(command, click.Group):
+                continue
+
+            sub_ctx = click.Context(command, info_name=name, parent=ctx)
+            files[f"{name}/commands"] = command.list_commands(sub_ctx)
+            files[f"{name}/template-commands"] = []
+
+            for sub_name in command.list_commands(sub_ctx):
+                sub_command = command.get_command(sub_ctx, sub_name)
+                files[f"{name}/options/{sub_name}"] = options(sub_command)
+
+                if any(isinstance(p, click.Argument) and p.name == 'template' for p in sub_command.params):
+                    files[f"{name}/template-commands"].append(sub_name)
+
+        return files
+
+    @staticmethod
+    def _variables(kind: str, path: str) -> List[str]:
+        """Names of the template variables, read from its manifest; archive and git templates are not fetched"""
+        if kind == 'simple':
+            content = read_template_file(path, 'ccx.yml')
+            variables = (utils.yaml_load(content) or {}).get('variables') if content is not None else None
+        else:
+            content = read_template_file(path, 'cookiecutter.json')
+            variables = json.loads(content) if content is not None else None
+
+        if not isinstance(variables, dict):
+            raise CCXError("No variables found")
+
+        return list(variables)
+
+    @classmethod
+    def _templates(cls) -> Dict[str, List[str]]:
+        files = {}
+        for kind, resolver in [
+            ('simple', config.simple_template_resolver()),
+            ('cc', config.cookiecutter_template_resolver()),
+        ]:
+            templates = resolver.list()
+            names = sorted(templates)
+            files[f"{kind}/templates"] = names
+
+            for name in names:
+                try:
+                    variables = cls._variables(kind, templates[name])
+                except Exception as e:
+                    logging.debug(f"Unable to read the variables of {kind} template {name} ({e})")
+                    continue
+
+                # Cookiecutter internal variables can't be modified from command line
+                flags = (f"--{v}" for v in variables if not v.startswith('_'))
+                files[f"{kind}/variables/{name}"] = sorted(flags)
+
+        return files
+
+    def refresh(self, group: click.Group) -> int:
+        """Rebuild the cache of the command group and the configured templates; returns the number of files"""
+        files = self._commands(group)
+        files.update(self._templates())
+
+        parent = os.path.dirname(self.path)
+        os.makedirs(parent, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix='.tmp-', dir=parent)
+        try:
+            for name, lines in files.items():
+                file_path = os.path.join(staging, *name.split('/'))
+                os.makedirs(os.path.dirname(file_path), exist_ok=True)
+                with open(file_path, 'w') as f:
+                    f.writelines(f"{line}\n" for line in lines)
+
+            # Swap the directories; the shell refreshes the cache itself in the short window without one
+            previous = f"{staging}.old"
+            if os.path.exists(self.path):
+                os.rename(self.path, previous)
+
+            os.rename(staging, self.path)
+            shutil.rmtree(previous, ignore_errors=True)
+        finally:
+            if os.path.exists(staging):
+                shutil.rmtree(staging)
+
+        # The shell may start a refresh again; a failed refresh leaves the marker, and is retried later
+        try:
+            os.remove(self.marker_path)
+        except FileNotFoundError:
+            pass
+
+        return len(files)
+
+    def script(self, shell: str, prog: str = 'cookiecutter-x') -> str:
+        if shell not in SCRIPTS:
+            raise CCXError(f"Unsupported shell {shell}; use one of {', '.join(SHELLS)}")
+
+        return SCRIPTS[shell].lstrip() % {
+            'cache': shlex.quote(self.path),
+            'marker': shlex.quote(self.marker_path),
+            'prog': prog,
+            'refresh': f"{prog} completion refresh",
+            'minutes': REFRESH_MINUTES,
+        }
+
+
+@click.group(
+    name="completion",
+    help="Shell completion of commands, template names and template variables"
+)
+def completion():
+    pass
+
+
+@completion.command(
+    name="script",
+    help="Print the completion script of the shell, e.g. `cookiecutter-x completion script bash >> ~/.bashrc`"
+)
+@click.argument('shell', type=click.Choice(SHELLS))
+def print_script(shell: str):
+    print(config.completion_cache.script(shell), end='')
+
+
+@completion.command(
+    name="refresh",
+    help="Rebuild the completion cache of the configured templates"
+)
+def refresh():
+    from .cli import cli
+
+    count = config.completion_cache.refresh(cli)
+    logging.info(f"Wrote {count} completion files to {config.completion_cache.path}")
@@ -1,19 +1,29 @@
 import json
 import logging
 import os
-from typing import List, Iterator, Dict, Any
+import tempfile
+from typing import List, Iterator, Dict, Any, Tuple
 
 import click
-from cached_property import cached_property
-from cookiecutter.main import cookiecutter
 
+from . import cc_engine
 from . import core
-from .cli import cli
+from . import daemon
+from . import profiler
+from . import utils
 from .core import TemplateResolver, CCXError
-from .template_processor import TemplateProcessor, Variable
+from .template_processor import TemplateProcessor, Variable, ArgumentParserError
+from .utils import cached_property
 
 
-@cli.group(
+def cookiecutter(*args, **kwargs):
+    # Importing cookiecutter is expensive; defer it until a template is actually processed
+    from cookiecutter.main import cookiecutter as _cookiecutter
+
+    return _cookiecutter(*args, **kwargs)
+
+
+@click.group(
     name="cc",
     help="Manage and process cookiecutter templates"
 )
@@ -40,8 +50,35 @@ class CookiecutterTemplateProcessor(TemplateProcessor):
 
         super().__init__(name, resolver)
 
+        self._engine = 'cookiecutter'
+        self._jobs = 1
+        self._processes = False
+        self._cache = False
+
+    def engine(self, engine: str) -> "CookiecutterTemplateProcessor":
+        """Generate with stock `cookiecutter` or the native `ccx` engine, which renders the files in parallel"""
+        if engine not in cc_engine.ENGINES:
+            raise CCXError(f"Unknown engine {engine}; use one of {', '.join(cc_engine.ENGINES)}")
+
+        self._engine = engine
+        return self
+
+    def jobs(self, jobs: int, processes: bool = False) -> "CookiecutterTemplateProcessor":
+        """Workers of the native engine; threads, or processes if `processes` is set"""
+        self._jobs = jobs
+        self._processes = processes
+        return self
+
+    def cache(self, cache: bool) -> "CookiecutterTemplateProcessor":
+        """Reuse the projects generated before from the same template and context, see `ProjectCache`"""
+        self._cache = cache
+        return self
+
     @cached_property
     def cookiecutter_data(self) -> Dict[str, Any]:
+        return self.manifest['cookiecutter_data']
+
+    def read_cookiecutter_data(self) -> Dict[str, Any]:
         cc_path = os.path.join(self.template_path, 'cookiecutter.json')
 
         if not os.path.exists(cc_path):
@@ -50,25 +87,140 @@ class CookiecutterTemplateProcessor(TemplateProcessor):
         with open(cc_path) as f:
             return json.load(f)
 
+    def manifest_sources(self) -> List[str]:
+        return super().manifest_sources() + [os.path.join(self.template_path, 'cookiecutter.json')]
+
+    def compile_manifest(self) -> Dict[str, Any]:
+        self.cookiecutter_data = self.read_cookiecutter_data()
+
+        manifest = super().compile_manifest()
+        manifest['cookiecutter_data'] = self.cookiecutter_data
+        return manifest
+
     def get_variables(self) -> Iterator[Variable]:
         for name, default_value in self.cookiecutter_data.items():
             yield Variable(name=name, required=False, default=default_value)
 
     def process(self, arguments: List[str]):
-        extra_context = self.parse_arguments(arguments)
+        profiler.annotate(template=self.name, kind='cookiecutter')
+        self.process_context(self.parse_arguments(arguments))
+
+    def extra_context(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        """Extra context of the variable values, e.g. of a plan step; unlike arguments, lists and dicts are kept"""
+        unknown = set(values) - {variable.name for variable in self.variables}
+        if unknown:
+            raise ArgumentParserError(f"unknown variables {', '.join(sorted(unknown))}")
 
-        logging.info(f"Applying template {self.name} in current directory")
+        extra_context = self.parse_arguments([])
+        # Missing values keep the default
+        extra_context.update((name, value) for name, value in values.items() if value is not None)
+        return extra_context
+
+    def process_context(self, extra_context: Dict[str, Any]):
+        where = 'current directory' if self._output_dir == '.' else self._output_dir
+        logging.info(f"Applying template {self.name} in {where}")
         # Allow additional extensions and make default extension optional
-        extra_context['_extensions'] = 'cookiecutter_x.extensions.CCXExtension'
+        extra_context = dict(extra_context, _extensions='cookiecutter_x.extensions.CCXExtension')
+
+        if not self._only_changed:
+            # TODO Handle the overwrite better
+            self._generate(extra_context, os.path.abspath(self._output_dir), self._overwrite)
+            return
+
+        # Generate in a scratch directory next to the output, then move only the changed files into place
+        with tempfile.TemporaryDirectory(prefix='.ccx-', dir=self._output_dir) as generated:
+            self._generate(extra_context, os.path.abspath(generated), True)
+
+            written, skipped = self._sync_tree(generated, self._output_dir)
+
+        logging.info(f"{written} files written, {skipped} unchanged files skipped")
+
+    def _generate(self, extra_context: Dict[str, Any], output_dir: str, overwrite_if_exists: bool) -> None:
+        if not self._cache:
+            self._render(extra_context, output_dir, overwrite_if_exists)
+            return
 
-        # TODO Handle the overwrite better
-        cookiecutter(
-            self.template_path,
-            no_input=True,
-            extra_context=extra_context,
-            output_dir=os.path.abspath('.'),
-            overwrite_if_exists=self._overwrite
-        )
+        try:
+            context = cc_engine.build_context(self.template_path, extra_context, output_dir)
+        except cc_engine.UnsupportedTemplate as e:
+            logging.info(f"Template {self.name} uses {e}; not caching it")
+            self._render(extra_context, output_dir, overwrite_if_exists)
+            return
+
+        from .project_cache import template_fingerprint
+
+        cache = core.config.project_cache
+        key = cache.key(template_fingerprint(self.template_path), context['cookiecutter'])
+
+        tree = cache.lookup(key)
+        if tree is None:
+            tree = cache.store(key, lambda d: self._render(extra_context, d, False))
+        else:
+            profiler.cache_hit('project')
+            logging.info(f"Using cached project {key[:12]}")
+
+        cache.materialize(tree, output_dir, overwrite_if_exists)
+
+    def _render(self, extra_context: Dict[str, Any], output_dir: str, overwrite_if_exists: bool) -> str:
+        """Generate the project with the selected engine; returns the project directory"""
+        project_dir = self._render_project(extra_context, output_dir, overwrite_if_exists)
+
+        if profiler.active():
+            for root, _, files in os.walk(project_dir):
+                for name in files:
+                    profiler.count_file(os.path.join(root, name))
+
+        return project_dir
+
+    def _render_project(self, extra_context: Dict[str, Any], output_dir: str, overwrite_if_exists: bool) -> str:
+        if self._engine == 'ccx':
+            try:
+                project_dir, _ = cc_engine.generate(
+                    self.template_path, extra_context, output_dir, overwrite_if_exists, self._jobs, self._processes
+                )
+                return project_dir
+            except cc_engine.UnsupportedTemplate as e:
+                logging.info(f"Template {self.name} uses {e}; generating with cookiecutter")
+
+        with profiler.span('cookiecutter', template=self.name):
+            return cookiecutter(
+                self.template_path,
+                no_input=True,
+                extra_context=extra_context,
+                output_dir=output_dir,
+                overwrite_if_exists=overwrite_if_exists
+            )
+
+    def _sync_tree(self, source: str, destination: str) -> Tuple[int, int]:
+        """Move the files of the source tree into the destination tree, skipping the identical files"""
+        changed = []
+        skipped = 0
+
+        for root, dirs, files in os.walk(source):
+            rel_root = os.path.relpath(root, source)
+
+            for d in dirs:
+                utils.make_dirs(os.path.normpath(os.path.join(destination, rel_root, d)))
+
+            for name in files:
+                source_file = os.path.join(root, name)
+                destination_file = os.path.normpath(os.path.join(destination, rel_root, name))
+
+                if not os.path.exists(destination_file):
+                    changed.append((source_file, destination_file))
+                elif utils.same_content(source_file, destination_file):
+                    skipped += 1
+                elif not self._overwrite:
+                    raise CCXError(f"Destination file {destination_file} exists; to overwrite pass overwrite flag")
+                else:
+                    changed.append((source_file, destination_file))
+
+        # Every conflict is reported above, before any file is touched
+        for source_file, destination_file in changed:
+            logging.info(f"Writing {destination_file}")
+            os.replace(source_file, destination_file)
+
+        return len(changed), skipped
 
     def cli_command(self) -> str:
         return "cookiecutter-x cc process"
@@ -81,6 +233,9 @@ class CookiecutterTemplateProcessor(TemplateProcessor):
 @click.argument("template")
 @click.option('-a', '--all-arguments', help="Print all argument including jinja templates", default=False, is_flag=True)
 def print_template_doc(template: str, all_arguments: bool):
+    if daemon.forward({'command': 'doc', 'kind': 'cc', 'template': template, 'all_arguments': all_arguments}):
+        return
+
     CookiecutterTemplateProcessor(template).print_short_doc(all_arguments)
 
 
@@ -90,9 +245,33 @@ def print_template_doc(template: str, all_arguments: bool):
 )
 @click.argument('template')
 @click.option('-w', '--overwrite', is_flag=True, help="Overwrite existing file", default=False)
+@click.option('--only-changed', is_flag=True, help="Only write files whose content changed", default=False)
+@click.option(
+    '-e', '--engine', type=click.Choice(cc_engine.ENGINES), default='cookiecutter', show_default=True,
+    help="Generate with cookiecutter or the native engine rendering the files in parallel"
+)
+@click.option('-j', '--jobs', type=click.IntRange(min=1), help="Number of files to render in parallel (ccx engine)",
+              default=1)
+@click.option('--processes', is_flag=True, help="Use worker processes instead of threads for --jobs", default=False)
+@click.option('--cache', is_flag=True, default=False,
+              help="Reuse the project generated before with the same template and context")
 @click.pass_context
-def process(ctx, template: str, overwrite: bool):
+def process(
+        ctx, template: str, overwrite: bool, only_changed: bool, engine: str, jobs: int, processes: bool, cache: bool
+):
+    request = {
+        'command': 'process', 'kind': 'cc', 'template': template,
+        'arguments': list(ctx.args), 'overwrite': overwrite, 'only_changed': only_changed,
+        'engine': engine, 'jobs': jobs, 'processes': processes, 'cache': cache
+    }
+    if daemon.forward(request):
+        return
+
     CookiecutterTemplateProcessor(template) \
         .build_parser() \
         .overwrite(overwrite) \
+        .only_changed(only_changed) \
+        .engine(engine) \
+        .jobs(jobs, processes) \
+        .cache(cache) \
         .process(list(ctx.args))
@@ -1,10 +1,19 @@
 import logging
 import os
-from typing import Dict, Any, List, Iterator, Tuple
+from typing import Dict, Any, List, Iterator, Optional, Tuple, TYPE_CHECKING
 
 import click
-import yaml
-from cached_property import cached_property
+
+from . import profiler
+from .utils import cached_property, yaml_load
+
+if TYPE_CHECKING:
+    from .completion import CompletionCache
+    from .manifest_cache import ManifestCache
+    from .mirrors import GitMirrors
+    from .project_cache import ProjectCache
+    from .search import SearchIndex
+    from .template_index import TemplateIndex
 
 
 class CCXError(click.ClickException):
@@ -23,19 +32,33 @@ class CCXError(click.ClickException):
 class CCXConfig:
     CCX_DIR_NAME = '.cookiecutter-x'
     CCX_CONFIG_FILENAME = 'ccx-config.yml'
+    CCX_CACHE_DIR_NAME = 'cache'
+    CCX_MIRRORS_DIR_NAME = 'mirrors'
 
     def __init__(self) -> None:
         super().__init__()
         self.base_path = os.path.join(os.path.expanduser('~'), self.CCX_DIR_NAME)
         self.configs_path = os.path.join(self.base_path, self.CCX_CONFIG_FILENAME)
+        self.cache_path = os.path.join(self.base_path, self.CCX_CACHE_DIR_NAME)
+        self.mirrors_path = os.path.join(self.base_path, self.CCX_MIRRORS_DIR_NAME)
 
     @cached_property
     def configs(self) -> Dict[str, Any]:
         if not os.path.exists(self.configs_path):
             return {}
 
-        with open(self.configs_path, 'r') as f:
-            return yaml.safe_load(f)
+        def parse() -> Dict[str, Any]:
+            with open(self.configs_path, 'r') as f:
+                return yaml_load(f)
+
+        with profiler.span('config load', path=self.configs_path):
+            return self.manifest_cache.load([self.configs_path], parse)
+
+    @property
+    def manifest_cache(self) -> "ManifestCache":
+        from .manifest_cache import ManifestCache, MANIFESTS_DIR_NAME
+
+        return ManifestCache(os.path.join(self.cache_path, MANIFESTS_DIR_NAME))
 
     def get(self, var_name: str) -> Any:
         if not var_name:
@@ -52,6 +75,12 @@ class CCXConfig:
 
         return cur
 
+    @property
+    def span_log_path(self) -> Optional[str]:
+        """JSON lines file receiving a span record per run (`span_log.path`), if configured"""
+        path = self.get('span_log.path')
+        return self.normalize_path(path) if path else None
+
     def normalize_path(self, path: str) -> str:
         if path.startswith('~'):
             p = os.path.expanduser(path)
@@ -71,7 +100,28 @@ class CCXConfig:
         if isinstance(paths, str):
             paths = [paths]
 
-        return sorted(self.normalize_path(p) for p in paths)
+        return sorted(self.resolve_source(p) for p in paths)
+
+    def resolve_source(self, path: str) -> str:
+        """Local path of a template source; git sources (`git+<url>[@<ref>]`) are checked out from a mirror"""
+        from .mirrors import is_git_source
+
+        if is_git_source(path):
+            return self.git_mirrors.checkout(path)
+
+        return self.normalize_path(path)
+
+    @cached_property
+    def git_mirrors(self) -> "GitMirrors":
+        from .mirrors import GitMirrors, DEFAULT_TTL, DEFAULT_CHECKOUT_MAX_AGE
+
+        ttl = self.get('mirrors.ttl')
+        max_age = self.get('mirrors.checkout_max_age')
+        return GitMirrors(
+            self.mirrors_path,
+            DEFAULT_TTL if ttl is None else ttl,
+            DEFAULT_CHECKOUT_MAX_AGE if max_age is None else max_age
+        )
 
     @cached_property
     def simple_template_paths(self) -> List[str]:
@@ -81,8 +131,26 @@ class CCXConfig:
 
         return [os.path.join(self.base_path, 'simple-templates')]
 
+    @cached_property
+    def template_index(self) -> "TemplateIndex":
+        from .template_index import TemplateIndex
+
+        return TemplateIndex(os.path.join(self.cache_path, TemplateIndex.INDEX_FILENAME))
+
+    @cached_property
+    def search_index(self) -> "SearchIndex":
+        from .search import SearchIndex
+
+        return SearchIndex(os.path.join(self.cache_path, SearchIndex.INDEX_FILENAME))
+
+    @cached_property
+    def completion_cache(self) -> "CompletionCache":
+        from .completion import CompletionCache, COMPLETION_DIR_NAME
+
+        return CompletionCache(os.path.join(self.cache_path, COMPLETION_DIR_NAME))
+
     def simple_template_resolver(self) -> "TemplateResolver":
-        return TemplateResolver(self.simple_template_paths)
+        return TemplateResolver(self.simple_template_paths, self.template_index)
 
     @cached_property
     def cookiecutter_template_paths(self) -> List[str]:
@@ -94,32 +162,95 @@ class CCXConfig:
         return [os.path.join(self.base_path, 'cookiecutter-templates')]
 
     def cookiecutter_template_resolver(self) -> "TemplateResolver":
-        return TemplateResolver(self.cookiecutter_template_paths)
+        return TemplateResolver(self.cookiecutter_template_paths, self.template_index)
+
+    @cached_property
+    def project_cache(self) -> "ProjectCache":
+        from .project_cache import ProjectCache, PROJECTS_DIR_NAME, DEFAULT_MAX_SIZE_MB
+
+        return ProjectCache(
+            os.path.join(self.cache_path, PROJECTS_DIR_NAME),
+            int(float(self.get('project_cache.max_size_mb') or DEFAULT_MAX_SIZE_MB) * (1 << 20)),
+            self.get('project_cache.link') or 'reflink'
+        )
 
 
 config = CCXConfig()
 
 
+def list_source(path: str) -> List[str]:
+    """Template names in a template source path, a directory or a zip/tar archive"""
+    from .archives import is_archive, list_templates
+
+    if is_archive(path) and os.path.isfile(path):
+        return list_templates(path)
+
+    return os.listdir(path)
+
+
+def template_source_path(path: str) -> str:
+    """Directory of the template; templates of archives are written to the cache on first use"""
+    from .archives import is_archive, materialize
+
+    source, name = os.path.split(path)
+    if is_archive(source) and os.path.isfile(source):
+        return materialize(source, name, config.cache_path)
+
+    return path
+
+
+def read_template_file(path: str, filename: str) -> Optional[str]:
+    """Content of a file of the template, None if there is no such file; templates of archives are not extracted"""
+    from .archives import archive, is_archive
+
+    source, name = os.path.split(path)
+    if is_archive(source) and os.path.isfile(source):
+        content = archive(source).read(name, filename)
+        return content.decode('utf-8') if content is not None else None
+
+    try:
+        with open(os.path.join(path, filename), encoding='utf-8') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
 class TemplateResolver:
-    def __init__(self, paths: List[str]) -> None:
+    def __init__(self, paths: List[str], index: "TemplateIndex" = None) -> None:
         super().__init__()
         self.paths = paths
+        self.index = index
 
     def _iterate(self) -> Iterator[Tuple[str, str]]:
+        if self.index is not None:
+            yield from self.index.entries(self.paths)
+            return
+
         for p in self.paths:
             if not os.path.exists(p):
                 logging.warning(f"Template source path {p} not found; skipping")
                 continue
 
-            for t in os.listdir(p):
+            for t in list_source(p):
                 yield t, os.path.join(p, t)
 
     def list(self) -> Dict[str, str]:
         return {name: path for name, path in self._iterate()}
 
     def get_path(self, name: str) -> str:
+        with profiler.span('resolve', template=name):
+            return self._get_path(name)
+
+    def _get_path(self, name: str) -> str:
+        if self.index is not None:
+            path = self.index.lookup(self.paths).get(name)
+            if path is None:
+                raise CCXError(f"Template {name} not found")
+
+            return template_source_path(path)
+
         for _name, path in self._iterate():
             if _name == name:
-                return path
+                return template_source_path(path)
 
         raise CCXError(f"Template {name} not found")
@@ -0,0 +1,265 @@
+import contextlib
+import io
+import json
+import logging
+import os
+import socket
+import threading
+from typing import Any, Dict, List, Tuple
+
+import click
+
+from . import profiler
+from .core import config, CCXError
+
+SOCKET_FILENAME = 'daemon.sock'
+
+# Set to disable forwarding commands to a running daemon
+NO_DAEMON_ENV = 'CCX_NO_DAEMON'
+# Seconds to wait for the reply of the daemon; it serves one request at a time
+TIMEOUT_ENV = 'CCX_DAEMON_TIMEOUT'
+DEFAULT_TIMEOUT = 120
+CONNECT_TIMEOUT = 1
+
+
+def socket_path() -> str:
+    return os.path.join(config.base_path, SOCKET_FILENAME)
+
+
+def forward(request: Dict[str, Any], path: str = None) -> bool:
+    """Execute the request in the running daemon; returns False if no daemon is running.
+
+    Output and log messages of the daemon are replayed in this process, errors are raised as CCXError. Once the
+    request is sent it is not run again in this process: a daemon that does not reply in time, or stops without
+    replying, is reported as CCXError. While profiling, the daemon profiles the request and its spans and
+    counters are added to the run of this process.
+    """
+    path = path or socket_path()
+    if os.environ.get(NO_DAEMON_ENV) or not os.path.exists(path):
+        return False
+
+    request = dict(request, cwd=os.getcwd(), profile=profiler.active())
+    timeout = float(os.environ.get(TIMEOUT_ENV) or DEFAULT_TIMEOUT)
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        try:
+            s.settimeout(CONNECT_TIMEOUT)
+            s.connect(path)
+        except OSError:
+            # Stale socket of a daemon that is no longer running
+            return False
+
+        try:
+            s.settimeout(timeout)
+            sent = profiler.now()
+            s.sendall(json.dumps(request).encode() + b'\n')
+
+            with s.makefile('rb') as f:
+                response = json.loads(f.readline())
+        except socket.timeout:
+            raise CCXError(
+                f"The daemon did not reply within {timeout:g}s; it may be busy or stuck. "
+                f"Set {TIMEOUT_ENV} to wait longer, or {NO_DAEMON_ENV}=1 to run without it"
+            )
+        except (OSError, ValueError):
+            raise CCXError(f"The daemon stopped without replying; set {NO_DAEMON_ENV}=1 to run without it")
+
+    if response.get('profile'):
+        profiler.merge(response['profile'], sent)
+
+    for level, message in response['logs']:
+        logging.log(level, message)
+
+    if response['stdout']:
+        print(response['stdout'], end='')
+
+    if response['error']:
+        raise CCXError(response['error'])
+
+    return True
+
+
+def _is_listening(path: str) -> bool:
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+            s.connect(path)
+        return True
+    except OSError:
+        return False
+
+
+class _LogCollector(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__(logging.INFO)
+        self.records: List[Tuple[int, str]] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append((record.levelno, record.getMessage()))
+
+
+class CCXDaemon:
+    """Keeps the configuration, template resolvers and template processors warm between requests"""
+
+    def __init__(self, path: str = None) -> None:
+        super().__init__()
+        from .template_watcher import WatchingTemplateResolver
+
+        self.socket_path = path or socket_path()
+        self.resolvers = {
+            'simple': WatchingTemplateResolver(config.simple_template_paths),
+            'cc': WatchingTemplateResolver(config.cookiecutter_template_paths),
+        }
+
+        self._processors: Dict[Tuple[str, str], Tuple[Any, Any]] = {}
+        self.server = None
+        # Set once the server accepts connections
+        self.ready = threading.Event()
+
+    @staticmethod
+    def _stamp(template_path: str) -> Tuple[int, ...]:
+        """Modification times of the template directory and its manifests; changes invalidate cached processors"""
+        stamp = []
+        for p in [template_path, os.path.join(template_path, 'ccx.yml'), os.path.join(template_path, 'cookiecutter.json')]:
+            try:
+                stamp.append(os.stat(p).st_mtime_ns)
+            except OSError:
+                stamp.append(0)
+
+        return tuple(stamp)
+
+    def processor(self, kind: str, template: str):
+        if kind == 'simple':
+            from .simple_templates import SimpleTemplateProcessor as processor_class
+        elif kind == 'cc':
+            from .cookiecutter_templates import CookiecutterTemplateProcessor as processor_class
+        else:
+            raise CCXError(f"Unknown template kind {kind}")
+
+        resolver = self.resolvers[kind]
+        try:
+            path = resolver.get_path(template)
+        except CCXError:
+            # Created since the last change notification, e.g. with its source directory
+            resolver.refresh()
+            path = resolver.get_path(template)
+
+        stamp = self._stamp(path)
+
+        cached = self._processors.get((kind, template))
+        if cached is None or cached[0] != stamp:
+            cached = (stamp, processor_class(template, resolver))
+            self._processors[(kind, template)] = cached
+
+        return cached[1]
+
+    def execute(self, request: Dict[str, Any]) -> None:
+        processor = self.processor(request['kind'], request['template'])
+
+        if request['command'] == 'doc':
+            processor.print_short_doc(request.get('all_arguments', False))
+        elif request['command'] == 'process':
+            processor.overwrite(request.get('overwrite', False)).only_changed(request.get('only_changed', False))
+            processor.jobs(request.get('jobs', 1), request.get('processes', False))
+            if request['kind'] == 'simple':
+                processor.incremental(request.get('incremental', False))
+            else:
+                processor.engine(request.get('engine', 'cookiecutter')).cache(request.get('cache', False))
+
+            processor.process(request.get('arguments', []))
+        else:
+            raise CCXError(f"Unknown command {request['command']}")
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        collector = _LogCollector()
+        stdout = io.StringIO()
+        error = None
+
+        cwd = os.getcwd()
+        root = logging.getLogger()
+        level = root.level
+        root.setLevel(min(level, logging.INFO))
+        root.addHandler(collector)
+
+        # Profiled for the client, unless the daemon itself is being profiled
+        run = profiler.start() if request.get('profile') and not profiler.active() else None
+        try:
+            os.chdir(request.get('cwd', cwd))
+
+            with contextlib.redirect_stdout(stdout):
+                self.execute(request)
+
+        except click.ClickException as e:
+            error = e.message
+        except SystemExit as e:
+            # A processor exiting must not stop the daemon
+            if e.code not in (None, 0):
+                error = f"Exited with status {e.code}"
+        except Exception as e:
+            error = str(e) or e.__class__.__name__
+        finally:
+            os.chdir(cwd)
+            root.removeHandler(collector)
+            root.setLevel(level)
+            if run is not None:
+                profiler.stop()
+
+        return {
+            'stdout': stdout.getvalue(), 'logs': collector.records, 'error': error,
+            'profile': run.export() if run is not None else None
+        }
+
+    def serve_forever(self) -> None:
+        import socketserver
+
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                line = self.rfile.readline()
+                if not line:
+                    return
+
+                request = json.loads(line)
+                self.wfile.write(json.dumps(daemon.handle(request)).encode() + b'\n')
+
+        if os.path.exists(self.socket_path):
+            if _is_listening(self.socket_path):
+                raise CCXError(f"A daemon is already listening on {self.socket_path}")
+
+            os.unlink(self.socket_path)
+
+        os.makedirs(os.path.dirname(self.socket_path), exist_ok=True)
+
+        for resolver in self.resolvers.values():
+            resolver.start()
+
+        try:
+            with socketserver.UnixStreamServer(self.socket_path, Handler) as server:
+                os.chmod(self.socket_path, 0o600)
+                self.server = server
+                self.ready.set()
+
+                logging.info(f"Listening on {self.socket_path}")
+                server.serve_forever()
+        finally:
+            for resolver in self.resolvers.values():
+                resolver.stop()
+
+            self.ready.clear()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def shutdown(self) -> None:
+        if self.server is not None:
+            self.server.shutdown()
+
+
+@click.command(
+    name="serve",
+    help="Run a daemon keeping templates warm; process and doc commands are forwarded to it while it runs"
+)
+def serve():
+    try:
+        CCXDaemon().serve_forever()
+    except KeyboardInterrupt:
+        logging.info("Stopping the daemon")
@@ -0,0 +1,72 @@
+import logging
+import os
+from typing import Callable, Dict, Optional, Tuple
+
+from jinja2 import BaseLoader, Environment, FileSystemBytecodeCache, TemplateNotFound
+
+from .core import config
+
+BYTECODE_CACHE_DIR_NAME = 'jinja'
+
+
+class TemplateFileLoader(BaseLoader):
+    """Loads templates by their file path, so a single environment serves every template"""
+
+    def __init__(self, encoding: str = 'utf-8') -> None:
+        super().__init__()
+        self.encoding = encoding
+
+    @staticmethod
+    def _stat(path: str) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(path)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def get_source(self, environment: Environment, template: str) -> Tuple[str, str, Callable[[], bool]]:
+        stat = self._stat(template)
+        if stat is None:
+            raise TemplateNotFound(template)
+
+        with open(template, encoding=self.encoding) as f:
+            source = f.read()
+
+        return source, template, lambda: self._stat(template) == stat
+
+
+class CCXBytecodeCache(FileSystemBytecodeCache):
+    """Stores the compiled templates, keyed by the template path and the hash of its content"""
+
+    def __init__(self, directory: str) -> None:
+        super().__init__(directory, '__ccx_jinja2_%s.cache')
+
+    def dump_bytecode(self, bucket) -> None:
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            super().dump_bytecode(bucket)
+        except OSError as e:
+            # The cache is an optimization; never fail the generation for it
+            logging.debug(f"Unable to write template bytecode cache ({e})")
+
+
+_environments: Dict[str, Environment] = {}
+
+
+def template_environment() -> Environment:
+    """The process wide environment for simple templates; compiled templates are cached in memory and on disk"""
+    cache_path = os.path.join(config.cache_path, BYTECODE_CACHE_DIR_NAME)
+
+    if cache_path not in _environments:
+        from .extensions import CCXExtension
+
+        env = Environment(
+            loader=TemplateFileLoader(),
+            bytecode_cache=CCXBytecodeCache(cache_path),
+            lstrip_blocks=True, trim_blocks=True
+        )
+        env.add_extension(CCXExtension)
+
+        _environments[cache_path] = env
+
+    return _environments[cache_path]
@@ -1,8 +1,12 @@
 import os
-import re
 from datetime import datetime
 
 from jinja2.ext import Extension
+from jinja2.runtime import Context
+
+from .case import CASE_FILTERS
+from .. import profiler
+from .plugins import LazyPluginDict, PluginContext, FILTERS_GROUP, GLOBALS_GROUP
 
 
 class CCXExtension(Extension):
@@ -12,10 +16,6 @@ class CCXExtension(Extension):
         """Initialize the extension with the given environment."""
         super(CCXExtension, self).__init__(environment)
 
-        def snake_case(val: str) -> str:
-            s1 = re.sub('(.)([A-Z][a-z]+)', r'\1_\2', val)
-            return re.sub('([a-z0-9])([A-Z])', r'\1_\2', s1).lower()
-
         def remove_extension(val: str) -> str:
             if '.' not in val:
                 return val
@@ -28,8 +28,17 @@ class CCXExtension(Extension):
 
             return val.strip().replace('.', '/')
 
-        environment.filters['snake_case'] = snake_case
-        environment.filters['remove_extension'] = remove_extension
-        environment.filters['java_package_to_dir'] = java_package_to_dir
+        # Filters and globals of the installed plugins are loaded when a template uses them
+        if not isinstance(environment.filters, LazyPluginDict):
+            environment.filters = LazyPluginDict(FILTERS_GROUP, environment.filters)
+        if not isinstance(environment.globals, LazyPluginDict):
+            environment.globals = LazyPluginDict(GLOBALS_GROUP, environment.globals)
+        if environment.context_class is Context:
+            # Each render copies the globals into its context; plugin globals are resolved on a miss instead
+            environment.context_class = PluginContext
+
+        filters = dict(CASE_FILTERS, remove_extension=remove_extension, java_package_to_dir=java_package_to_dir)
+        # The environment outlives a run, e.g. in the daemon; the calls are counted whenever a later run profiles
+        environment.filters.update((name, profiler.counted(f"filter {name}", f)) for name, f in filters.items())
 
         environment.globals['n'] = datetime.now
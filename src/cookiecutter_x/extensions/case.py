@@ -0,0 +1,55 @@
+from functools import lru_cache
+from typing import Callable, Dict, Tuple
+
+from .. import utils
+
+# Templates call the filters many times per render on the same few identifiers; memoize them
+CACHE_SIZE = 1024
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def snake_case(val: str) -> str:
+    """`HelloWorld` -> `hello_world`; separators are kept as they are, use `words` based filters to replace them"""
+    return utils.mark_case_changes(val, '_').lower()
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def words(val: str) -> Tuple[str, ...]:
+    """Lower case words of an identifier or a phrase, split at case changes and separators"""
+    return tuple(utils.split_words(val))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def camel_case(val: str) -> str:
+    first, *rest = words(val) or ('',)
+    return first + ''.join(w.capitalize() for w in rest)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def pascal_case(val: str) -> str:
+    return ''.join(w.capitalize() for w in words(val))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def kebab_case(val: str) -> str:
+    return '-'.join(words(val))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def constant_case(val: str) -> str:
+    return '_'.join(words(val)).upper()
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def title_case(val: str) -> str:
+    return ' '.join(w.capitalize() for w in words(val))
+
+
+CASE_FILTERS: Dict[str, Callable[[str], str]] = {
+    'snake_case': snake_case,
+    'camel_case': camel_case,
+    'pascal_case': pascal_case,
+    'kebab_case': kebab_case,
+    'constant_case': constant_case,
+    'title_case': title_case,
+}
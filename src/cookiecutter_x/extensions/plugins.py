@@ -0,0 +1,73 @@
+from functools import lru_cache
+from typing import Any, Dict
+
+from jinja2.runtime import Context
+from jinja2.utils import missing
+
+FILTERS_GROUP = 'cookiecutter_x.filters'
+GLOBALS_GROUP = 'cookiecutter_x.globals'
+
+
+@lru_cache(maxsize=None)
+def entry_points(group: str) -> Dict[str, Any]:
+    """Name to entry point mapping of the group; nothing is imported until an entry point is loaded"""
+    try:
+        from importlib.metadata import entry_points as _entry_points
+    except ImportError:
+        # Python < 3.8
+        import pkg_resources
+
+        return {ep.name: ep for ep in pkg_resources.iter_entry_points(group)}
+
+    eps = _entry_points()
+    selected = eps.select(group=group) if hasattr(eps, 'select') else eps.get(group, [])
+
+    return {ep.name: ep for ep in selected}
+
+
+class LazyPluginDict(dict):
+    """Jinja filters or globals mapping, loading the plugin of a name from the entry point group on first lookup.
+
+    Jinja looks up the filters while compiling a template (templates loaded from the bytecode cache look them up
+    while rendering), so a plugin module is imported only when a template references one of its names.
+    """
+
+    def __init__(self, group: str, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.group = group
+
+    def _load(self, key: Any) -> bool:
+        if not isinstance(key, str):
+            return False
+
+        ep = entry_points(self.group).get(key)
+        if ep is None:
+            return False
+
+        self[key] = ep.load()
+        return True
+
+    def __missing__(self, key: Any) -> Any:
+        if self._load(key):
+            return self[key]
+
+        raise KeyError(key)
+
+    def __contains__(self, key: Any) -> bool:
+        return super().__contains__(key) or self._load(key)
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        return self[key] if key in self else default
+
+
+class PluginContext(Context):
+    """Render context resolving the names missing from the template variables and the loaded globals
+    with the plugin globals"""
+
+    def resolve_or_missing(self, key: str) -> Any:
+        rv = super().resolve_or_missing(key)
+
+        if rv is missing and isinstance(self.environment.globals, LazyPluginDict) and key in self.environment.globals:
+            return self.environment.globals[key]
+
+        return rv
@@ -0,0 +1,110 @@
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+from . import utils
+
+LOCK_FILENAME = '.ccx-lock.json'
+
+
+def _normalize(value: Any) -> Any:
+    # Compare the values the way they are stored in the lockfile
+    return json.loads(json.dumps(value))
+
+
+class GenerationLock:
+    """Records how each output file was generated, so unchanged files can be skipped on the next run.
+
+    For every output file the lockfile keeps the template, the hash of the template source, the variables
+    the source references (derived with `jinja2.meta`) along with their values, and the hash of the output.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: str = LOCK_FILENAME) -> None:
+        super().__init__()
+        self.path = path
+        self.data = self._load()
+
+    def _load(self) -> Dict[str, Any]:
+        empty = {'version': self.VERSION, 'templates': {}, 'files': {}}
+
+        if not os.path.exists(self.path):
+            return empty
+
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring invalid lockfile {self.path} ({e})")
+            return empty
+
+        if not isinstance(data, dict) or data.get('version') != self.VERSION:
+            return empty
+
+        return data
+
+    @property
+    def files(self) -> Dict[str, Dict[str, Any]]:
+        return self.data['files']
+
+    @staticmethod
+    def key(output_file: str) -> str:
+        return os.path.normpath(output_file)
+
+    def is_up_to_date(self, output_file: str, template: str, source_hash: str, variables: Dict[str, Any]) -> bool:
+        entry = self.files.get(self.key(output_file))
+
+        if entry is None or entry['template'] != template or entry['source'] != source_hash:
+            return False
+
+        if entry['referenced'] is None or not os.path.exists(output_file):
+            return False
+
+        for name in entry['referenced']:
+            if (name in variables) != (name in entry['variables']):
+                return False
+
+            if name in variables and _normalize(variables[name]) != entry['variables'][name]:
+                return False
+
+        return True
+
+    def generated(self, output_file: str) -> bool:
+        """True if the output file is unmodified since it was generated"""
+        entry = self.files.get(self.key(output_file))
+        return entry is not None and os.path.exists(output_file) and utils.file_hash(output_file) == entry['output']
+
+    @staticmethod
+    def file_record(
+            template: str, source_hash: str, referenced: Optional[List[str]], variables: Dict[str, Any],
+            output_file: str
+    ) -> Dict[str, Any]:
+        """The lockfile entry of an output file; `referenced` is None if the dependencies can't be determined"""
+        return {
+            'template': template,
+            'source': source_hash,
+            'referenced': sorted(referenced) if referenced is not None else None,
+            'variables': {
+                name: _normalize(variables[name]) for name in (referenced or []) if name in variables
+            },
+            'output': utils.file_hash(output_file)
+        }
+
+    def record_file(self, output_file: str, record: Dict[str, Any]) -> None:
+        self.files[self.key(output_file)] = record
+
+    def record_template(self, template: str, fingerprint: str, variables: Dict[str, Any]) -> None:
+        self.data['templates'][template] = {'fingerprint': fingerprint, 'variables': _normalize(variables)}
+
+    def save(self) -> None:
+        tmp_path = utils.temp_path(self.path)
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(self.data, f, indent=2, sort_keys=True)
+
+            os.replace(tmp_path, self.path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
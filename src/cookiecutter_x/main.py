@@ -1,18 +1,20 @@
 import logging
-
-import coloredlogs
+import sys
 
 from .cli import cli
-# Here we are loading the modules that have commands.
-# Do NOT remove these
-from . import simple_templates
-from . import cookiecutter_templates
-from . import quick_start
 
 
 def main():
     logging_format = '[%(asctime)s] %(levelname)s: %(message)s'
-    coloredlogs.install(level=logging.INFO, logger=logging.getLogger(), fmt=logging_format)
+    # The default date format of coloredlogs; the output is the same with and without colors
+    date_format = '%Y-%m-%d %H:%M:%S'
+
+    if sys.stderr.isatty():
+        # coloredlogs is relatively expensive to import; only pay for it when the colors are visible
+        import coloredlogs
+        coloredlogs.install(level=logging.INFO, logger=logging.getLogger(), fmt=logging_format, datefmt=date_format)
+    else:
+        logging.basicConfig(level=logging.INFO, format=logging_format, datefmt=date_format)
 
     cli()
 
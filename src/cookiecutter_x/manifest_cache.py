@@ -0,0 +1,79 @@
+import hashlib
+import logging
+import os
+import pickle
+import sys
+from typing import Any, Callable, List, Optional, Tuple
+
+from . import profiler
+from . import utils
+
+MANIFESTS_DIR_NAME = 'manifests'
+
+Stamp = Tuple[Optional[Tuple[int, int]], ...]
+
+
+class ManifestCache:
+    """Parsed and validated template manifests (`ccx.yml`, `cookiecutter.json`) and configs, pickled on disk.
+
+    An entry is keyed by its source files and valid while their mtimes and sizes don't change, so a warm start
+    is a `stat` per source file and a single `pickle.loads`, without importing the YAML parser.
+    """
+
+    VERSION = 1
+
+    def __init__(self, directory: str) -> None:
+        super().__init__()
+        self.directory = directory
+
+    @staticmethod
+    def _stamp(sources: List[str]) -> Stamp:
+        stamp = []
+        for source in sources:
+            try:
+                st = os.stat(source)
+                stamp.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                stamp.append(None)
+
+        return tuple(stamp)
+
+    def _entry_path(self, sources: List[str]) -> str:
+        key = hashlib.sha256('\0'.join(os.path.abspath(s) for s in sources).encode()).hexdigest()[:32]
+        return os.path.join(self.directory, f"{key}.pickle")
+
+    def load(self, sources: List[str], build: Callable[[], Any]) -> Any:
+        """The cached value of the sources, or the value built (and cached) if any source changed"""
+        stamp = (self.VERSION, sys.version_info[:2], self._stamp(sources))
+        entry_path = self._entry_path(sources)
+
+        try:
+            with open(entry_path, 'rb') as f:
+                cached_stamp, value = pickle.load(f)
+
+            if cached_stamp == stamp:
+                profiler.cache_hit('manifest')
+                return value
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            # A corrupt or incompatible entry is rebuilt
+            logging.debug(f"Ignoring manifest cache entry {entry_path} ({e})")
+
+        value = build()
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = utils.temp_path(entry_path)
+            try:
+                with open(tmp_path, 'wb') as f:
+                    pickle.dump((stamp, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+                os.replace(tmp_path, entry_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+        except OSError as e:
+            logging.debug(f"Unable to write manifest cache entry {entry_path} ({e})")
+
+        return value
@@ -0,0 +1,200 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from typing import Any, Dict, Tuple
+
+from . import utils
+from .core import CCXError
+
+GIT_PREFIX = 'git+'
+DEFAULT_REF = 'HEAD'
+DEFAULT_TTL = 3600
+# Seconds a checkout is kept after its last use
+DEFAULT_CHECKOUT_MAX_AGE = 7 * 24 * 3600
+CHECKOUTS_DIR_NAME = 'checkouts'
+
+
+def is_git_source(path: str) -> bool:
+    return path.startswith(GIT_PREFIX)
+
+
+def parse_source(source: str) -> Tuple[str, str, str]:
+    """Split `git+<url>[@<ref>][#<directory>]` into the url, the ref and the directory of the templates.
+
+    The ref follows the last `@` after the last `/` of the repository path, i.e., the user of
+    `git+ssh://git@host/repo.git@v1` and `git+git@host:repo.git@v1` is not taken for a ref.
+    """
+    url, _, directory = source[len(GIT_PREFIX):].partition('#')
+
+    if '://' in url:
+        path_start = url.find('/', url.index('://') + 3)
+        path_start = len(url) if path_start == -1 else path_start
+    elif ':' in url:
+        # scp-like syntax, [user@]host:path
+        path_start = url.index(':') + 1
+    else:
+        path_start = 0
+
+    tail_start = max(path_start, url.rfind('/') + 1)
+    if '@' in url[tail_start:]:
+        url, ref = url.rsplit('@', 1)
+        return url, ref or DEFAULT_REF, directory
+
+    return url, DEFAULT_REF, directory
+
+
+def _git(*args: str) -> str:
+    try:
+        result = subprocess.run(['git', *args], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    except FileNotFoundError:
+        raise CCXError("git is required for git template sources")
+    except subprocess.CalledProcessError as e:
+        raise CCXError(f"git {' '.join(args)} failed: {e.stderr.strip()}")
+
+    return result.stdout.strip()
+
+
+class GitMirrors:
+    """Local bare mirrors of git template sources.
+
+    Each repository is mirrored once under `path` and fetched again only when the mirror is older than `ttl`
+    seconds. Refs are resolved to commits, and each commit is checked out once with `git clone --shared`, i.e.,
+    the checkout borrows the objects of the mirror. The state of a mirror (fetch time and resolved refs) is kept
+    next to it, so a fresh mirror costs no git call at all. Checkouts not used for `checkout_max_age` seconds
+    are removed when a new one is created.
+    """
+
+    def __init__(self, path: str, ttl: int = DEFAULT_TTL, checkout_max_age: int = DEFAULT_CHECKOUT_MAX_AGE) -> None:
+        super().__init__()
+        self.path = path
+        self.ttl = ttl
+        self.checkout_max_age = checkout_max_age
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha256(url.encode()).hexdigest()[:16]
+
+    def _state_path(self, url: str) -> str:
+        return os.path.join(self.path, f"{self._key(url)}.json")
+
+    def mirror_path(self, url: str) -> str:
+        return os.path.join(self.path, f"{self._key(url)}.git")
+
+    def _load_state(self, url: str) -> Dict[str, Any]:
+        try:
+            with open(self._state_path(url)) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return {'url': url, 'fetched': 0, 'refs': {}}
+
+        return state if state.get('url') == url else {'url': url, 'fetched': 0, 'refs': {}}
+
+    def _save_state(self, url: str, state: Dict[str, Any]) -> None:
+        tmp_path = utils.temp_path(self._state_path(url))
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(state, f)
+
+            os.replace(tmp_path, self._state_path(url))
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def update(self, url: str, state: Dict[str, Any]) -> None:
+        """Create the mirror, or fetch it if it is older than the TTL"""
+        mirror = self.mirror_path(url)
+
+        if not os.path.isdir(mirror):
+            logging.info(f"Mirroring {url}")
+            os.makedirs(self.path, exist_ok=True)
+            staging = tempfile.mkdtemp(prefix='.tmp-', dir=self.path)
+            try:
+                _git('clone', '--quiet', '--mirror', url, staging)
+                os.rename(staging, mirror)
+            finally:
+                if os.path.exists(staging):
+                    shutil.rmtree(staging)
+
+        elif time.time() - state['fetched'] > self.ttl:
+            logging.debug(f"Fetching {url}")
+            try:
+                _git('--git-dir', mirror, 'fetch', '--quiet', '--prune')
+            except CCXError as e:
+                # Keep working offline with the last fetched state
+                logging.warning(f"Unable to update the mirror of {url}; using the last fetched state ({e.message})")
+                return
+        else:
+            return
+
+        state['fetched'] = time.time()
+        state['refs'] = {}
+
+    def resolve(self, url: str, ref: str) -> str:
+        """Commit of the ref, fetching the mirror if the TTL expired"""
+        state = self._load_state(url)
+        self.update(url, state)
+
+        if ref not in state['refs']:
+            state['refs'][ref] = _git('--git-dir', self.mirror_path(url), 'rev-parse', '--verify', f"{ref}^{{commit}}")
+            self._save_state(url, state)
+
+        return state['refs'][ref]
+
+    def checkout(self, source: str) -> str:
+        """Directory with the files of the source (`git+<url>[@<ref>][#<directory>]`) at its ref"""
+        url, ref, directory = parse_source(source)
+        commit = self.resolve(url, ref)
+
+        checkout_path = os.path.join(self.path, CHECKOUTS_DIR_NAME, f"{self._key(url)}-{commit}")
+        if os.path.isdir(checkout_path):
+            # The modification time of the checkout is its last use
+            os.utime(checkout_path)
+        else:
+            self._checkout(url, commit, checkout_path)
+            self.prune(keep=checkout_path)
+
+        return os.path.normpath(os.path.join(checkout_path, directory))
+
+    def prune(self, keep: str = None) -> None:
+        """Remove the checkouts not used for `checkout_max_age` seconds"""
+        checkouts = os.path.join(self.path, CHECKOUTS_DIR_NAME)
+        if not os.path.isdir(checkouts):
+            return
+
+        expired = time.time() - self.checkout_max_age
+        for name in os.listdir(checkouts):
+            checkout_path = os.path.join(checkouts, name)
+            if name.startswith('.') or checkout_path == keep:
+                continue
+
+            try:
+                if os.stat(checkout_path).st_mtime < expired:
+                    logging.debug(f"Removing the unused checkout {checkout_path}")
+                    shutil.rmtree(checkout_path, ignore_errors=True)
+            except OSError:
+                # Removed by a concurrent run
+                pass
+
+    def _checkout(self, url: str, commit: str, checkout_path: str) -> None:
+        os.makedirs(os.path.dirname(checkout_path), exist_ok=True)
+        staging = tempfile.mkdtemp(prefix='.tmp-', dir=os.path.dirname(checkout_path))
+        try:
+            _git('clone', '--quiet', '--shared', '--no-checkout', self.mirror_path(url), staging)
+            _git('-C', staging, 'checkout', '--quiet', '--detach', commit)
+
+            # Only the files are needed; the objects were borrowed from the mirror, not copied
+            shutil.rmtree(os.path.join(staging, '.git'))
+
+            try:
+                os.rename(staging, checkout_path)
+            except OSError:
+                # Checked out by a concurrent run in the meantime
+                pass
+        finally:
+            if os.path.exists(staging):
+                shutil.rmtree(staging)
@@ -0,0 +1,177 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, Future, wait
+from typing import Any, Dict, List, NamedTuple, Set
+
+import click
+
+from . import profiler
+from . import utils
+from .core import config, CCXError
+from .template_processor import TemplateProcessor, ArgumentParserError
+
+KINDS = ('simple', 'cc')
+STEP_KEYS = {'name', 'kind', 'template', 'variables', 'after', 'output', 'overwrite', 'only_changed', 'engine'}
+
+# Cookiecutter changes the working directory of the process while generating; cookiecutter steps run one at a time
+_CWD_LOCK = threading.Lock()
+
+
+class Step(NamedTuple):
+    name: str
+    kind: str
+    processor: TemplateProcessor
+    # Parsed values; the extra context of cookiecutter steps
+    variables: Dict[str, Any]
+    output_dir: str
+    after: List[str]
+
+
+def read_plan(plan_file: str) -> List[Dict[str, Any]]:
+    with open(plan_file) as f:
+        plan = utils.yaml_load(f)
+
+    steps = plan.get('steps') if isinstance(plan, dict) else None
+    if not isinstance(steps, list) or not steps:
+        raise CCXError(f"Plan {plan_file} has no steps")
+
+    return steps
+
+
+def build_steps(step_definitions: List[Dict[str, Any]]) -> Dict[str, Step]:
+    """Validate the steps, and build their processors and variables with one resolver per kind.
+
+    Everything that can fail before generating (unknown templates, invalid variables, unknown or cyclic
+    dependencies) fails here, before any step runs.
+    """
+    from .cookiecutter_templates import CookiecutterTemplateProcessor
+    from .simple_templates import SimpleTemplateProcessor, row_to_arguments
+
+    resolvers = {'simple': config.simple_template_resolver(), 'cc': config.cookiecutter_template_resolver()}
+    processor_classes = {'simple': SimpleTemplateProcessor, 'cc': CookiecutterTemplateProcessor}
+
+    steps: Dict[str, Step] = {}
+    for number, definition in enumerate(step_definitions, start=1):
+        if not isinstance(definition, dict) or 'template' not in definition:
+            raise CCXError(f"Step {number} must have a template")
+
+        unknown = set(definition) - STEP_KEYS
+        if unknown:
+            raise CCXError(f"Step {number} has unknown keys {', '.join(sorted(unknown))}")
+
+        name = str(definition.get('name', definition['template']))
+        kind = definition.get('kind', 'simple')
+        if kind not in KINDS:
+            raise CCXError(f"Step {name} has unknown kind {kind}; use one of {', '.join(KINDS)}")
+        if name in steps:
+            raise CCXError(f"Duplicate step {name}; name the steps applying the same template")
+
+        # Absolute, as cookiecutter steps change the working directory while the other steps run
+        output_dir = os.path.abspath(definition.get('output', '.'))
+        processor = processor_classes[kind](definition['template'], resolvers[kind]) \
+            .overwrite(bool(definition.get('overwrite', False))) \
+            .only_changed(bool(definition.get('only_changed', False))) \
+            .output_dir(output_dir)
+
+        if 'engine' in definition:
+            if kind != 'cc':
+                raise CCXError(f"Step {name}: engine applies to cookiecutter templates only")
+            processor.engine(definition['engine'])
+
+        variables = definition.get('variables') or {}
+        try:
+            if kind == 'cc':
+                variables = processor.extra_context(variables)
+            else:
+                variables = processor.parse_arguments(row_to_arguments(variables))
+        except ArgumentParserError as e:
+            raise CCXError(f"Invalid variables of step {name}: {e}")
+
+        after = definition.get('after') or []
+        after = [after] if isinstance(after, str) else list(after)
+        steps[name] = Step(name, kind, processor, variables, output_dir, after)
+
+    for step in steps.values():
+        for dependency in step.after:
+            if dependency not in steps:
+                raise CCXError(f"Step {step.name} runs after unknown step {dependency}")
+
+    _check_cycles(steps)
+    return steps
+
+
+def _check_cycles(steps: Dict[str, Step]) -> None:
+    remaining = {name: set(step.after) for name, step in steps.items()}
+
+    while remaining:
+        ready = [name for name, after in remaining.items() if not after]
+        if not ready:
+            raise CCXError(f"Steps {', '.join(sorted(remaining))} depend on each other")
+
+        for name in ready:
+            del remaining[name]
+        for after in remaining.values():
+            after.difference_update(ready)
+
+
+def run_step(step: Step) -> None:
+    # The steps of a run apply different templates; they are recorded in the step spans, not the run's annotations
+    logging.info(f"Running step {step.name}")
+    utils.make_dirs(step.output_dir)
+
+    with profiler.span('step', step=step.name, template=step.processor.name):
+        if step.kind == 'cc':
+            with _CWD_LOCK:
+                step.processor.process_context(step.variables)
+        else:
+            step.processor.process_files(step.variables)
+
+
+def run_steps(steps: Dict[str, Step], jobs: int) -> None:
+    """Run each step once the steps it depends on are done, up to `jobs` steps at a time.
+
+    A failed step stops the run: the running steps finish, the steps not started yet are skipped.
+    """
+    pending = {name: set(step.after) for name, step in steps.items()}
+    running: Dict[Future, str] = {}
+    done: Set[str] = set()
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+            for name in [n for n, after in pending.items() if after <= done]:
+                del pending[name]
+                running[pool.submit(run_step, steps[name])] = name
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            failed = []
+            for future in finished:
+                name = running.pop(future)
+                if future.exception() is None:
+                    done.add(name)
+                else:
+                    failed.append((name, future.exception()))
+
+            if failed:
+                wait(running)
+                if pending:
+                    logging.warning(f"Skipping steps {', '.join(sorted(pending))}")
+
+                name, e = failed[0]
+                if isinstance(e, CCXError):
+                    raise CCXError(f"Step {name} failed: {e.message}")
+
+                raise e
+
+
+@click.command(
+    name="run",
+    help="Apply the templates listed in a plan file in one process; independent steps run concurrently"
+)
+@click.argument('plan_file', type=click.Path(exists=True, dir_okay=False))
+@click.option('-j', '--jobs', type=click.IntRange(min=1), help="Number of steps to run in parallel", default=4)
+def run(plan_file: str, jobs: int):
+    steps = build_steps(read_plan(plan_file))
+    run_steps(steps, jobs)
+
+    logging.info(f"Ran {len(steps)} steps")
@@ -0,0 +1,233 @@
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, ContextManager, Dict, Iterable, Iterator, List, Optional
+
+# Set by CI to correlate the span records of the runs of a job; a random id otherwise
+TRACE_ID_ENV = 'CCX_TRACE_ID'
+
+FILES_RENDERED = 'files rendered'
+BYTES_WRITTEN = 'bytes written'
+CACHE_HIT_PREFIX = 'cache hit '
+
+
+class Profiler:
+    """Wall and CPU time of the phases of a run, and call counts, written as Chrome trace events.
+
+    Spans are recorded per thread; the CPU time of a span is the CPU time of its thread. Spans of worker
+    processes are not collected. Open the written file with `chrome://tracing` or https://ui.perfetto.dev.
+    The same spans are summarized as one JSON line per run by `write_span_log`.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.pid = os.getpid()
+        self.events: List[Dict[str, Any]] = []
+        self.counts: Dict[str, int] = {}
+        self.metadata: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self._start_time = time.time()
+
+    def _now_us(self) -> float:
+        return (time.perf_counter() - self._start) * 1e6
+
+    def record(self, name: str, category: str, start: float, duration: float, cpu: float, args: Dict[str, Any]):
+        """Add a span of the current thread; start and duration in microseconds, CPU time in seconds"""
+        self.events.append({
+            'name': name, 'cat': category, 'ph': 'X', 'ts': start, 'dur': duration,
+            'pid': self.pid, 'tid': threading.get_ident(), 'args': dict(args, cpu_ms=round(cpu * 1000, 3))
+        })
+
+    @contextmanager
+    def span(self, name: str, category: str, args: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        start, cpu_start = self._now_us(), time.thread_time()
+        try:
+            yield args
+        finally:
+            self.record(name, category, start, self._now_us() - start, time.thread_time() - cpu_start, args)
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + n
+
+    def export(self) -> Dict[str, Any]:
+        """Spans, counters and annotations of the run, e.g. to return them from the daemon"""
+        return {'events': self.events, 'counts': self.counts, 'metadata': self.metadata}
+
+    def merge(self, run: Dict[str, Any], start: float) -> None:
+        """Add an exported run of another process, started at the given time (microseconds) of this run"""
+        self.events.extend(dict(e, ts=e['ts'] + start) for e in run['events'])
+        for name, n in run['counts'].items():
+            self.count(name, n)
+        self.metadata.update(run['metadata'])
+
+    def trace(self) -> Dict[str, Any]:
+        events = sorted(self.events, key=lambda e: e['ts'])
+        threads = {(e['pid'], e['tid']) for e in events}
+        events += [
+            {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': f"thread {n}"}}
+            for n, (pid, tid) in enumerate(
+                sorted(threads, key=lambda t: (t[0] != self.pid, t[1] != threading.main_thread().ident))
+            )
+        ]
+
+        if self.counts:
+            events.append({
+                'name': 'calls', 'ph': 'C', 'ts': self._now_us(), 'pid': self.pid, 'tid': threading.get_ident(),
+                'args': dict(sorted(self.counts.items()))
+            })
+
+        return {'traceEvents': events, 'displayTimeUnit': 'ms', 'otherData': {'counts': self.counts}}
+
+    def write(self, path: str) -> None:
+        with open(path, 'w') as f:
+            json.dump(self.trace(), f)
+
+    def span_record(self) -> Dict[str, Any]:
+        """Summary of the run: the annotations, file and cache counters, and the total duration of each stage"""
+        stages: Dict[str, float] = {}
+        for e in self.events:
+            stages[e['name']] = stages.get(e['name'], 0) + e['dur'] / 1000
+
+        return {
+            'trace_id': os.environ.get(TRACE_ID_ENV) or uuid.uuid4().hex,
+            'timestamp': round(self._start_time, 3),
+            'duration_ms': round(self._now_us() / 1000, 3),
+            **self.metadata,
+            'files_rendered': self.counts.get(FILES_RENDERED, 0),
+            'bytes_written': self.counts.get(BYTES_WRITTEN, 0),
+            'cache_hits': {
+                name[len(CACHE_HIT_PREFIX):]: n for name, n in sorted(self.counts.items())
+                if name.startswith(CACHE_HIT_PREFIX)
+            },
+            'stages': {name: round(ms, 3) for name, ms in sorted(stages.items())},
+        }
+
+    def write_span_log(self, path: str) -> None:
+        """Append the span record to the JSON lines file; a single write, so concurrent runs don't interleave"""
+        line = json.dumps(self.span_record(), separators=(',', ':')) + '\n'
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line.encode())
+        finally:
+            os.close(fd)
+
+
+_profiler: Optional[Profiler] = None
+
+
+def start() -> Profiler:
+    global _profiler
+
+    _profiler = Profiler()
+    return _profiler
+
+
+def stop() -> Optional[Profiler]:
+    global _profiler
+
+    profiler, _profiler = _profiler, None
+    return profiler
+
+
+def active() -> bool:
+    return _profiler is not None
+
+
+def now() -> float:
+    """Time since the start of the run in microseconds; 0 when not profiling"""
+    return _profiler._now_us() if _profiler is not None else 0
+
+
+def merge(run: Dict[str, Any], start: float) -> None:
+    """Add the run exported by another process, e.g. the daemon, when profiling"""
+    if _profiler is not None:
+        _profiler.merge(run, start)
+
+
+def span(name: str, category: str = 'ccx', **args: Any) -> ContextManager[Dict[str, Any]]:
+    """Record the enclosed block when profiling; a no-op otherwise. Yields the (mutable) arguments of the span"""
+    if _profiler is None:
+        return nullcontext(args)
+
+    return _profiler.span(name, category, args)
+
+
+@contextmanager
+def stream_spans(produce: str, consume: str, category: str = 'ccx', **args: Any) -> Iterator[Callable]:
+    """Record a lazy producer and the block consuming it as two spans, e.g. rendering chunks and writing them.
+
+    Yields a function wrapping the producer; the time spent in it is recorded as the `produce` span, the rest of
+    the block as the `consume` span. The work is interleaved, so the spans are placed one after the other.
+    """
+    if _profiler is None:
+        yield lambda iterable: iterable
+        return
+
+    profiler = _profiler
+    produced = [0.0, 0.0]
+
+    def timed(iterable: Iterable) -> Iterator:
+        it = iter(iterable)
+        while True:
+            wall, cpu = time.perf_counter(), time.thread_time()
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+            finally:
+                produced[0] += time.perf_counter() - wall
+                produced[1] += time.thread_time() - cpu
+
+            yield item
+
+    start, cpu_start = profiler._now_us(), time.thread_time()
+    try:
+        yield timed
+    finally:
+        duration, cpu = profiler._now_us() - start, time.thread_time() - cpu_start
+        produce_us = produced[0] * 1e6
+
+        profiler.record(produce, category, start, produce_us, produced[1], args)
+        profiler.record(consume, category, start + produce_us, duration - produce_us, cpu - produced[1], args)
+
+
+def count(name: str, n: int = 1) -> None:
+    if _profiler is not None:
+        _profiler.count(name, n)
+
+
+def annotate(**metadata: Any) -> None:
+    """Add fields to the span record of the run, e.g. the template name"""
+    if _profiler is not None:
+        _profiler.metadata.update(metadata)
+
+
+def count_file(path: str, written: bool = True) -> None:
+    """Count a rendered file, and its size if it was written"""
+    if _profiler is not None:
+        _profiler.count(FILES_RENDERED)
+        if written:
+            _profiler.count(BYTES_WRITTEN, os.path.getsize(path))
+
+
+def cache_hit(cache: str) -> None:
+    count(f"{CACHE_HIT_PREFIX}{cache}")
+
+
+def counted(name: str, func: Callable) -> Callable:
+    """Wrap the function to count its calls while profiling; whether profiling is checked at each call"""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        count(name)
+        return func(*args, **kwargs)
+
+    return wrapper
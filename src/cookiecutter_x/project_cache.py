@@ -0,0 +1,203 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from . import utils
+from .core import CCXError
+
+PROJECTS_DIR_NAME = 'projects'
+META_FILENAME = 'meta.json'
+TREE_DIR_NAME = 'tree'
+LINK_MODES = ('reflink', 'hardlink', 'copy')
+DEFAULT_MAX_SIZE_MB = 1024
+
+# ioctl request cloning a file on Linux (btrfs, xfs, ...)
+FICLONE = 0x40049409
+
+
+def template_fingerprint(template_path: str) -> str:
+    """Hash of the paths, sizes, modes and modification times of the files of the template, and of its directories"""
+    h = hashlib.sha256()
+    for rel_path in utils.walk_files(template_path):
+        st = os.stat(os.path.join(template_path, rel_path))
+        h.update(f"{rel_path}\0{st.st_size}\0{st.st_mode}\0{st.st_mtime_ns}\n".encode())
+
+    # Empty directories are generated too
+    for directory in _directories(template_path):
+        h.update(f"{directory}/\n".encode())
+
+    return h.hexdigest()
+
+
+def _directories(root: str) -> List[str]:
+    """Relative paths of the directories under the root, parents first"""
+    directories = []
+    for directory, names, _ in os.walk(root):
+        names.sort()
+        directories.extend(os.path.relpath(os.path.join(directory, name), root) for name in names)
+
+    return directories
+
+
+def _reflink(source: str, destination: str) -> None:
+    import fcntl
+
+    with open(source, 'rb') as src, open(destination, 'wb') as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+
+    shutil.copymode(source, destination)
+
+
+class ProjectCache:
+    """Content addressed cache of generated cookiecutter projects.
+
+    Entries are keyed by the template fingerprint and the resolved context; each holds the generated tree
+    and a `meta.json` with the project directory name and the size. Cached trees are materialized with
+    reflinks, hardlinks or plain copies; the least recently used entries are evicted beyond `max_size`.
+    """
+
+    def __init__(self, path: str, max_size: int = DEFAULT_MAX_SIZE_MB << 20, link: str = 'reflink') -> None:
+        super().__init__()
+
+        if link not in LINK_MODES:
+            raise CCXError(f"Unknown project cache link mode {link}; use one of {', '.join(LINK_MODES)}")
+
+        self.path = path
+        self.max_size = max_size
+        self.link = link
+
+    @staticmethod
+    def key(fingerprint: str, context: Dict[str, Any]) -> str:
+        context = dict(context)
+        # The output directory does not change the generated files
+        context.pop('_output_dir', None)
+
+        h = hashlib.sha256(fingerprint.encode())
+        h.update(json.dumps(context, sort_keys=True, default=str).encode())
+        return h.hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.path, key)
+
+    def _meta(self, entry_path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(entry_path, META_FILENAME)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def lookup(self, key: str) -> Optional[str]:
+        """Tree of the cached project, or None; marks the entry as recently used"""
+        entry_path = self._entry_path(key)
+        if self._meta(entry_path) is None:
+            return None
+
+        os.utime(os.path.join(entry_path, META_FILENAME))
+        return os.path.join(entry_path, TREE_DIR_NAME)
+
+    def store(self, key: str, generate: Callable[[str], str]) -> str:
+        """Generate the project with `generate(output_dir) -> project_dir` into the cache; returns the tree"""
+        utils.make_dirs(self.path)
+        staging = tempfile.mkdtemp(prefix='.tmp-', dir=self.path)
+
+        try:
+            tree = os.path.join(staging, TREE_DIR_NAME)
+            os.makedirs(tree)
+            project_dir = generate(tree)
+
+            size = sum(os.path.getsize(os.path.join(tree, p)) for p in utils.walk_files(tree))
+            with open(os.path.join(staging, META_FILENAME), 'w') as f:
+                json.dump({'project': os.path.relpath(project_dir, tree), 'size': size}, f)
+
+            try:
+                os.rename(staging, self._entry_path(key))
+            except OSError:
+                # Stored by a concurrent run in the meantime
+                pass
+        finally:
+            if os.path.exists(staging):
+                shutil.rmtree(staging)
+
+        self.evict(keep=self._entry_path(key))
+        return self.lookup(key)
+
+    def materialize(self, tree: str, output_dir: str, overwrite: bool) -> List[str]:
+        """Link or copy the cached tree into the output directory; returns the project directories"""
+        projects = sorted(os.listdir(tree))
+
+        if not overwrite:
+            for project in projects:
+                if os.path.exists(os.path.join(output_dir, project)):
+                    from cookiecutter.exceptions import OutputDirExistsException
+
+                    raise OutputDirExistsException(
+                        f'Error: "{os.path.join(output_dir, project)}" directory already exists'
+                    )
+
+        # Directories first, empty directories are part of the project
+        for directory in _directories(tree):
+            os.makedirs(os.path.join(output_dir, directory), exist_ok=True)
+
+        for rel_path in utils.walk_files(tree):
+            destination = os.path.join(output_dir, rel_path)
+
+            if os.path.lexists(destination):
+                os.remove(destination)
+
+            self._link(os.path.join(tree, rel_path), destination)
+
+        return [os.path.join(output_dir, p) for p in projects]
+
+    def _link(self, source: str, destination: str) -> None:
+        try:
+            if self.link == 'hardlink':
+                os.link(source, destination)
+                return
+
+            if self.link == 'reflink':
+                _reflink(source, destination)
+                return
+        except OSError:
+            # Another file system, or one without reflinks; fall back to copying
+            if os.path.exists(destination):
+                os.remove(destination)
+
+        shutil.copy2(source, destination)
+
+    def entries(self) -> List[Tuple[float, int, str]]:
+        """(last used, size, path) of the cache entries"""
+        if not os.path.isdir(self.path):
+            return []
+
+        entries = []
+        for name in os.listdir(self.path):
+            if name.startswith('.'):
+                continue
+
+            entry_path = os.path.join(self.path, name)
+            meta = self._meta(entry_path)
+            if meta is not None:
+                last_used = os.stat(os.path.join(entry_path, META_FILENAME)).st_mtime
+                entries.append((last_used, meta['size'], entry_path))
+
+        return sorted(entries)
+
+    def evict(self, keep: str = None) -> None:
+        """Remove the least recently used entries until the cache fits in `max_size`"""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+
+        for _, size, entry_path in entries:
+            if total <= self.max_size:
+                break
+
+            if entry_path == keep:
+                continue
+
+            logging.debug(f"Evicting {entry_path} from the project cache")
+            shutil.rmtree(entry_path, ignore_errors=True)
+            total -= size
@@ -2,12 +2,13 @@ import logging
 import os
 from typing import Dict
 
+import click
+
 from . import utils
-from .cli import cli
 from .core import config
 
 
-@cli.group(
+@click.group(
     name="quick-start",
     help="Generate example configuration and template"
 )
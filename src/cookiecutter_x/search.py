@@ -0,0 +1,285 @@
+import bisect
+import json
+import logging
+import math
+import os
+from typing import Any, Dict, List, Optional, Tuple, NamedTuple
+
+import click
+
+from . import utils
+from .core import config
+
+KINDS = ('simple', 'cc')
+
+
+class SearchResult(NamedTuple):
+    kind: str
+    name: str
+    path: str
+    description: str
+    score: float
+
+
+class SearchIndex:
+    """Persistent inverted index of the template names, descriptions, post generation actions and variable names.
+
+    Each template is stored with the modification times (and sizes) of its directory, `ccx.yml` and
+    `cookiecutter.json`; only the templates whose stamp changed are read again, and the template source
+    directories themselves are listed through the template index, i.e., only when their mtime changes.
+    """
+
+    INDEX_FILENAME = 'search-index.json'
+    VERSION = 1
+
+    # Weight of a term by the field it appears in
+    FIELD_WEIGHTS = {'name': 8, 'variables': 3, 'description': 2, 'post_gen': 1}
+
+    def __init__(self, index_path: str) -> None:
+        super().__init__()
+        self.index_path = index_path
+
+        self._data: Optional[Dict[str, Any]] = None
+        self._terms: Optional[List[str]] = None
+        self._dirty = False
+
+    @property
+    def docs(self) -> Dict[str, Dict[str, Any]]:
+        return self.data['docs']
+
+    @property
+    def postings(self) -> Dict[str, Dict[str, int]]:
+        return self.data['postings']
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        if self._data is None:
+            self._data = self._load()
+
+        return self._data
+
+    def _load(self) -> Dict[str, Any]:
+        empty = {'version': self.VERSION, 'docs': {}, 'postings': {}}
+        if not os.path.exists(self.index_path):
+            return empty
+
+        try:
+            with open(self.index_path) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Unable to read search index {self.index_path} ({e}); rebuilding")
+            return empty
+
+        if not isinstance(data, dict) or data.get('version') != self.VERSION:
+            return empty
+
+        return data
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+
+        try:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            tmp_path = utils.temp_path(self.index_path)
+            try:
+                with open(tmp_path, 'w') as f:
+                    json.dump(self.data, f)
+
+                os.replace(tmp_path, self.index_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+            self._dirty = False
+        except OSError as e:
+            logging.warning(f"Unable to write search index {self.index_path} ({e})")
+
+    @staticmethod
+    def _stamp(path: str) -> List[Optional[List[int]]]:
+        from .archives import is_archive
+
+        source = os.path.dirname(path)
+        if is_archive(source) and os.path.isfile(source):
+            files = [source]
+        else:
+            files = [path, os.path.join(path, 'ccx.yml'), os.path.join(path, 'cookiecutter.json')]
+
+        stamp = []
+        for f in files:
+            try:
+                st = os.stat(f)
+                stamp.append([st.st_mtime_ns, st.st_size])
+            except OSError:
+                stamp.append(None)
+
+        return stamp
+
+    @staticmethod
+    def read_fields(kind: str, name: str, path: str) -> Dict[str, str]:
+        """Searchable fields of a template, read from its `ccx.yml` and `cookiecutter.json`"""
+        from .core import read_template_file
+
+        fields = {'name': name, 'description': '', 'post_gen': '', 'variables': ''}
+
+        ccx_yml = read_template_file(path, 'ccx.yml')
+        if ccx_yml is not None:
+            data = utils.yaml_load(ccx_yml) or {}
+
+            fields['description'] = str(data.get('description') or '')
+            fields['post_gen'] = str(data.get('post_gen') or '')
+            if kind == 'simple':
+                fields['variables'] = ' '.join(data.get('variables') or {})
+
+        cookiecutter_json = read_template_file(path, 'cookiecutter.json') if kind == 'cc' else None
+        if cookiecutter_json is not None:
+            fields['variables'] = ' '.join(v for v in json.loads(cookiecutter_json) if not v.startswith('_'))
+
+        return fields
+
+    def _remove(self, doc_id: str) -> None:
+        doc = self.docs.pop(doc_id)
+        for term in doc['terms']:
+            postings = self.postings[term]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self.postings[term]
+
+    def _add(self, doc_id: str, kind: str, name: str, path: str, stamp: List[Any]) -> None:
+        try:
+            fields = self.read_fields(kind, name, path)
+        except Exception as e:
+            logging.warning(f"Unable to read template {path} ({e}); indexing the name only")
+            fields = {'name': name}
+
+        terms: Dict[str, int] = {}
+        for field, text in fields.items():
+            for term in utils.split_words(text):
+                terms[term] = terms.get(term, 0) + self.FIELD_WEIGHTS[field]
+
+        self.docs[doc_id] = {
+            'kind': kind, 'name': name, 'path': path, 'stamp': stamp,
+            'description': fields.get('description', '').strip().split('\n')[0], 'terms': sorted(terms)
+        }
+        for term, weight in terms.items():
+            self.postings.setdefault(term, {})[doc_id] = weight
+
+    def update(self, kind: str, entries: Dict[str, str]) -> bool:
+        """Index the (name to path) templates of the kind, re-reading only the changed ones; True if any changed"""
+        changed = False
+
+        for doc_id in [d for d, doc in self.docs.items() if doc['kind'] == kind]:
+            _, name = doc_id.split(':', 1)
+            if entries.get(name) != self.docs[doc_id]['path']:
+                self._remove(doc_id)
+                changed = True
+
+        for name, path in entries.items():
+            doc_id = f"{kind}:{name}"
+            stamp = self._stamp(path)
+
+            doc = self.docs.get(doc_id)
+            if doc is not None and doc['stamp'] == stamp:
+                continue
+
+            logging.debug(f"Indexing template {path}")
+            if doc is not None:
+                self._remove(doc_id)
+
+            self._add(doc_id, kind, name, path, stamp)
+            changed = True
+
+        if changed:
+            self._dirty = True
+            self._terms = None
+
+        return changed
+
+    def _matching_terms(self, token: str) -> List[str]:
+        """Indexed terms starting with the token"""
+        if self._terms is None:
+            self._terms = sorted(self.postings)
+
+        start = bisect.bisect_left(self._terms, token)
+        end = bisect.bisect_left(self._terms, token + '\uffff', lo=start)
+        return self._terms[start:end]
+
+    def search(self, query: str, kinds: Tuple[str, ...] = KINDS, limit: int = None) -> List[SearchResult]:
+        """Templates matching every word of the query (as a word prefix), best matches first.
+
+        A template scores the field weights of the matched terms times their inverse document frequency;
+        prefix matches count half.
+        """
+        tokens = utils.split_words(query)
+        if not tokens:
+            return []
+
+        total = len(self.docs)
+        scores: Optional[Dict[str, float]] = None
+
+        for token in tokens:
+            token_scores: Dict[str, float] = {}
+            for term in self._matching_terms(token):
+                postings = self.postings[term]
+                idf = math.log(1 + total / len(postings))
+                factor = idf if term == token else idf / 2
+
+                for doc_id, weight in postings.items():
+                    token_scores[doc_id] = max(token_scores.get(doc_id, 0), weight * factor)
+
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {d: s + token_scores[d] for d, s in scores.items() if d in token_scores}
+
+        results = [
+            SearchResult(doc['kind'], doc['name'], doc['path'], doc['description'], score)
+            for doc_id, score in scores.items()
+            for doc in [self.docs[doc_id]]
+            if doc['kind'] in kinds
+        ]
+        results.sort(key=lambda r: (-r.score, r.name, r.kind))
+
+        return results[:limit] if limit else results
+
+    def rebuild(self) -> None:
+        self._data = {'version': self.VERSION, 'docs': {}, 'postings': {}}
+        self._terms = None
+        self._dirty = True
+
+
+def update_search_index(search_index: SearchIndex, kinds: Tuple[str, ...] = KINDS) -> None:
+    """Bring the search index up to date with the configured template source paths"""
+    paths = {'simple': config.simple_template_paths, 'cc': config.cookiecutter_template_paths}
+
+    for kind in kinds:
+        search_index.update(kind, config.template_index.lookup(paths[kind]))
+
+    search_index.save()
+
+
+@click.command(
+    name="search",
+    help="Search the names, descriptions, post generation actions and variables of all templates"
+)
+@click.argument('query', nargs=-1, required=True)
+@click.option('-k', '--kind', type=click.Choice(KINDS), help="Search only simple or cookiecutter templates")
+@click.option('-n', '--limit', type=click.IntRange(min=1), default=20, help="Maximum number of results")
+@click.option('--rebuild', is_flag=True, default=False, help="Read all templates again")
+def search(query: Tuple[str, ...], kind: Optional[str], limit: int, rebuild: bool):
+    search_index = config.search_index
+    kinds = (kind,) if kind else KINDS
+
+    if rebuild:
+        search_index.rebuild()
+
+    update_search_index(search_index, kinds)
+
+    results = search_index.search(' '.join(query), kinds, limit)
+    if not results:
+        logging.info(f"No templates matching '{' '.join(query)}'")
+        return
+
+    width = max(len(r.name) for r in results)
+    for r in results:
+        print(f"{r.name:<{width}}  {r.kind:<6}  {r.description}".rstrip())
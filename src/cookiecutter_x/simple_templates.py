@@ -1,19 +1,39 @@
+import csv
+import hashlib
+import json
 import logging
 import os
-from typing import Any, Dict, List, Iterator
+import posixpath
+import shutil
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Iterator, NamedTuple, Optional, Tuple, TYPE_CHECKING
 
 import click
-from cached_property import cached_property
-from jinja2 import Environment
 
 from . import core
+from . import daemon
+from . import profiler
 from . import utils
-from .cli import cli
 from .core import TemplateResolver
-from .template_processor import TemplateProcessor, Variable
+from .lockfile import GenerationLock, LOCK_FILENAME
+from .template_processor import TemplateProcessor, Variable, ArgumentParserError
+from .utils import cached_property
+
+if TYPE_CHECKING:
+    from jinja2 import Environment, Template
+
+
+class RenderResult(NamedTuple):
+    output_file: str
+    written: bool
+    executable: bool = False
+    # Lockfile entry of the output file in the incremental mode
+    lock_record: Optional[Dict[str, Any]] = None
 
 
 class SimpleTemplateProcessor(TemplateProcessor):
+    # Number of rendered chunks joined before writing them to the output file
+    STREAM_BUFFER_SIZE = 64
 
     def __init__(self, name: str, resolver: TemplateResolver = None) -> None:
         if resolver is None:
@@ -21,6 +41,32 @@ class SimpleTemplateProcessor(TemplateProcessor):
 
         super().__init__(name, resolver)
 
+        self._jobs = 1
+        self._processes = False
+        self._lock: Optional[GenerationLock] = None
+        self._output_templates: Dict[str, "Template"] = {}
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Sent to worker processes; the parser and the environment are rebuilt on demand
+        state = self.__dict__.copy()
+        state.pop('template_env', None)
+        state['_parser'] = None
+        state['_output_templates'] = {}
+
+        return state
+
+    def jobs(self, jobs: int, processes: bool = False) -> "SimpleTemplateProcessor":
+        """Render and write the files with `jobs` worker threads, or worker processes if `processes` is set"""
+        self._jobs = jobs
+        self._processes = processes
+        return self
+
+    def incremental(self, incremental: bool) -> "SimpleTemplateProcessor":
+        """Track the generated files in a lockfile and re-render only the files whose template source
+        or referenced variables changed since the last run"""
+        self._lock = GenerationLock() if incremental else None
+        return self
+
     def get_variables(self) -> Iterator[Variable]:
         if 'variables' not in self.data:
             raise core.CCXError("Template without variables; just copy the files.")
@@ -32,53 +78,346 @@ class SimpleTemplateProcessor(TemplateProcessor):
 
             yield Variable(name=name, required=required, default=default, var_type=var_type)
 
+    def compile_manifest(self) -> Dict[str, Any]:
+        import jinja2
+        import marshal
+
+        manifest = super().compile_manifest()
+
+        # Output names of the listed files, compiled to code objects; the names of glob and directory entries
+        # depend on the walk and are compiled on first use
+        manifest['jinja_version'] = jinja2.__version__
+        manifest['output_templates'] = {}
+        for entry in self.data.get('files') or []:
+            if 'output' in entry and 'glob' not in entry:
+                try:
+                    code = self.template_env.compile(entry['output'])
+                except jinja2.TemplateSyntaxError:
+                    continue
+
+                manifest['output_templates'][entry['output']] = marshal.dumps(code)
+
+        return manifest
+
+    def _output_template(self, output: str) -> "Template":
+        """Template of an output file name, loaded from the manifest when it was precompiled there"""
+        template = self._output_templates.get(output)
+        if template is not None:
+            return template
+
+        import jinja2
+        import marshal
+
+        env = self.template_env
+        code = self.manifest.get('output_templates', {}).get(output)
+        if code is not None and self.manifest.get('jinja_version') == jinja2.__version__:
+            template = env.template_class.from_code(env, marshal.loads(code), env.make_globals(None), None)
+        else:
+            template = env.from_string(output)
+
+        self._output_templates[output] = template
+        return template
+
     def cli_command(self) -> str:
         return "cookiecutter-x simple process"
 
     def process(self, arguments: List[str]) -> None:
+        profiler.annotate(template=self.name, kind='simple')
         self.process_files(self.parse_arguments(arguments))
 
+    def template_files(self) -> Iterator[Dict[str, Any]]:
+        """Stream the files of the template; glob and directory entries are expanded while walking the template.
+
+        An entry with `glob` (e.g. `src/**/*.py`) or with a directory `name` yields every file underneath,
+        its `output` is the output directory and the path relative to the glob base (or the directory)
+        is appended to it.
+        """
+        for entry in self.data['files']:
+            if 'glob' in entry:
+                matches = utils.glob_files(self.template_path, entry['glob'])
+            elif os.path.isdir(os.path.join(self.template_path, entry['name'])):
+                matches = (
+                    (posixpath.join(entry['name'], rel_path), rel_path)
+                    for rel_path in utils.walk_files(os.path.join(self.template_path, entry['name']))
+                )
+            else:
+                yield entry
+                continue
+
+            output_dir = entry.get('output', '')
+            attributes = {k: v for k, v in entry.items() if k not in ('name', 'glob', 'output')}
+            for path, rel_path in matches:
+                if posixpath.normpath(path) == 'ccx.yml':
+                    continue
+
+                yield dict(attributes, name=path, output=posixpath.join(output_dir, rel_path))
+
     def process_files(self, variables: Dict[str, Any]):
-        for f in self.data['files']:
-            self.process_single_file(variables, f)
+        results = utils.ordered_map(
+            self._render_file, ((variables, f) for f in self.template_files()), self._jobs, self._processes
+        )
 
-    @cached_property
-    def template_env(self) -> Environment:
-        from .extensions import CCXExtension
+        # Logging and the post processing happen here, in the order of the files; on failure, also for the files
+        # the workers wrote before it
+        with self._saving_lock():
+            written = [self._finish_file(result) for result in results]
+
+        self._report(written, variables)
+
+    def process_batch(self, rows: Iterable[Dict[str, Any]], arguments: List[str] = None) -> int:
+        """Process the template once per row, rows are spread across the workers set by `jobs`.
+
+        Values of a row override the common arguments; returns the number of processed rows.
+        """
+        arguments = arguments or []
+        profiler.annotate(template=self.name, kind='simple')
+
+        def variable_sets() -> Iterator[Dict[str, Any]]:
+            for number, row in enumerate(rows, start=1):
+                try:
+                    yield self.parse_arguments(arguments + row_to_arguments(row))
+                except ArgumentParserError as e:
+                    raise core.CCXError(f"Invalid row {number}: {e}")
+
+        count = 0
+        written = []
+        with self._saving_lock():
+            for results in utils.ordered_map(self._render_files, variable_sets(), self._jobs, self._processes):
+                for result in results:
+                    written.append(self._finish_file(result))
+
+                count += 1
+
+        logging.info(f"Processed {count} rows")
+        self._report(written)
+
+        return count
+
+    def _render_files(self, variables: Dict[str, Any]) -> List[RenderResult]:
+        return [self._render_file((variables, f)) for f in self.template_files()]
+
+    @contextmanager
+    def _saving_lock(self) -> Iterator[None]:
+        """Keep the lock records of the files written before a failure"""
+        try:
+            yield
+        except BaseException:
+            if self._lock is not None:
+                self._lock.save()
+            raise
+
+    def _report(self, written: List[bool], variables: Dict[str, Any] = None):
+        if self._lock is not None:
+            if variables is not None:
+                self._lock.record_template(self.name, self.fingerprint(), variables)
+
+            self._lock.save()
+
+        if self._only_changed or self._lock is not None:
+            logging.info(f"{written.count(True)} files written, {written.count(False)} unchanged files skipped")
+
+    def fingerprint(self) -> str:
+        """Hash of the template definition and all template files"""
+        h = hashlib.sha256()
+        h.update(utils.file_hash(os.path.join(self.template_path, 'ccx.yml')).encode())
+
+        for f in self.template_files():
+            h.update(self._source_hash(os.path.join(self.template_path, f['name']), f).encode())
+
+        return h.hexdigest()
+
+    @staticmethod
+    def _source_hash(template_file: str, file_info: Dict[str, str]) -> str:
+        h = hashlib.sha256()
+        h.update(file_info['output'].encode())
+        h.update(b'\0')
+        h.update(utils.file_hash(template_file).encode())
+
+        return h.hexdigest()
+
+    def _referenced_variables(self, template_file: str, file_info: Dict[str, str]) -> Optional[List[str]]:
+        """Variables used by the template file and its output name; None if the file includes other templates"""
+        from jinja2 import meta
+
+        referenced = meta.find_undeclared_variables(self.template_env.parse(file_info['output']))
+
+        if self._is_literal(template_file, file_info):
+            return sorted(referenced)
+
+        with open(template_file, encoding='utf-8') as f:
+            ast = self.template_env.parse(f.read())
+
+        if list(meta.find_referenced_templates(ast)):
+            return None
+
+        return sorted(referenced | meta.find_undeclared_variables(ast))
+
+    @staticmethod
+    def _is_literal(template_file: str, file_info: Dict[str, Any]) -> bool:
+        """Files marked with `render: false` or without any template markup are copied as they are"""
+        if 'render' in file_info:
+            return not file_info['render']
+
+        return not utils.has_template_markup(template_file)
 
-        env = Environment(lstrip_blocks=True, trim_blocks=True)
-        env.add_extension(CCXExtension)
+    @cached_property
+    def template_env(self) -> "Environment":
+        from .environment import template_environment
 
-        return env
+        return template_environment()
 
     def process_single_file(self, variables: Dict[str, Any], file_info: Dict[str, str]):
-        out_filename_template = self.template_env.from_string(file_info['output'])
-        out_filename = out_filename_template.render(**variables)
+        self._finish_file(self._render_file((variables, file_info)))
+
+    def _render_file(self, job: Tuple[Dict[str, Any], Dict[str, str]]) -> RenderResult:
+        """Render and write a single file; runs in the worker threads or processes, so it must not log"""
+        variables, file_info = job
+
+        out_filename = self._output_template(file_info['output']).render(**variables)
 
         out_file_path = out_filename if os.path.isabs(out_filename) \
-            else os.path.join('.', out_filename)
+            else os.path.join(self._output_dir, out_filename)
 
         in_file = os.path.join(self.template_path, file_info['name'])
-        self._process_single_template(in_file, out_file_path, variables)
+        executable = bool(file_info.get('executable'))
+
+        out_dir = os.path.dirname(out_file_path)
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+
+        if self._lock is None:
+            written = self._process_single_template(in_file, out_file_path, variables, file_info=file_info)
+            return RenderResult(out_file_path, written, executable)
+
+        source_hash = self._source_hash(in_file, file_info)
+        if self._lock.is_up_to_date(out_file_path, self.name, source_hash, variables):
+            return RenderResult(out_file_path, False, executable)
+
+        # Files generated by a previous run and not modified since can be regenerated without the overwrite flag
+        overwrite = self._overwrite or self._lock.generated(out_file_path)
+        written = self._process_single_template(in_file, out_file_path, variables, overwrite, file_info)
+
+        record = GenerationLock.file_record(
+            self.name, source_hash, self._referenced_variables(in_file, file_info), variables, out_file_path
+        )
+        return RenderResult(out_file_path, written, executable, record)
+
+    def _finish_file(self, result: RenderResult) -> bool:
+        profiler.count_file(result.output_file, result.written)
+
+        if result.written:
+            logging.info(f"Writing {result.output_file}")
+        else:
+            logging.info(f"Unchanged {result.output_file}")
+
+        if result.executable:
+            utils.make_file_executable(result.output_file)
+
+        if result.lock_record is not None:
+            self._lock.record_file(result.output_file, result.lock_record)
 
-        if 'executable' in file_info and file_info['executable']:
-            utils.make_file_executable(out_file_path)
+        return result.written
 
-    def _process_single_template(self, template_file: str, output_file: str, variables: Dict[str, Any]):
-        if os.path.exists(output_file) and not self._overwrite:
+    def _copy_literal(self, template_file: str, output_file: str, exists: bool, overwrite: bool) -> bool:
+        """Copy the file byte for byte, skipping Jinja entirely"""
+        if exists and self._only_changed:
+            if utils.same_content(template_file, output_file):
+                return False
+
+            if not overwrite:
+                raise core.CCXError(f"Destination file {output_file} exists; to overwrite pass overwrite flag")
+
+        shutil.copyfile(template_file, output_file)
+        return True
+
+    def _process_single_template(
+            self, template_file: str, output_file: str, variables: Dict[str, Any], overwrite: bool = None,
+            file_info: Dict[str, Any] = None
+    ) -> bool:
+        overwrite = self._overwrite if overwrite is None else overwrite
+
+        exists = os.path.exists(output_file)
+        if exists and not overwrite and not self._only_changed:
             raise core.CCXError(f"Destination file {output_file} exists; to overwrite pass overwrite flag")
 
-        with open(template_file) as f:
-            template_content = f.read()
+        if self._is_literal(template_file, file_info or {}):
+            with profiler.span('write', file=output_file, copy=True):
+                return self._copy_literal(template_file, output_file, exists, overwrite)
+
+        from jinja2.environment import TemplateStream
+
+        def chunks() -> Iterator[str]:
+            yield from self.template_env.get_template(template_file).generate(**variables)
+
+        # Render next to the output file and move it into place once complete; a render error leaves the
+        # existing file untouched. In the only changed mode identical files are left untouched as well
+        tmp_file = utils.temp_path(output_file)
+        try:
+            # Stream the rendered chunks to the file, the memory usage does not grow with the output size; the
+            # content is rendered while writing, the time spent rendering the chunks is recorded separately
+            with profiler.stream_spans('render', 'write', file=output_file) as timed, open(tmp_file, 'w') as f:
+                stream = TemplateStream(timed(chunks()))
+                stream.enable_buffering(self.STREAM_BUFFER_SIZE)
+                stream.dump(f)
+
+            if exists and self._only_changed:
+                return self._replace_if_changed(tmp_file, output_file, overwrite)
+
+            if exists:
+                shutil.copymode(output_file, tmp_file)
+            else:
+                os.chmod(tmp_file, utils.DEFAULT_FILE_MODE)
+
+            os.replace(tmp_file, output_file)
+            return True
+        finally:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+
+
+def row_to_arguments(row: Dict[str, Any]) -> List[str]:
+    """Command line arguments of the variable values; only scalar values can be passed as arguments"""
+    arguments = []
 
-        content = self.template_env.from_string(template_content).render(**variables)
+    for name, value in row.items():
+        if value is None or value == '':
+            # Missing value; the variable's default applies
+            continue
 
-        with open(output_file, 'w') as f:
-            logging.info(f"Writing {output_file}")
-            f.write(content)
+        if not isinstance(value, (str, int, float, bool)):
+            raise ArgumentParserError(
+                f"value of {name} must be a string, number or boolean, not {type(value).__name__}"
+            )
 
+        arguments.append(f"--{name}")
+        arguments.append(str(value).lower() if isinstance(value, bool) else str(value))
 
-@cli.group(
+    return arguments
+
+
+def read_manifest(manifest: str) -> Iterator[Dict[str, Any]]:
+    """Stream the variable sets of a CSV (with header) or JSON lines manifest file"""
+    with open(manifest, newline='') as f:
+        if manifest.lower().endswith('.csv'):
+            yield from csv.DictReader(f)
+            return
+
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                raise core.CCXError(f"Invalid JSON in {manifest} line {line_number}: {e}")
+
+            if not isinstance(row, dict):
+                raise core.CCXError(f"Line {line_number} of {manifest} is not a JSON object")
+
+            yield row
+
+
+@click.group(
     name="simple",
     help="Simple script or generation"
 )
@@ -103,6 +442,9 @@ def list_templates():
 @click.argument('template')
 @click.option('-a', '--all-arguments', help="Print all argument including jinja templates", default=False, is_flag=True)
 def print_template_doc(template: str, all_arguments: bool):
+    if daemon.forward({'command': 'doc', 'kind': 'simple', 'template': template, 'all_arguments': all_arguments}):
+        return
+
     SimpleTemplateProcessor(template).print_short_doc(all_arguments)
 
 
@@ -113,9 +455,59 @@ def print_template_doc(template: str, all_arguments: bool):
 )
 @click.argument('template')
 @click.option('-w', '--overwrite', is_flag=True, help="Overwrite existing file", default=False)
+@click.option('--only-changed', is_flag=True, help="Only write files whose content changed", default=False)
+@click.option(
+    '-i', '--incremental', is_flag=True, default=False,
+    help=f"Re-render only the files whose template or variables changed; tracked in {LOCK_FILENAME}"
+)
+@click.option('-j', '--jobs', type=click.IntRange(min=1), help="Number of files to render in parallel", default=1)
+@click.option('--processes', is_flag=True, help="Use worker processes instead of threads for --jobs", default=False)
 @click.pass_context
-def process(ctx, template: str, overwrite: bool):
+def process(ctx, template: str, overwrite: bool, only_changed: bool, incremental: bool, jobs: int, processes: bool):
+    request = {
+        'command': 'process', 'kind': 'simple', 'template': template, 'arguments': list(ctx.args),
+        'overwrite': overwrite, 'only_changed': only_changed, 'incremental': incremental,
+        'jobs': jobs, 'processes': processes
+    }
+    if daemon.forward(request):
+        return
+
     SimpleTemplateProcessor(template) \
         .build_parser() \
         .overwrite(overwrite) \
+        .only_changed(only_changed) \
+        .incremental(incremental) \
+        .jobs(jobs, processes) \
         .process(list(ctx.args))
+
+
+@simple.command(
+    name="process-batch",
+    help="Apply a simple template once per row of a CSV or JSON lines manifest",
+    context_settings={'ignore_unknown_options': True, 'allow_extra_args': True}
+)
+@click.argument('template')
+@click.option(
+    '-m', '--manifest', required=True, type=click.Path(exists=True, dir_okay=False),
+    help="CSV (with header) or JSON lines file; each row is a set of variables"
+)
+@click.option('-w', '--overwrite', is_flag=True, help="Overwrite existing file", default=False)
+@click.option('--only-changed', is_flag=True, help="Only write files whose content changed", default=False)
+@click.option(
+    '-i', '--incremental', is_flag=True, default=False,
+    help=f"Re-render only the files whose template or variables changed; tracked in {LOCK_FILENAME}"
+)
+@click.option('-j', '--jobs', type=click.IntRange(min=1), help="Number of rows to process in parallel", default=1)
+@click.option('--processes', is_flag=True, help="Use worker processes instead of threads for --jobs", default=False)
+@click.pass_context
+def process_batch(
+        ctx, template: str, manifest: str, overwrite: bool, only_changed: bool, incremental: bool,
+        jobs: int, processes: bool
+):
+    SimpleTemplateProcessor(template) \
+        .build_parser() \
+        .overwrite(overwrite) \
+        .only_changed(only_changed) \
+        .incremental(incremental) \
+        .jobs(jobs, processes) \
+        .process_batch(read_manifest(manifest), list(ctx.args))
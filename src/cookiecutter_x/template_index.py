@@ -0,0 +1,162 @@
+import json
+import logging
+import os
+from typing import Dict, Any, List, Tuple, Optional
+
+import click
+
+from . import utils
+from .core import config, list_source
+
+
+class TemplateIndex:
+    """Persistent template name to path index of the template source directories.
+
+    Each source directory is stored with its mtime and the names inside it. A directory
+    is scanned again only when its mtime changes, i.e., when a template is added, removed or renamed.
+    """
+
+    INDEX_FILENAME = 'template-index.json'
+    VERSION = 1
+
+    def __init__(self, index_path: str) -> None:
+        super().__init__()
+        self.index_path = index_path
+
+        self._dirs: Optional[Dict[str, Dict[str, Any]]] = None
+        self._lookups: Dict[Tuple[str, ...], Dict[str, str]] = {}
+        self._dirty = False
+
+    @property
+    def dirs(self) -> Dict[str, Dict[str, Any]]:
+        if self._dirs is None:
+            self._dirs = self._load()
+
+        return self._dirs
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if not os.path.exists(self.index_path):
+            return {}
+
+        try:
+            with open(self.index_path) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Unable to read template index {self.index_path} ({e}); rebuilding")
+            return {}
+
+        if not isinstance(data, dict) or data.get('version') != self.VERSION:
+            return {}
+
+        return data.get('dirs', {})
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+
+        try:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            tmp_path = utils.temp_path(self.index_path)
+            try:
+                with open(tmp_path, 'w') as f:
+                    json.dump({'version': self.VERSION, 'dirs': self.dirs}, f)
+
+                os.replace(tmp_path, self.index_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+            self._dirty = False
+        except OSError as e:
+            logging.warning(f"Unable to write template index {self.index_path} ({e})")
+
+    @staticmethod
+    def _mtime(path: str) -> Optional[int]:
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _refresh(self, paths: List[str]) -> bool:
+        """Scan the directories that changed since the last scan; returns True if any entry changed"""
+        changed = False
+
+        for p in paths:
+            mtime = self._mtime(p)
+            entry = self.dirs.get(p)
+
+            if mtime is None:
+                logging.warning(f"Template source path {p} not found; skipping")
+                if entry is not None:
+                    del self.dirs[p]
+                    changed = True
+
+                continue
+
+            if entry is None or entry['mtime'] != mtime:
+                logging.debug(f"Scanning template source path {p}")
+                self.dirs[p] = {'mtime': mtime, 'templates': list_source(p)}
+                changed = True
+
+        if changed:
+            self._dirty = True
+            self._lookups.clear()
+            self.save()
+
+        return changed
+
+    def entries(self, paths: List[str]) -> List[Tuple[str, str]]:
+        """Return (name, path) pairs of all templates in the paths, in the order of the paths"""
+        self._refresh(paths)
+
+        return [
+            (t, os.path.join(p, t))
+            for p in paths if p in self.dirs
+            for t in self.dirs[p]['templates']
+        ]
+
+    def lookup(self, paths: List[str]) -> Dict[str, str]:
+        """Name to path mapping; the first path containing a template name wins"""
+        key = tuple(paths)
+
+        if self._refresh(paths) or key not in self._lookups:
+            table = {}
+            for p in paths:
+                for t in self.dirs.get(p, {}).get('templates', []):
+                    table.setdefault(t, os.path.join(p, t))
+
+            self._lookups[key] = table
+
+        return self._lookups[key]
+
+    def rebuild(self, paths: List[str]) -> int:
+        for p in paths:
+            self.dirs.pop(p, None)
+
+        return len(self.entries(paths))
+
+
+@click.group(
+    name="index",
+    help="Manage the template index"
+)
+def index():
+    pass
+
+
+@index.command(
+    name="rebuild",
+    help="Rescan all template source paths and rebuild the index and the search index"
+)
+def rebuild_index():
+    from .search import update_search_index
+
+    template_index = config.template_index
+
+    simple_count = template_index.rebuild(config.simple_template_paths)
+    cookiecutter_count = template_index.rebuild(config.cookiecutter_template_paths)
+
+    config.search_index.rebuild()
+    update_search_index(config.search_index)
+
+    logging.info(f"Indexed {simple_count} simple and {cookiecutter_count} cookiecutter templates")
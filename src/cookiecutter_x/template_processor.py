@@ -1,14 +1,15 @@
 import argparse
 import os
+import shutil
 from abc import ABC, abstractmethod
 from shlex import quote
 from typing import Any, Dict, List, Iterator
 
-import yaml
-from cached_property import cached_property
-
+from . import core
+from . import profiler
 from . import utils
 from .core import TemplateResolver, CCXError
+from .utils import cached_property
 
 
 class Variable:
@@ -65,40 +66,90 @@ class TemplateProcessor(ABC):
 
         self._parser = None
         self._overwrite = False
+        self._only_changed = False
+        self._output_dir = '.'
 
     def overwrite(self, overwrite: bool) -> "TemplateProcessor":
         self._overwrite = overwrite
         return self
 
+    def output_dir(self, output_dir: str) -> "TemplateProcessor":
+        """Generate into the directory instead of the current directory"""
+        self._output_dir = output_dir
+        return self
+
+    def only_changed(self, only_changed: bool) -> "TemplateProcessor":
+        """Skip writing output files whose content would not change, keeping their modification times"""
+        self._only_changed = only_changed
+        return self
+
+    def _replace_if_changed(self, new_file: str, output_file: str, overwrite: bool = None) -> bool:
+        """Move the new file over the existing output file unless both are identical; returns True if replaced"""
+        if utils.same_content(new_file, output_file):
+            return False
+
+        if not (self._overwrite if overwrite is None else overwrite):
+            raise CCXError(f"Destination file {output_file} exists; to overwrite pass overwrite flag")
+
+        shutil.copymode(output_file, new_file)
+        os.replace(new_file, output_file)
+
+        return True
+
     @abstractmethod
     def get_variables(self) -> Iterator[Variable]:
         pass
 
+    @cached_property
+    def manifest(self) -> Dict[str, Any]:
+        """The parsed template definition and its validated variables, cached until the source files change"""
+        with profiler.span('manifest', template=self.name):
+            return core.config.manifest_cache.load(self.manifest_sources(), self.compile_manifest)
+
+    def manifest_sources(self) -> List[str]:
+        return [os.path.join(self.template_path, 'ccx.yml')]
+
+    def compile_manifest(self) -> Dict[str, Any]:
+        # get_variables reads the data; set it before the manifest exists
+        self.data = self.read_data()
+
+        manifest = {'data': self.data, 'variables': None, 'variables_error': None}
+        try:
+            manifest['variables'] = list(self.get_variables())
+        except CCXError as e:
+            manifest['variables_error'] = e.message
+
+        return manifest
+
     @cached_property
     def variables(self) -> List[Variable]:
-        return list(self.get_variables())
+        if self.manifest['variables_error'] is not None:
+            raise CCXError(self.manifest['variables_error'])
+
+        return self.manifest['variables']
 
     def build_parser(self) -> "TemplateProcessor":
-        self._parser = ThrowingArgumentParser(description='Process template variables')
+        with profiler.span('build parser', template=self.name):
+            self._parser = ThrowingArgumentParser(description='Process template variables')
 
-        # Consider adding short option; will need to find unique char per command,
-        # final command might become unintuitive
-        for variable in self.get_variables():
-            argument_properties = {
-                'required': variable.required
-            }
+            # Consider adding short option; will need to find unique char per command,
+            # final command might become unintuitive
+            for variable in self.variables:
+                argument_properties = {
+                    'required': variable.required
+                }
 
-            if variable.default:
-                argument_properties['default'] = variable.default
+                if variable.default:
+                    argument_properties['default'] = variable.default
 
-            if variable.var_type == 'boolean':
+                if variable.var_type == 'boolean':
 
-                self._parser.add_argument(
-                    f"--{variable.name}", default=variable.default or False,
-                    type=lambda x: str(x).lower() in ['true', 't', 'yes', 'y', 1]
-                )
-            else:
-                self._parser.add_argument(f"--{variable.name}", **argument_properties)
+                    self._parser.add_argument(
+                        f"--{variable.name}", default=variable.default or False,
+                        type=lambda x: str(x).lower() in ['true', 't', 'yes', 'y', 1]
+                    )
+                else:
+                    self._parser.add_argument(f"--{variable.name}", **argument_properties)
 
         return self
 
@@ -106,7 +157,9 @@ class TemplateProcessor(ABC):
         if not self._parser:
             self.build_parser()
 
-        args = self._parser.parse_args(arguments)
+        with profiler.span('parse arguments', template=self.name):
+            args = self._parser.parse_args(arguments)
+
         return vars(args)
 
     def print_short_doc(self, all_arguments: bool):
@@ -114,12 +167,15 @@ class TemplateProcessor(ABC):
 
     @cached_property
     def data(self) -> Dict[str, Any]:
+        return self.manifest['data']
+
+    def read_data(self) -> Dict[str, Any]:
         y = os.path.join(self.template_path, 'ccx.yml')
         if not os.path.exists(y):
             return {}
 
         with open(y) as f:
-            return yaml.safe_load(f)
+            return utils.yaml_load(f)
 
     @abstractmethod
     def cli_command(self) -> str:
@@ -0,0 +1,184 @@
+import logging
+import os
+import threading
+from typing import Dict, List, Optional, Set
+
+from .core import TemplateResolver, CCXError, list_source, template_source_path
+
+
+class WatchingTemplateResolver(TemplateResolver):
+    """Template resolver for long-lived processes.
+
+    Keeps an in-memory name to path map of the template source directories and updates it incrementally
+    from file system change notifications (watchdog, when installed) or by polling directory mtimes. Source
+    directories missing at start are polled until they are created, then watched.
+
+        with WatchingTemplateResolver(config.simple_template_paths) as resolver:
+            resolver.get_path('cpp')
+    """
+
+    def __init__(self, paths: List[str], poll_interval: float = 2.0) -> None:
+        super().__init__(paths)
+        self.poll_interval = poll_interval
+
+        self._lock = threading.RLock()
+        self._names: Dict[str, Set[str]] = {}
+        self._mtimes: Dict[str, Optional[int]] = {}
+        self._table: Dict[str, str] = {}
+
+        self._observer = None
+        self._handler = None
+        self._watched: Set[str] = set()
+        self._poller: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+        for p in self.paths:
+            self._scan(p)
+
+    def __enter__(self) -> "WatchingTemplateResolver":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+    @staticmethod
+    def _mtime(path: str) -> Optional[int]:
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _scan(self, path: str) -> None:
+        mtime = self._mtime(path)
+        names = set(list_source(path)) if mtime is not None else set()
+
+        if mtime is None:
+            logging.warning(f"Template source path {path} not found; skipping")
+
+        with self._lock:
+            self._mtimes[path] = mtime
+            old = self._names.get(path, set())
+            self._names[path] = names
+
+            for name in old ^ names:
+                self._update(name)
+
+    def _update(self, name: str) -> None:
+        """Re-resolve a single name; the first path containing the name wins"""
+        for p in self.paths:
+            if name in self._names.get(p, ()):
+                self._table[name] = os.path.join(p, name)
+                return
+
+        self._table.pop(name, None)
+
+    def added(self, path: str, name: str) -> None:
+        with self._lock:
+            if path in self._names and name not in self._names[path]:
+                self._names[path].add(name)
+                self._update(name)
+
+    def removed(self, path: str, name: str) -> None:
+        with self._lock:
+            if name in self._names.get(path, ()):
+                self._names[path].discard(name)
+                self._update(name)
+
+    def refresh(self) -> None:
+        """Rescan the source directories whose mtime changed since the last scan"""
+        for p in self.paths:
+            if self._mtime(p) != self._mtimes.get(p):
+                self._scan(p)
+
+    def start(self) -> "WatchingTemplateResolver":
+        self._stopped.clear()
+
+        watched = False
+        try:
+            self._observer = self._start_observer()
+            watched = self._watch()
+            logging.debug("Watching template source paths for changes")
+
+            # Catch the changes made between the initial scan and watching
+            self.refresh()
+        except ImportError:
+            logging.debug(f"watchdog is not installed; polling template source paths every {self.poll_interval}s")
+
+        if not watched:
+            self._poller = threading.Thread(target=self._poll, name='ccx-template-poller', daemon=True)
+            self._poller.start()
+
+        return self
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+        # The poller schedules watches on the observer; stopped first
+        if self._poller is not None:
+            self._poller.join()
+            self._poller = None
+
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+            self._watched.clear()
+
+    def _poll(self) -> None:
+        while not self._stopped.wait(self.poll_interval):
+            # With watchdog, poll only until the missing source paths are created and watched
+            watched = self._observer is not None and self._watch()
+            self.refresh()
+            if watched:
+                return
+
+    def _watch(self) -> bool:
+        """Watch the source paths created since the last call; returns True once all paths are watched"""
+        for p in self.paths:
+            if p not in self._watched and os.path.exists(p):
+                # Archives are watched through their directory
+                self._observer.schedule(self._handler, p if os.path.isdir(p) else os.path.dirname(p), recursive=False)
+                self._watched.add(p)
+
+        return all(p in self._watched for p in self.paths)
+
+    def _start_observer(self):
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+
+        resolver = self
+
+        class Handler(FileSystemEventHandler):
+            def dispatch(self, event):
+                if event.src_path in resolver._mtimes or getattr(event, 'dest_path', None) in resolver._mtimes:
+                    # A template archive was replaced
+                    resolver.refresh()
+                    return
+
+                src_dir, src_name = os.path.split(event.src_path)
+
+                if event.event_type == 'created':
+                    resolver.added(src_dir, src_name)
+                elif event.event_type == 'deleted':
+                    resolver.removed(src_dir, src_name)
+                elif event.event_type == 'moved':
+                    resolver.removed(src_dir, src_name)
+                    resolver.added(*os.path.split(event.dest_path))
+
+        observer = Observer()
+        observer.daemon = True
+        observer.start()
+
+        self._handler = Handler()
+        return observer
+
+    def list(self) -> Dict[str, str]:
+        with self._lock:
+            return {name: os.path.join(p, name) for p in self.paths for name in self._names.get(p, ())}
+
+    def get_path(self, name: str) -> str:
+        path = self._table.get(name)
+        if path is None:
+            raise CCXError(f"Template {name} not found")
+
+        return template_source_path(path)
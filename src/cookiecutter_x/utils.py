@@ -1,13 +1,45 @@
+import collections
+import hashlib
 import logging
 import os
+import posixpath
+import re
 import stat
 import sys
-from typing import List, Tuple, Union
+from typing import Any, Callable, Iterable, Iterator, List, Tuple, Union
 
-from tabulate import tabulate
+try:
+    from functools import cached_property
+except ImportError:  # Python < 3.8
+    # The backport imports asyncio, which is slow; prefer the standard library version
+    from cached_property import cached_property
+
+
+_FIRST_CAP = re.compile('(.)([A-Z][a-z]+)')
+_ALL_CAP = re.compile('([a-z0-9])([A-Z])')
+_SEPARATORS = re.compile(r'[\W_]+')
+
+
+def mark_case_changes(val: str, separator: str) -> str:
+    """Insert the separator at the case changes of an identifier, `HelloWorld` -> `Hello_World`"""
+    return _ALL_CAP.sub(rf'\1{separator}\2', _FIRST_CAP.sub(rf'\1{separator}\2', val))
+
+
+def split_words(val: str) -> List[str]:
+    """Lower case words of an identifier or a phrase, split at case changes and separators"""
+    return [w.lower() for w in _SEPARATORS.split(mark_case_changes(val, ' ')) if w]
+
+
+def yaml_load(stream: Any) -> Any:
+    """Parse YAML with the C loader (libyaml) when it is available"""
+    import yaml
+
+    return yaml.load(stream, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
 
 
 def print_table(table: List[List[str]], headers: List[str], stderr: bool = False) -> None:
+    from tabulate import tabulate
+
     print_file = sys.stderr if stderr else sys.stdout
     print(tabulate(table, headers=headers, tablefmt="pipe", numalign="right"), file=print_file)
 
@@ -51,3 +83,193 @@ def write_content(file_name: str, content: str) -> None:
     logging.info(f"Writing {file_name}")
     with open(file_name, 'w') as f:
         f.write(content)
+
+
+def same_content(file_a: str, file_b: str) -> bool:
+    """Compare the sizes first, then the hashes of the contents"""
+    if os.path.getsize(file_a) != os.path.getsize(file_b):
+        return False
+
+    return file_hash(file_a) == file_hash(file_b)
+
+
+def file_hash(file_path: str) -> str:
+    h = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            h.update(chunk)
+
+    return h.hexdigest()
+
+
+TEMPLATE_MARKERS = (b'{{', b'{%', b'{#')
+
+
+def has_template_markup(file_path: str, chunk_size: int = 1 << 16) -> bool:
+    """Scan the file for Jinja block, variable or comment start markers"""
+    with open(file_path, 'rb') as f:
+        tail = b''
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            # Keep the last byte of the previous chunk; a marker can span two chunks
+            data = tail + chunk
+            if any(m in data for m in TEMPLATE_MARKERS):
+                return True
+
+            tail = chunk[-1:]
+
+    return False
+
+
+def _default_file_mode() -> int:
+    umask = os.umask(0)
+    os.umask(umask)
+
+    return 0o666 & ~umask
+
+
+# Mode of the files created with open(); temporary files are created private
+DEFAULT_FILE_MODE = _default_file_mode()
+
+
+def temp_path(file_path: str) -> str:
+    """Create an empty temporary file next to the file, i.e., on the same file system"""
+    import tempfile
+
+    fd, path = tempfile.mkstemp(dir=os.path.dirname(file_path) or '.', prefix=f".{os.path.basename(file_path)}.")
+    os.close(fd)
+
+    return path
+
+
+def walk_files(path: str) -> Iterator[str]:
+    """Stream the relative (posix) paths of the files under the directory, sorted within each directory.
+
+    Symbolic links to directories are followed, except to a directory that is being walked (a cycle).
+    """
+    def walk(directory: str, prefix: str, ancestors: frozenset) -> Iterator[str]:
+        with os.scandir(directory) as it:
+            entries = sorted(it, key=lambda e: e.name)
+
+        for entry in entries:
+            rel_path = prefix + entry.name
+            if not entry.is_dir():
+                yield rel_path
+                continue
+
+            st = entry.stat()
+            if (st.st_dev, st.st_ino) not in ancestors:
+                yield from walk(entry.path, rel_path + '/', ancestors | {(st.st_dev, st.st_ino)})
+
+    st = os.stat(path)
+    yield from walk(path, '', frozenset({(st.st_dev, st.st_ino)}))
+
+
+GLOB_MAGIC = re.compile(r'[*?\[]')
+
+
+def glob_match(pattern: str, path: str) -> bool:
+    """`*` and `?` don't cross directories, `**` matches any number of directories.
+
+    fnmatch lets `*` match `/` and `PurePath.match` supports `**` only from Python 3.13, so the (posix) path is
+    matched directory by directory with fnmatch.
+    """
+    from fnmatch import fnmatchcase
+
+    def match(patterns: List[str], parts: List[str]) -> bool:
+        if not patterns:
+            return not parts
+
+        if patterns[0] == '**':
+            return any(match(patterns[1:], parts[i:]) for i in range(len(parts) + 1))
+
+        return bool(parts) and fnmatchcase(parts[0], patterns[0]) and match(patterns[1:], parts[1:])
+
+    return match(pattern.split('/'), path.split('/'))
+
+
+def glob_base(pattern: str) -> str:
+    """The leading directories of the pattern without any wildcard"""
+    parts = pattern.split('/')[:-1]
+    base = []
+    for part in parts:
+        if GLOB_MAGIC.search(part):
+            break
+        base.append(part)
+
+    return '/'.join(base)
+
+
+def glob_files(root: str, pattern: str) -> Iterator[Tuple[str, str]]:
+    """Stream the files under the root matching the glob pattern; yields the path relative to the root
+    and the path relative to the pattern's base directory"""
+    base = glob_base(pattern)
+    base_path = os.path.join(root, base)
+
+    if not os.path.isdir(base_path):
+        return
+
+    for rel_path in walk_files(base_path):
+        path = posixpath.join(base, rel_path)
+        if glob_match(pattern, path):
+            yield path, rel_path
+
+
+def ordered_map(func: Callable[[Any], Any], items: Iterable[Any], jobs: int = 1, processes: bool = False) -> Iterator[Any]:
+    """Apply the function on the items with `jobs` worker threads (or processes); yields the results in order.
+
+    At most `2 * jobs` items are in flight, so the items can be a lazy stream. Once an item (or the stream) fails
+    no further items are started; the results of the items already started are still yielded, in order, so the
+    caller sees every side effect of the workers. Then the error of the first failing item is raised.
+    """
+    if jobs <= 1:
+        yield from map(func, items)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    def failed(future) -> bool:
+        return future.done() and not future.cancelled() and future.exception() is not None
+
+    items = iter(items)
+    errors = []
+    stream_error = None
+
+    executor_class = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    with executor_class(max_workers=jobs) as executor:
+        pending = collections.deque()
+
+        try:
+            while not any(failed(f) for f in pending):
+                try:
+                    item = next(items)
+                except StopIteration:
+                    break
+                except Exception as e:
+                    stream_error = e
+                    break
+
+                pending.append(executor.submit(func, item))
+
+                if len(pending) >= 2 * jobs:
+                    future = pending.popleft()
+                    if future.exception() is not None:
+                        errors.append(future.exception())
+                        break
+
+                    yield future.result()
+
+            while pending:
+                future = pending.popleft()
+                if future.exception() is None:
+                    yield future.result()
+                else:
+                    errors.append(future.exception())
+        finally:
+            for future in pending:
+                future.cancel()
+
+    # The items before a failure of the stream were started; their errors come first
+    if errors:
+        raise errors[0]
+    if stream_error is not None:
+        raise stream_error
@@ -0,0 +1,165 @@
+import os
+import tarfile
+import tempfile
+import zipfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from cookiecutter_x import archives, core
+from cookiecutter_x.core import TemplateResolver, CCXError
+from cookiecutter_x.search import SearchIndex
+from cookiecutter_x.simple_templates import SimpleTemplateProcessor
+from cookiecutter_x.template_index import TemplateIndex
+
+CONFIG = '''name: bash
+variables:
+  filename:
+    required: true
+    type: string
+
+files:
+  - name: script.sh
+    output: "{{ filename }}"
+'''
+
+
+class TemplateArchiveTests(TestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+
+        cache_patch = patch.object(core.config, 'cache_path', os.path.join(self.tmp, 'cache'))
+        cache_patch.start()
+        self.addCleanup(cache_patch.stop)
+
+        self.files = {
+            'bash/ccx.yml': CONFIG,
+            'bash/script.sh': 'echo "{{ filename }}"\n',
+            'python/ccx.yml': 'name: python\n',
+            '../evil.txt': 'outside\n',
+        }
+
+        self.zip_path = os.path.join(self.tmp, 'templates.zip')
+        with zipfile.ZipFile(self.zip_path, 'w') as zf:
+            for name, content in self.files.items():
+                zf.writestr(name, content)
+
+        self.tar_path = os.path.join(self.tmp, 'templates.tar.gz')
+        source = os.path.join(self.tmp, 'source')
+        with tarfile.open(self.tar_path, 'w:gz') as tf:
+            for name, content in self.files.items():
+                if name.startswith('..'):
+                    continue
+
+                path = os.path.join(source, name)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'w') as f:
+                    f.write(content)
+                os.chmod(path, 0o755)
+
+                tf.add(path, arcname=name)
+
+    def test_list(self):
+        for path in [self.zip_path, self.tar_path]:
+            resolver = TemplateResolver([path])
+            self.assertEqual(
+                {'bash': os.path.join(path, 'bash'), 'python': os.path.join(path, 'python')}, resolver.list()
+            )
+
+    def test_list_with_index(self):
+        index = TemplateIndex(os.path.join(self.tmp, 'index.json'))
+        resolver = TemplateResolver([self.zip_path], index)
+
+        self.assertEqual(['bash', 'python'], sorted(resolver.list()))
+        self.assertTrue(resolver.get_path('bash').startswith(os.path.join(self.tmp, 'cache', 'archives')))
+
+    def test_get_path(self):
+        for path in [self.zip_path, self.tar_path]:
+            template_path = TemplateResolver([path]).get_path('bash')
+
+            with open(os.path.join(template_path, 'script.sh')) as f:
+                self.assertEqual('echo "{{ filename }}"\n', f.read())
+
+            self.assertEqual(['ccx.yml', 'script.sh'], sorted(os.listdir(template_path)))
+
+        self.assertFalse(os.path.exists(os.path.join(self.tmp, 'cache', 'archives', 'evil.txt')))
+
+    def test_tar_mode(self):
+        template_path = TemplateResolver([self.tar_path]).get_path('bash')
+        self.assertTrue(os.access(os.path.join(template_path, 'script.sh'), os.X_OK))
+
+    def test_extracted_once(self):
+        resolver = TemplateResolver([self.zip_path])
+        template_path = resolver.get_path('bash')
+
+        with patch.object(archives.TemplateArchive, 'extract', side_effect=AssertionError("extracted")):
+            self.assertEqual(template_path, resolver.get_path('bash'))
+
+    def test_archive_replaced(self):
+        old_path = TemplateResolver([self.zip_path]).get_path('bash')
+
+        with zipfile.ZipFile(self.zip_path, 'a') as zf:
+            zf.writestr('bash/extra.txt', 'extra\n')
+        os.utime(self.zip_path, ns=(1, 1))
+
+        new_path = TemplateResolver([self.zip_path]).get_path('bash')
+        self.assertNotEqual(old_path, new_path)
+        self.assertTrue(os.path.exists(os.path.join(new_path, 'extra.txt')))
+        self.assertFalse(os.path.exists(old_path))
+
+    def test_read(self):
+        for path in [self.zip_path, self.tar_path]:
+            self.assertEqual(CONFIG.encode(), archives.archive(path).read('bash', 'ccx.yml'))
+            self.assertIsNone(archives.archive(path).read('bash', 'missing.yml'))
+            self.assertIsNone(archives.archive(path).read('..', 'evil.txt'))
+
+    def test_tar_read_in_one_pass(self):
+        tar_path = os.path.join(self.tmp, 'many.tar.gz')
+        with tarfile.open(tar_path, 'w:gz') as tf:
+            for n in range(20):
+                path = os.path.join(self.tmp, 'source', f"t{n}", 'ccx.yml')
+                os.makedirs(os.path.dirname(path))
+                with open(path, 'w') as f:
+                    f.write(f"name: t{n}\n")
+                tf.add(path, arcname=f"t{n}/ccx.yml")
+
+        index = SearchIndex(os.path.join(self.tmp, 'search-index.json'))
+        with patch('tarfile.open', wraps=tarfile.open) as opened:
+            index.update('simple', {f"t{n}": os.path.join(tar_path, f"t{n}") for n in range(20)})
+
+        self.assertEqual(['t7'], [r.name for r in index.search('t7')])
+        # The member list, and one pass reading the manifests
+        self.assertEqual(2, opened.call_count)
+
+    def test_search_without_extracting(self):
+        index = SearchIndex(os.path.join(self.tmp, 'search-index.json'))
+        index.update('simple', {'bash': os.path.join(self.zip_path, 'bash')})
+
+        self.assertEqual(['bash'], [r.name for r in index.search('filename')])
+        self.assertFalse(os.path.exists(os.path.join(self.tmp, 'cache', 'archives')))
+
+    def test_replaced_archive_closed(self):
+        old = archives.archive(self.zip_path)
+        old.extract('bash', os.path.join(self.tmp, 'extracted'))
+        handle = old.zip
+
+        os.utime(self.zip_path, ns=(1, 1))
+        self.assertIsNot(old, archives.archive(self.zip_path))
+        self.assertIsNone(handle.fp)
+
+    def test_not_found(self):
+        with self.assertRaises(CCXError):
+            TemplateResolver([self.zip_path]).get_path('missing')
+
+    def test_process(self):
+        cwd = os.getcwd()
+        os.chdir(self.tmp)
+        self.addCleanup(os.chdir, cwd)
+
+        SimpleTemplateProcessor('bash', TemplateResolver([self.zip_path])).process(['--filename', 'run.sh'])
+
+        with open(os.path.join(self.tmp, 'run.sh')) as f:
+            self.assertEqual('echo "run.sh"', f.read())
@@ -0,0 +1,137 @@
+import json
+import os
+import stat
+import tempfile
+from typing import Dict, Tuple
+from unittest import TestCase
+from unittest.mock import patch
+
+from cookiecutter.main import cookiecutter
+
+from cookiecutter_x import cc_engine
+
+EXTENSION = 'cookiecutter_x.extensions.CCXExtension'
+
+
+class CCEngineCompatibilityTests(TestCase):
+    """The native engine generates the same tree as stock cookiecutter"""
+
+    def setUp(self) -> None:
+        super().setUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+
+        # Keep cookiecutter's replay files and clones out of the home directory
+        config_file = os.path.join(self.tmp, 'cookiecutter-config.yml')
+        with open(config_file, 'w') as f:
+            f.write(f"cookiecutters_dir: {self.tmp}/cookiecutters\nreplay_dir: {self.tmp}/replay\n")
+
+        env_patch = patch.dict(os.environ, {'COOKIECUTTER_CONFIG': config_file})
+        env_patch.start()
+        self.addCleanup(env_patch.stop)
+
+        self.template = os.path.join(self.tmp, 'template')
+        self.write('cookiecutter.json', json.dumps({
+            'project_name': 'My Project',
+            'project_slug': "{{ cookiecutter.project_name | lower | replace(' ', '_') }}",
+            'license': ['MIT', 'BSD'],
+            'with_docs': 'yes',
+            '_copy_without_render': ['*.jinja', 'raw_dir'],
+            '_extensions': [EXTENSION],
+        }))
+        root = '{{cookiecutter.project_slug}}'
+        self.write(f'{root}/README.md', '# {{ cookiecutter.project_name }}\n\nLicense: {{ cookiecutter.license }}\n')
+        self.write(f'{root}/src/{{{{cookiecutter.project_slug}}}}/__init__.py',
+                   'NAME = "{{ cookiecutter.project_name | snake_case }}"\n')
+        self.write(f'{root}/src/{{{{cookiecutter.project_slug}}}}/main.py', 'print("{{ cookiecutter._template is defined }}")\n')
+        self.write(f'{root}/windows.bat', 'echo {{ cookiecutter.project_slug }}\r\nexit\r\n')
+        self.write(f'{root}/keep.jinja', 'Hello {{ not rendered }}\n')
+        self.write(f'{root}/raw_dir/file.txt', '{{ cookiecutter.project_name }}\n')
+        self.write(f'{root}/{{% if cookiecutter.with_docs == "no" %}}docs.md{{% endif %}}', 'docs\n')
+        self.write(f'{root}/run.sh', '#!/bin/sh\necho {{ cookiecutter.project_slug }}\n', mode=0o755)
+        self.write(f'{root}/logo.png', bytes(range(256)))
+        self.write('hooks/post_gen_project.py', "open('HOOK_RAN', 'w').write('{{ cookiecutter.project_slug }}')\n")
+
+        for n in range(40):
+            self.write(f'{root}/pkg/module_{n}.py', f'VALUE = "{{{{ cookiecutter.project_name }}}} {n}"\n')
+
+    def write(self, path: str, content, mode: int = None) -> None:
+        full_path = os.path.join(self.template, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+
+        with open(full_path, 'wb') as f:
+            f.write(content if isinstance(content, bytes) else content.encode())
+
+        if mode is not None:
+            os.chmod(full_path, mode)
+
+    @staticmethod
+    def snapshot(path: str) -> Dict[str, Tuple[bytes, int]]:
+        tree = {}
+        for root, dirs, files in os.walk(path):
+            for d in dirs:
+                tree[os.path.relpath(os.path.join(root, d), path) + '/'] = (b'', 0)
+
+            for name in files:
+                file_path = os.path.join(root, name)
+                with open(file_path, 'rb') as f:
+                    tree[os.path.relpath(file_path, path)] = (f.read(), stat.S_IMODE(os.stat(file_path).st_mode))
+
+        return tree
+
+    def generate_both(self, extra_context: Dict[str, str], jobs: int = 1, processes: bool = False):
+        stock = os.path.join(self.tmp, 'stock')
+        native = os.path.join(self.tmp, f'native-{jobs}-{processes}')
+
+        cookiecutter(self.template, no_input=True, output_dir=stock, extra_context=extra_context)
+        project_dir, generated = cc_engine.generate(
+            self.template, extra_context, native, jobs=jobs, processes=processes
+        )
+
+        self.assertEqual(os.path.join(native, 'demo_app'), project_dir)
+        self.assertIn(os.path.join(project_dir, 'README.md'), generated)
+
+        return self.snapshot(stock), self.snapshot(native)
+
+    def test_serial(self):
+        stock, native = self.generate_both({'project_name': 'Demo App'})
+        self.assertEqual(stock, native)
+
+        self.assertIn('demo_app/HOOK_RAN', native)
+        self.assertEqual(b'Hello {{ not rendered }}\n', native['demo_app/keep.jinja'][0])
+        self.assertEqual(b'echo demo_app\r\nexit\r\n', native['demo_app/windows.bat'][0])
+
+    def test_threads(self):
+        stock, native = self.generate_both({'project_name': 'Demo App', 'license': 'BSD', 'with_docs': 'no'}, jobs=4)
+        self.assertEqual(stock, native)
+        self.assertIn('demo_app/docs.md', native)
+
+    def test_processes(self):
+        stock, native = self.generate_both({'project_name': 'Demo App'}, jobs=2, processes=True)
+        self.assertEqual(stock, native)
+
+    def test_existing_project(self):
+        output_dir = os.path.join(self.tmp, 'out')
+        cc_engine.generate(self.template, {'project_name': 'Demo App'}, output_dir)
+
+        from cookiecutter.exceptions import OutputDirExistsException
+        with self.assertRaises(OutputDirExistsException):
+            cc_engine.generate(self.template, {'project_name': 'Demo App'}, output_dir)
+
+        cc_engine.generate(self.template, {'project_name': 'Demo App'}, output_dir, overwrite_if_exists=True)
+
+    def test_undefined_variable(self):
+        self.write('{{cookiecutter.project_slug}}/broken.txt', '{{ cookiecutter.missing }}\n')
+
+        from cookiecutter.exceptions import UndefinedVariableInTemplate
+        with self.assertRaises(UndefinedVariableInTemplate):
+            cc_engine.generate(self.template, {}, os.path.join(self.tmp, 'out'), jobs=2)
+
+        self.assertFalse(os.path.exists(os.path.join(self.tmp, 'out', 'my_project')))
+
+    def test_unsupported_template(self):
+        self.write('hooks/pre_prompt.py', "pass\n")
+
+        with self.assertRaises(cc_engine.UnsupportedTemplate):
+            cc_engine.generate(self.template, {}, os.path.join(self.tmp, 'out'))
@@ -1,4 +1,8 @@
 import os.path
+from unittest.mock import patch
+
+# pyfakefs unloads the modules first imported while patching; reloading yaml breaks its C loader
+import yaml  # noqa: F401
 
 from pyfakefs.fake_filesystem_unittest import TestCase
 
@@ -60,3 +64,20 @@ simple_templates:
             [os.path.join(self.base_dir, 'cookiecutter-templates')],
             self.config.cookiecutter_template_paths
         )
+
+    def test_git_source(self):
+        self.fs.remove(self.config_file)
+        self.fs.create_file(self.config_file, contents='''
+simple_templates:
+  paths:
+    - git+https://example.com/templates.git@v1#simple
+mirrors:
+  ttl: 60
+''')
+
+        with patch('cookiecutter_x.mirrors.GitMirrors.checkout', return_value='/mirrors/checkout/simple') as mock:
+            self.assertListEqual(['/mirrors/checkout/simple'], self.config.simple_template_paths)
+
+        mock.assert_called_once_with('git+https://example.com/templates.git@v1#simple')
+        self.assertEqual(60, self.config.git_mirrors.ttl)
+        self.assertEqual(os.path.join(self.base_dir, 'mirrors'), self.config.git_mirrors.path)
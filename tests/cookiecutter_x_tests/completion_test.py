@@ -0,0 +1,134 @@
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import zipfile
+from typing import List
+from unittest import TestCase, skipUnless
+from unittest.mock import patch
+
+from cookiecutter_x import core
+from cookiecutter_x.cli import cli
+from cookiecutter_x.completion import CompletionCache
+from cookiecutter_x.core import CCXError
+from cookiecutter_x.template_index import TemplateIndex
+
+
+class CompletionCacheTest(TestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+
+        simple_base = os.path.join(self.tmp, 'simple')
+        os.makedirs(os.path.join(simple_base, 'bash'))
+        with open(os.path.join(simple_base, 'bash', 'ccx.yml'), 'w') as f:
+            f.write('variables:\n  filename:\n    default: run.sh\n  shell:\n    default: bash\nfiles: []\n')
+
+        cc_base = os.path.join(self.tmp, 'cookiecutter')
+        os.makedirs(os.path.join(cc_base, 'python'))
+        with open(os.path.join(cc_base, 'python', 'cookiecutter.json'), 'w') as f:
+            json.dump({'app_name': 'demo', '_extensions': []}, f)
+
+        # A template without variables is still completed by name
+        os.makedirs(os.path.join(cc_base, 'broken'))
+
+        for p in [
+            patch.object(core.config, 'cache_path', os.path.join(self.tmp, 'cache')),
+            patch.object(core.config, 'simple_template_paths', [simple_base]),
+            patch.object(core.config, 'cookiecutter_template_paths', [cc_base]),
+            patch.object(core.config, 'template_index', TemplateIndex(os.path.join(self.tmp, 'template-index.json'))),
+        ]:
+            p.start()
+            self.addCleanup(p.stop)
+
+        self.cache = CompletionCache(os.path.join(self.tmp, 'cache', 'completion'))
+        self.cache.refresh(cli)
+
+    def read(self, name: str) -> List[str]:
+        with open(os.path.join(self.cache.path, name)) as f:
+            return f.read().splitlines()
+
+    def test_refresh(self):
+        self.assertIn('simple', self.read('commands'))
+        self.assertIn('process', self.read('simple/commands'))
+        self.assertIn('doc', self.read('cc/template-commands'))
+        self.assertIn('--overwrite', self.read('simple/options/process'))
+
+        self.assertEqual(['bash'], self.read('simple/templates'))
+        self.assertEqual(['--filename', '--shell'], self.read('simple/variables/bash'))
+        self.assertEqual(['broken', 'python'], self.read('cc/templates'))
+        self.assertEqual(['--app_name'], self.read('cc/variables/python'))
+        self.assertFalse(os.path.exists(os.path.join(self.cache.path, 'cc', 'variables', 'broken')))
+
+    def test_archive_templates_not_extracted(self):
+        archive = os.path.join(self.tmp, 'templates.zip')
+        with zipfile.ZipFile(archive, 'w') as zf:
+            zf.writestr('cpp/ccx.yml', 'variables:\n  name:\n    required: true\nfiles: []\n')
+
+        with patch.object(core.config, 'simple_template_paths', [archive]):
+            self.cache.refresh(cli)
+
+        self.assertEqual(['--name'], self.read('simple/variables/cpp'))
+        self.assertFalse(os.path.exists(os.path.join(self.tmp, 'cache', 'archives')))
+
+    def test_refresh_replaces_cache(self):
+        with open(os.path.join(self.cache.path, 'stale'), 'w') as f:
+            f.write('stale\n')
+
+        self.cache.refresh(cli)
+        self.assertFalse(os.path.exists(os.path.join(self.cache.path, 'stale')))
+        self.assertEqual([], [n for n in os.listdir(os.path.dirname(self.cache.path)) if n.startswith('.tmp-')])
+
+    def test_unsupported_shell(self):
+        with self.assertRaises(CCXError):
+            self.cache.script('tcsh')
+
+    def complete_bash(self, *words: str, prog: str = 'cookiecutter-x') -> List[str]:
+        code = self.cache.script('bash', prog) + f'''
+COMP_WORDS=({prog} {' '.join(words)})
+COMP_CWORD={len(words)}
+_cookiecutter_x_completion
+printf '%s\\n' "${{COMPREPLY[@]}}"
+'''
+        # The refresh command is not on the path; the cache must be used as it is
+        result = subprocess.run(['bash', '-c', code], capture_output=True, text=True, check=True)
+        return [w for w in result.stdout.splitlines() if w]
+
+    @skipUnless(os.path.exists('/bin/bash'), "bash is not installed")
+    def test_bash(self):
+        self.assertIn('simple', self.complete_bash('si'))
+        self.assertEqual(['process', 'process-batch'], self.complete_bash('simple', 'proc'))
+        self.assertEqual(['bash'], self.complete_bash('simple', 'process', 'b'))
+        self.assertEqual(['python'], self.complete_bash('cc', 'doc', 'p'))
+        self.assertEqual(['--filename'], self.complete_bash('simple', 'process', 'bash', '--f'))
+        self.assertEqual(['--app_name'], self.complete_bash('cc', 'process', 'python', '--app'))
+        self.assertEqual([], self.complete_bash('simple', 'list', 'b'))
+
+    @skipUnless(os.path.exists('/bin/bash'), "bash is not installed")
+    def test_failing_refresh_not_repeated(self):
+        # A command whose refresh fails, e.g. with a malformed configuration
+        calls = os.path.join(self.tmp, 'calls')
+        prog = os.path.join(self.tmp, 'ccx-broken')
+        with open(prog, 'w') as f:
+            f.write(f'#!/bin/sh\necho "$@" >> {calls}\nexit 1\n')
+        os.chmod(prog, 0o755)
+
+        shutil.rmtree(self.cache.path)
+        self.complete_bash('si', prog=prog)
+        self.complete_bash('si', prog=prog)
+
+        with open(calls) as f:
+            self.assertEqual(['completion refresh'], f.read().splitlines())
+
+        # Retried once the marker is old; a successful refresh removes it
+        os.utime(self.cache.marker_path, (0, 0))
+        self.complete_bash('si', prog=prog)
+        with open(calls) as f:
+            self.assertEqual(2, len(f.read().splitlines()))
+
+        self.cache.refresh(cli)
+        self.assertFalse(os.path.exists(self.cache.marker_path))
@@ -5,7 +5,7 @@ from unittest.mock import patch
 from pyfakefs.fake_filesystem_unittest import TestCase
 
 from cookiecutter_x.cookiecutter_templates import CookiecutterTemplateProcessor
-from cookiecutter_x.core import TemplateResolver
+from cookiecutter_x.core import TemplateResolver, CCXError
 
 
 class CookiecutterTemplateProcessorTests(TestCase):
@@ -65,6 +65,56 @@ setuptools.setup(
                 overwrite_if_exists=False
             )
 
+    def test_process_native_engine(self):
+        with patch('cookiecutter_x.cc_engine.generate', return_value=('', [])) as mock:
+            self.template_processor.engine('ccx').jobs(4).process(['--app_name', 'test-project'])
+
+            mock.assert_called_once_with(
+                '/packages/python',
+                {'app_name': 'test-project', '_extensions': 'cookiecutter_x.extensions.CCXExtension'},
+                os.path.abspath('.'), False, 4, False
+            )
+
+    def test_unknown_engine(self):
+        with self.assertRaises(CCXError):
+            self.template_processor.engine('jinja')
+
+    @staticmethod
+    def generate(template_path, output_dir, **kwargs):
+        project = os.path.join(output_dir, 'test-project')
+        os.makedirs(project)
+        with open(os.path.join(project, 'setup.py'), 'w') as f:
+            f.write('setup')
+        with open(os.path.join(project, 'README.md'), 'w') as f:
+            f.write('readme')
+
+    def test_process_only_changed(self):
+        self.fs.create_file('test-project/setup.py', contents='setup')
+        os.utime('test-project/setup.py', ns=(0, 0))
+
+        with patch('cookiecutter_x.cookiecutter_templates.cookiecutter', side_effect=self.generate):
+            with self.assertLogs(level='INFO') as logs:
+                self.template_processor.only_changed(True).process(['--app_name', 'test-project'])
+
+        self.assertIn("INFO:root:Writing test-project/README.md", logs.output)
+        self.assertIn("INFO:root:1 files written, 1 unchanged files skipped", logs.output)
+        self.assertEqual(0, os.stat('test-project/setup.py').st_mtime_ns)
+        # No temporary files left behind
+        self.assertListEqual([], [f for f in os.listdir('.') if f.startswith('.')])
+
+    def test_process_only_changed_conflict(self):
+        self.fs.create_file('test-project/setup.py', contents='modified')
+
+        with patch('cookiecutter_x.cookiecutter_templates.cookiecutter', side_effect=self.generate):
+            with self.assertRaises(Exception) as context:
+                self.template_processor.only_changed(True).process(['--app_name', 'test-project'])
+
+        self.assertEqual(
+            "Destination file test-project/setup.py exists; to overwrite pass overwrite flag", str(context.exception)
+        )
+        # Nothing is written on conflicts
+        self.assertFalse(os.path.exists('test-project/README.md'))
+
     def test_invalid_template_dir(self):
         with self.assertRaises(Exception) as context:
             self.fs.remove(f"{self.base}/python/cookiecutter.json")
@@ -0,0 +1,160 @@
+import os
+import shutil
+import socket
+import tempfile
+import threading
+from unittest.case import TestCase
+from unittest.mock import patch
+
+from cookiecutter_x import daemon, profiler
+from cookiecutter_x.core import CCXError, config
+from cookiecutter_x.daemon import CCXDaemon
+from cookiecutter_x.template_watcher import WatchingTemplateResolver
+
+
+class CCXDaemonTest(TestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base = os.path.join(self.tmp.name, 'simple-templates')
+        self.output = os.path.join(self.tmp.name, 'output')
+        os.makedirs(os.path.join(self.base, 'bash'))
+        os.makedirs(self.output)
+
+        with open(os.path.join(self.base, 'bash', 'ccx.yml'), 'w') as f:
+            f.write('''name: bash
+description: Create a bash script
+variables:
+  filename:
+    required: true
+    type: string
+files:
+  - name: bash_script.sh
+    output: "{{ filename }}"
+''')
+
+        with open(os.path.join(self.base, 'bash', 'bash_script.sh'), 'w') as f:
+            f.write('echo "{{ filename }}"\n')
+
+        cache_patcher = patch.object(config, 'cache_path', os.path.join(self.tmp.name, 'cache'))
+        cache_patcher.start()
+        self.addCleanup(cache_patcher.stop)
+
+        self.daemon = CCXDaemon(os.path.join(self.tmp.name, 'ccx.sock'))
+        self.daemon.resolvers['simple'] = WatchingTemplateResolver([self.base], poll_interval=0.1)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+        super().tearDown()
+
+    def test_handle_process(self):
+        response = self.daemon.handle({
+            'command': 'process', 'kind': 'simple', 'template': 'bash',
+            'arguments': ['--filename', 'run.sh'], 'cwd': self.output
+        })
+
+        self.assertIsNone(response['error'])
+        self.assertIn("Writing ./run.sh", [m for _, m in response['logs']])
+        with open(os.path.join(self.output, 'run.sh')) as f:
+            self.assertEqual('echo "run.sh"', f.read())
+
+    def test_handle_profile(self):
+        response = self.daemon.handle({
+            'command': 'process', 'kind': 'simple', 'template': 'bash',
+            'arguments': ['--filename', 'run.sh'], 'cwd': self.output, 'profile': True
+        })
+
+        self.assertFalse(profiler.active())
+        self.assertEqual({'template': 'bash', 'kind': 'simple'}, response['profile']['metadata'])
+        self.assertEqual(1, response['profile']['counts'][profiler.FILES_RENDERED])
+        self.assertIn('render', {e['name'] for e in response['profile']['events']})
+
+        response = self.daemon.handle({'command': 'doc', 'kind': 'simple', 'template': 'bash'})
+        self.assertIsNone(response['profile'])
+
+    def test_handle_created_source(self):
+        # The daemon starts before the template source directory exists
+        base = os.path.join(self.tmp.name, 'later-templates')
+        self.daemon.resolvers['simple'] = WatchingTemplateResolver([base], poll_interval=60)
+
+        shutil.copytree(self.base, base)
+        response = self.daemon.handle({
+            'command': 'process', 'kind': 'simple', 'template': 'bash',
+            'arguments': ['--filename', 'run.sh'], 'cwd': self.output
+        })
+
+        self.assertIsNone(response['error'])
+        self.assertTrue(os.path.exists(os.path.join(self.output, 'run.sh')))
+
+    def test_handle_error(self):
+        response = self.daemon.handle({'command': 'doc', 'kind': 'simple', 'template': 'random'})
+        self.assertEqual("Template random not found", response['error'])
+
+    def test_handle_exit(self):
+        with patch.object(self.daemon, 'execute', side_effect=SystemExit(2)):
+            response = self.daemon.handle({'command': 'doc', 'kind': 'simple', 'template': 'bash'})
+
+        self.assertEqual("Exited with status 2", response['error'])
+
+    def listen(self, name: str) -> socket.socket:
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.addCleanup(listener.close)
+        listener.bind(os.path.join(self.tmp.name, name))
+        listener.listen(1)
+        return listener
+
+    def test_forward_without_reply(self):
+        # A stuck daemon: the request is queued but never answered
+        stuck = self.listen('stuck.sock')
+        with patch.dict(os.environ, {daemon.TIMEOUT_ENV: '0.2'}):
+            with self.assertRaisesRegex(CCXError, 'did not reply within 0.2s'):
+                daemon.forward({'command': 'doc'}, stuck.getsockname())
+
+        # A daemon stopping while handling the request
+        stopping = self.listen('stopping.sock')
+        threading.Thread(target=lambda: stopping.accept()[0].close()).start()
+        with patch.dict(os.environ, {daemon.TIMEOUT_ENV: '5'}):
+            with self.assertRaisesRegex(CCXError, 'stopped without replying'):
+                daemon.forward({'command': 'doc'}, stopping.getsockname())
+
+    def test_processor_cache(self):
+        processor = self.daemon.processor('simple', 'bash')
+        self.assertIs(processor, self.daemon.processor('simple', 'bash'))
+
+        manifest = os.path.join(self.base, 'bash', 'ccx.yml')
+        st = os.stat(manifest)
+        os.utime(manifest, ns=(st.st_atime_ns, st.st_mtime_ns + 1))
+        self.assertIsNot(processor, self.daemon.processor('simple', 'bash'))
+
+    def test_forward(self):
+        self.assertFalse(daemon.forward({'command': 'doc'}, self.daemon.socket_path))
+
+        server = threading.Thread(target=self.daemon.serve_forever, daemon=True)
+        server.start()
+
+        try:
+            self.assertTrue(self.daemon.ready.wait(5))
+
+            cwd = os.getcwd()
+            os.chdir(self.output)
+            try:
+                request = {
+                    'command': 'process', 'kind': 'simple', 'template': 'bash', 'arguments': ['--filename', 'run.sh']
+                }
+                self.assertTrue(daemon.forward(request, self.daemon.socket_path))
+
+                with self.assertRaises(CCXError) as context:
+                    daemon.forward(request, self.daemon.socket_path)
+            finally:
+                os.chdir(cwd)
+
+            self.assertTrue(os.path.exists(os.path.join(self.output, 'run.sh')))
+            self.assertEqual(
+                "Destination file ./run.sh exists; to overwrite pass overwrite flag", str(context.exception)
+            )
+        finally:
+            self.daemon.shutdown()
+            server.join()
+
+        self.assertFalse(os.path.exists(self.daemon.socket_path))
@@ -0,0 +1,53 @@
+import os
+from unittest.mock import patch
+
+from pyfakefs.fake_filesystem_unittest import TestCase
+
+from cookiecutter_x import environment
+from cookiecutter_x.core import config
+from cookiecutter_x.environment import template_environment
+
+
+class TemplateEnvironmentTest(TestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.setUpPyfakefs()
+
+        self.template_file = '/ccx-templates/simple-templates/cpp/cpp.h'
+        self.fs.create_file(self.template_file, contents='class {{ class_name }};')
+
+        self.cache_dir = os.path.join(config.cache_path, environment.BYTECODE_CACHE_DIR_NAME)
+
+    def tearDown(self) -> None:
+        super().tearDown()
+
+    def test_render(self):
+        with patch.dict(environment._environments, clear=True):
+            template = template_environment().get_template(self.template_file)
+            self.assertEqual('class Awesome;', template.render(class_name='Awesome'))
+
+    def test_template_changed(self):
+        with patch.dict(environment._environments, clear=True):
+            env = template_environment()
+            self.assertEqual('class Awesome;', env.get_template(self.template_file).render(class_name='Awesome'))
+
+            with open(self.template_file, 'w') as f:
+                f.write('struct {{ class_name }};')
+
+            self.assertEqual('struct Awesome;', env.get_template(self.template_file).render(class_name='Awesome'))
+
+    def test_bytecode_cache(self):
+        with patch.dict(environment._environments, clear=True):
+            template_environment().get_template(self.template_file)
+
+        self.assertEqual(1, len(os.listdir(self.cache_dir)))
+
+        with patch.dict(environment._environments, clear=True):
+            env = template_environment()
+
+            # A fresh environment loads the compiled template instead of compiling it
+            with patch.object(env, 'compile', side_effect=AssertionError("compiled")):
+                template = env.get_template(self.template_file)
+
+            self.assertEqual('class Awesome;', template.render(class_name='Awesome'))
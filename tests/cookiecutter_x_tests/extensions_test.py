@@ -0,0 +1,110 @@
+import os
+import sys
+import tempfile
+from unittest import TestCase
+
+from jinja2 import Environment
+
+from cookiecutter_x.extensions import CCXExtension
+from cookiecutter_x.extensions import case, plugins
+
+
+class CaseFiltersTest(TestCase):
+
+    def test_snake_case(self):
+        self.assertEqual('hello_world', case.snake_case('HelloWorld'))
+        self.assertEqual('http_server', case.snake_case('HTTPServer'))
+        self.assertEqual('get_http_response2', case.snake_case('getHTTPResponse2'))
+        self.assertEqual('my-var', case.snake_case('my-var'))
+
+    def test_words(self):
+        self.assertEqual(('http', 'server', 'v2'), case.words('HTTPServer v2'))
+        self.assertEqual(('my', 'project', 'name'), case.words('my-project_name'))
+        self.assertEqual((), case.words('--'))
+
+    def test_family(self):
+        for value in ['my project', 'MyProject', 'my_project', 'my-project', 'MY_PROJECT']:
+            self.assertEqual('myProject', case.camel_case(value))
+            self.assertEqual('MyProject', case.pascal_case(value))
+            self.assertEqual('my-project', case.kebab_case(value))
+            self.assertEqual('MY_PROJECT', case.constant_case(value))
+            self.assertEqual('My Project', case.title_case(value))
+
+        self.assertEqual('', case.camel_case(''))
+
+    def test_memoized(self):
+        case.pascal_case.cache_clear()
+        case.pascal_case('memo test')
+        case.pascal_case('memo test')
+
+        self.assertEqual(1, case.pascal_case.cache_info().hits)
+        self.assertEqual(case.CACHE_SIZE, case.pascal_case.cache_info().maxsize)
+
+    def test_extension(self):
+        env = Environment(extensions=[CCXExtension])
+        template = env.from_string('{{ v | camel_case }} {{ v | kebab_case }} {{ v | snake_case }}')
+
+        self.assertEqual('fooBar foo-bar foo_bar', template.render(v='FooBar'))
+
+
+class PluginsTest(TestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+
+        with open(os.path.join(tmp.name, 'ccx_test_plugin.py'), 'w') as f:
+            f.write('def shout(val):\n    return val.upper() + "!"\n\nANSWER = 42\n')
+
+        dist_info = os.path.join(tmp.name, 'ccx_test_plugin-0.1.dist-info')
+        os.makedirs(dist_info)
+        with open(os.path.join(dist_info, 'METADATA'), 'w') as f:
+            f.write('Metadata-Version: 2.1\nName: ccx-test-plugin\nVersion: 0.1\n')
+        with open(os.path.join(dist_info, 'entry_points.txt'), 'w') as f:
+            f.write(f"[{plugins.FILTERS_GROUP}]\nshout = ccx_test_plugin:shout\n\n"
+                    f"[{plugins.GLOBALS_GROUP}]\nanswer = ccx_test_plugin:ANSWER\n")
+
+        sys.path.insert(0, tmp.name)
+        self.addCleanup(sys.path.remove, tmp.name)
+        self.addCleanup(sys.modules.pop, 'ccx_test_plugin', None)
+
+        plugins.entry_points.cache_clear()
+        self.addCleanup(plugins.entry_points.cache_clear)
+
+        self.env = Environment(extensions=[CCXExtension])
+
+    def test_loaded_on_use(self):
+        self.env.from_string('{{ name | snake_case }}').render(name='HelloWorld')
+        self.assertNotIn('ccx_test_plugin', sys.modules)
+
+        template = self.env.from_string('{{ name | shout }} {{ answer }}')
+        self.assertIn('ccx_test_plugin', sys.modules)
+        self.assertEqual('HELLO! 42', template.render(name='hello'))
+
+    def test_unknown_name(self):
+        from jinja2 import TemplateAssertionError
+
+        with self.assertRaises(TemplateAssertionError):
+            self.env.from_string('{{ name | whisper }}')
+
+        self.assertEqual('', self.env.from_string('{{ missing }}').render())
+        self.assertNotIn('ccx_test_plugin', sys.modules)
+
+    def test_bytecode_cached_template(self):
+        from jinja2 import DictLoader, FileSystemBytecodeCache
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            def render() -> str:
+                env = Environment(
+                    loader=DictLoader({'t': '{{ name | shout }} {{ answer }}'}),
+                    bytecode_cache=FileSystemBytecodeCache(cache_dir),
+                    extensions=[CCXExtension]
+                )
+                return env.get_template('t').render(name='hi')
+
+            self.assertEqual('HI! 42', render())
+            sys.modules.pop('ccx_test_plugin')
+
+            # Loaded from the bytecode cache, the names are resolved while rendering
+            self.assertEqual('HI! 42', render())
@@ -0,0 +1,68 @@
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from typing import List, Tuple
+from unittest.case import TestCase
+
+
+class ImportTimeTest(TestCase):
+    """Guard the CLI start-up time; commands must not import the heavy dependencies they don't need"""
+
+    # Import time (in milliseconds) of the cookiecutter_x modules themselves while running a light command; the
+    # self times are summed, the cumulative times would count nested modules once per enclosing package
+    BUDGET_MS = 150
+
+    HEAVY_MODULES = ['cookiecutter', 'jinja2', 'yaml', 'tabulate', 'coloredlogs', 'asyncio']
+
+    @staticmethod
+    def run_cli(arguments: List[str]) -> Tuple[List[str], List[Tuple[int, str]]]:
+        code = f'''
+import sys
+from cookiecutter_x.main import cli
+cli.main(args={arguments!r}, standalone_mode=False)
+print(' '.join(sorted(sys.modules)))
+'''
+        with tempfile.TemporaryDirectory() as home:
+            env = dict(os.environ, HOME=home)
+            result = subprocess.run(
+                [sys.executable, '-X', 'importtime', '-c', code],
+                env=env, cwd=home, capture_output=True, text=True, check=True
+            )
+
+        modules = result.stdout.splitlines()[-1].split()
+        timings = []
+        for line in result.stderr.splitlines():
+            m = re.match(r'import time:\s+(\d+) \|\s+\d+ \|\s+(\S+)$', line)
+            if m:
+                timings.append((int(m.group(1)), m.group(2)))
+
+        return modules, timings
+
+    def check_command(self, arguments: List[str]):
+        modules, timings = self.run_cli(arguments)
+
+        for heavy in self.HEAVY_MODULES:
+            self.assertNotIn(heavy, modules, f"'{' '.join(arguments)}' imports {heavy}")
+
+        total_ms = sum(us for us, name in timings if name.startswith('cookiecutter_x')) / 1000
+        self.assertLess(
+            total_ms, self.BUDGET_MS,
+            f"'{' '.join(arguments)}' spent {total_ms:.1f}ms importing cookiecutter_x modules"
+        )
+
+    def test_help(self):
+        self.check_command(['--help'])
+
+    def test_simple_list(self):
+        self.check_command(['simple', 'list'])
+
+    def test_cc_list(self):
+        self.check_command(['cc', 'list'])
+
+    def test_search(self):
+        self.check_command(['search', 'cpp'])
+
+    def test_completion_script(self):
+        self.check_command(['completion', 'script', 'bash'])
@@ -0,0 +1,146 @@
+import json
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from cookiecutter_x import core
+from cookiecutter_x.cookiecutter_templates import CookiecutterTemplateProcessor
+from cookiecutter_x.core import CCXError, TemplateResolver
+from cookiecutter_x.manifest_cache import ManifestCache
+from cookiecutter_x.simple_templates import SimpleTemplateProcessor
+
+
+class ManifestCacheTests(TestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+
+        self.cache = ManifestCache(os.path.join(self.tmp, 'manifests'))
+        self.source = os.path.join(self.tmp, 'source.txt')
+        self.write('one')
+
+    def write(self, contents: str) -> None:
+        with open(self.source, 'w') as f:
+            f.write(contents)
+
+    def build(self):
+        with open(self.source) as f:
+            return {'contents': f.read()}
+
+    def test_hit(self):
+        self.assertEqual({'contents': 'one'}, self.cache.load([self.source], self.build))
+        self.assertEqual({'contents': 'one'}, self.cache.load([self.source], self.unexpected_build))
+
+    def test_source_changed(self):
+        self.cache.load([self.source], self.build)
+
+        self.write('three')
+        self.assertEqual({'contents': 'three'}, self.cache.load([self.source], self.build))
+
+        # Same size, different modification time
+        self.write('four!')
+        os.utime(self.source, ns=(0, 10 ** 9))
+        self.assertEqual({'contents': 'four!'}, self.cache.load([self.source], self.build))
+
+    def test_missing_source(self):
+        missing = os.path.join(self.tmp, 'missing.txt')
+        self.assertIsNone(self.cache.load([missing], lambda: None))
+
+        self.write('created')
+        os.replace(self.source, missing)
+        self.assertEqual('created', self.cache.load([missing], lambda: 'created'))
+
+    def test_corrupt_entry(self):
+        self.cache.load([self.source], self.build)
+
+        for entry in os.listdir(self.cache.directory):
+            with open(os.path.join(self.cache.directory, entry), 'wb') as f:
+                f.write(b'not a pickle')
+
+        self.assertEqual({'contents': 'one'}, self.cache.load([self.source], self.build))
+
+    def test_unwritable_directory(self):
+        self.write('file')
+        cache = ManifestCache(os.path.join(self.source, 'manifests'))
+        self.assertEqual({'contents': 'file'}, cache.load([self.source], self.build))
+
+    def unexpected_build(self):
+        self.fail("The cached value is expected")
+
+
+class TemplateManifestTests(TestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+
+        p = patch.object(core.config, 'cache_path', os.path.join(self.tmp, 'cache'))
+        p.start()
+        self.addCleanup(p.stop)
+
+        self.base = os.path.join(self.tmp, 'templates')
+        os.makedirs(os.path.join(self.base, 'bash'))
+        with open(os.path.join(self.base, 'bash', 'script.sh'), 'w') as f:
+            f.write('echo {{ name }}\n')
+        with open(os.path.join(self.base, 'bash', 'ccx.yml'), 'w') as f:
+            f.write('''variables:
+  name:
+    default: demo
+files:
+  - name: script.sh
+    output: "{{ name }}.sh"
+''')
+
+        cwd = os.getcwd()
+        os.chdir(self.tmp)
+        self.addCleanup(os.chdir, cwd)
+
+    def processor(self) -> SimpleTemplateProcessor:
+        return SimpleTemplateProcessor('bash', TemplateResolver([self.base]))
+
+    def test_warm_start(self):
+        self.processor().build_parser().process([])
+
+        with patch('cookiecutter_x.utils.yaml_load', side_effect=AssertionError) as yaml_load, \
+                patch('jinja2.Environment.compile', side_effect=AssertionError) as compile_template:
+            processor = self.processor()
+            self.assertEqual(['name'], [v.name for v in processor.variables])
+
+            processor.build_parser().process(['--name', 'other'])
+
+        yaml_load.assert_not_called()
+        compile_template.assert_not_called()
+
+        with open(os.path.join(self.tmp, 'other.sh')) as f:
+            self.assertEqual('echo other', f.read())
+
+    def test_invalid_variables(self):
+        with open(os.path.join(self.base, 'bash', 'ccx.yml'), 'w') as f:
+            f.write('files: []\n')
+
+        for _ in range(2):
+            with self.assertRaisesRegex(CCXError, 'Template without variables'):
+                _ = self.processor().variables
+
+    def test_cookiecutter_json_changed(self):
+        os.makedirs(os.path.join(self.base, 'python'))
+        cc_path = os.path.join(self.base, 'python', 'cookiecutter.json')
+        with open(cc_path, 'w') as f:
+            json.dump({'app_name': 'demo'}, f)
+
+        def variable_names():
+            processor = CookiecutterTemplateProcessor('python', TemplateResolver([self.base]))
+            return [v.name for v in processor.variables]
+
+        self.assertEqual(['app_name'], variable_names())
+
+        with open(cc_path, 'w') as f:
+            json.dump({'app_name': 'demo', 'version': '1.0'}, f)
+
+        self.assertEqual(['app_name', 'version'], variable_names())
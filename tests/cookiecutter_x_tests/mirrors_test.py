@@ -0,0 +1,109 @@
+import os
+import subprocess
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from cookiecutter_x import mirrors
+from cookiecutter_x.core import TemplateResolver, CCXError
+from cookiecutter_x.mirrors import GitMirrors, parse_source
+
+
+def git(*args: str) -> str:
+    return subprocess.run(['git', *args], check=True, stdout=subprocess.PIPE, text=True).stdout.strip()
+
+
+class ParseSourceTests(TestCase):
+
+    def test_parse(self):
+        self.assertEqual(('file:///repo.git', 'HEAD', ''), parse_source('git+file:///repo.git'))
+        self.assertEqual(('file:///repo.git', 'v1', ''), parse_source('git+file:///repo.git@v1'))
+        self.assertEqual(
+            ('ssh://git@host/org/repo.git', 'main', 'simple'), parse_source('git+ssh://git@host/org/repo.git@main#simple')
+        )
+        self.assertEqual(('git@host:repo.git', 'HEAD', ''), parse_source('git+git@host:repo.git'))
+        self.assertEqual(('git@host:repo.git', 'v1', ''), parse_source('git+git@host:repo.git@v1'))
+        self.assertEqual(('git@host:org/repo.git', 'HEAD', ''), parse_source('git+git@host:org/repo.git'))
+        self.assertEqual(('ssh://git@host', 'HEAD', ''), parse_source('git+ssh://git@host'))
+
+
+class GitMirrorsTests(TestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+
+        self.repo = os.path.join(self.tmp, 'repo')
+        os.makedirs(os.path.join(self.repo, 'simple', 'bash'))
+        git('init', '--quiet', self.repo)
+        git('-C', self.repo, 'config', 'user.email', 'ccx@example.com')
+        git('-C', self.repo, 'config', 'user.name', 'ccx')
+        self.commit('bash.sh', 'echo v1\n')
+        git('-C', self.repo, 'tag', 'v1')
+
+        self.url = f"file://{self.repo}"
+        self.mirrors = GitMirrors(os.path.join(self.tmp, 'mirrors'), ttl=3600)
+
+    def commit(self, name: str, content: str) -> None:
+        with open(os.path.join(self.repo, 'simple', 'bash', name), 'w') as f:
+            f.write(content)
+
+        git('-C', self.repo, 'add', '-A')
+        git('-C', self.repo, 'commit', '--quiet', '-m', f"Update {name}")
+
+    def read(self, checkout: str) -> str:
+        with open(os.path.join(checkout, 'bash', 'bash.sh')) as f:
+            return f.read()
+
+    def test_checkout(self):
+        checkout = self.mirrors.checkout(f"git+{self.url}#simple")
+
+        self.assertEqual('echo v1\n', self.read(checkout))
+        self.assertTrue(os.path.isdir(self.mirrors.mirror_path(self.url)))
+        self.assertEqual({'bash': os.path.join(checkout, 'bash')}, TemplateResolver([checkout]).list())
+
+    def test_ttl(self):
+        first = self.mirrors.checkout(f"git+{self.url}#simple")
+        self.commit('bash.sh', 'echo v2\n')
+
+        # Within the TTL the mirror is used as is, without running git
+        with patch.object(mirrors, '_git', side_effect=AssertionError("git called")):
+            self.assertEqual(first, self.mirrors.checkout(f"git+{self.url}#simple"))
+
+        expired = GitMirrors(self.mirrors.path, ttl=0)
+        second = expired.checkout(f"git+{self.url}#simple")
+        self.assertNotEqual(first, second)
+        self.assertEqual('echo v2\n', self.read(second))
+
+        # Pinned to a ref
+        self.assertEqual('echo v1\n', self.read(expired.checkout(f"git+{self.url}@v1#simple")))
+
+    def test_prune(self):
+        old = self.mirrors.checkout(f"git+{self.url}@v1#simple")
+        os.utime(os.path.dirname(old), (0, 0))
+
+        self.commit('bash.sh', 'echo v2\n')
+        GitMirrors(self.mirrors.path, ttl=0).checkout(f"git+{self.url}#simple")
+
+        self.assertFalse(os.path.exists(old))
+
+    def test_offline(self):
+        checkout = self.mirrors.checkout(f"git+{self.url}#simple")
+        os.rename(self.repo, self.repo + '-moved')
+
+        with self.assertLogs(level='WARNING'):
+            self.assertEqual(checkout, GitMirrors(self.mirrors.path, ttl=0).checkout(f"git+{self.url}#simple"))
+
+    def test_failed_state_save(self):
+        with patch.object(mirrors.os, 'replace', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                self.mirrors.checkout(f"git+{self.url}#simple")
+
+        # Only the mirror; neither the state nor a temporary file
+        self.assertEqual([os.path.basename(self.mirrors.mirror_path(self.url))], os.listdir(self.mirrors.path))
+
+    def test_unknown_ref(self):
+        with self.assertRaises(CCXError):
+            self.mirrors.checkout(f"git+{self.url}@missing")
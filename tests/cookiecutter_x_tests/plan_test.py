@@ -0,0 +1,199 @@
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Dict, List
+from unittest import TestCase
+from unittest.mock import patch
+
+from click.testing import CliRunner
+
+from cookiecutter_x import core, plan
+from cookiecutter_x.cli import cli
+from cookiecutter_x.core import CCXError
+
+
+class PlanTest(TestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+
+        simple_base = os.path.join(self.tmp, 'simple')
+        os.makedirs(os.path.join(simple_base, 'cpp'))
+        with open(os.path.join(simple_base, 'cpp', 'class.h'), 'w') as f:
+            f.write('class {{ name | pascal_case }} {};\n')
+        with open(os.path.join(simple_base, 'cpp', 'ccx.yml'), 'w') as f:
+            f.write('variables:\n  name:\n    required: true\nfiles:\n  - name: class.h\n    output: "{{ name }}.h"\n')
+
+        cc_base = os.path.join(self.tmp, 'cookiecutter')
+        os.makedirs(os.path.join(cc_base, 'python', '{{cookiecutter.app_name}}'))
+        with open(os.path.join(cc_base, 'python', 'cookiecutter.json'), 'w') as f:
+            json.dump({'app_name': 'demo'}, f)
+        with open(os.path.join(cc_base, 'python', '{{cookiecutter.app_name}}', 'setup.py'), 'w') as f:
+            f.write('name = "{{ cookiecutter.app_name }}"\n')
+
+        config_file = os.path.join(self.tmp, 'cookiecutter-config.yml')
+        with open(config_file, 'w') as f:
+            f.write(f"cookiecutters_dir: {self.tmp}/cookiecutters\nreplay_dir: {self.tmp}/replay\n")
+
+        for p in [
+            patch.dict(os.environ, {'COOKIECUTTER_CONFIG': config_file}),
+            patch.object(core.config, 'cache_path', os.path.join(self.tmp, 'cache')),
+            patch.object(core.config, 'simple_template_paths', [simple_base]),
+            patch.object(core.config, 'cookiecutter_template_paths', [cc_base]),
+        ]:
+            p.start()
+            self.addCleanup(p.stop)
+
+        cwd = os.getcwd()
+        os.chdir(self.tmp)
+        self.addCleanup(os.chdir, cwd)
+
+    def test_run(self):
+        with open('plan.yml', 'w') as f:
+            f.write('''steps:
+  - name: service
+    kind: cc
+    template: python
+    variables:
+      app_name: billing
+  - template: cpp
+    output: billing/include
+    after: service
+    variables:
+      name: invoice
+''')
+
+        result = CliRunner().invoke(cli, ['run', 'plan.yml'])
+        self.assertEqual(0, result.exit_code, result.output)
+
+        with open(os.path.join('billing', 'setup.py')) as f:
+            self.assertEqual('name = "billing"\n', f.read())
+        with open(os.path.join('billing', 'include', 'invoice.h')) as f:
+            self.assertEqual('class Invoice {};', f.read())
+
+    def test_cc_structured_variables(self):
+        template = os.path.join(self.tmp, 'cookiecutter', 'service')
+        os.makedirs(os.path.join(template, '{{cookiecutter.app_name}}'))
+        with open(os.path.join(template, 'cookiecutter.json'), 'w') as f:
+            json.dump({'app_name': 'demo', 'settings': {'port': 80, 'authors': ['nobody']}}, f)
+        with open(os.path.join(template, '{{cookiecutter.app_name}}', 'app.cfg'), 'w') as f:
+            f.write('port = {{ cookiecutter.settings.port }}\nauthors = {{ cookiecutter.settings.authors | join(", ") }}\n')
+
+        with open('plan.yml', 'w') as f:
+            f.write('''steps:
+  - kind: cc
+    template: service
+    variables:
+      app_name: billing
+      settings:
+        port: 8080
+        authors: [ann, bob]
+''')
+
+        result = CliRunner().invoke(cli, ['run', 'plan.yml'])
+        self.assertEqual(0, result.exit_code, result.output)
+
+        with open(os.path.join('billing', 'app.cfg')) as f:
+            self.assertEqual('port = 8080\nauthors = ann, bob\n', f.read())
+
+        with self.assertRaisesRegex(CCXError, 'Invalid variables of step service: unknown variables port'):
+            self.steps({'kind': 'cc', 'template': 'service', 'variables': {'port': 8080}})
+
+    def test_span_record(self):
+        span_log = os.path.join(self.tmp, 'spans.jsonl')
+        with open('plan.yml', 'w') as f:
+            f.write('steps:\n  - name: a\n    template: cpp\n    variables:\n      name: a\n'
+                    '  - name: b\n    template: cpp\n    variables:\n      name: b\n')
+
+        with patch.object(core.config, 'configs', {'span_log': {'path': span_log}}):
+            result = CliRunner().invoke(cli, ['run', 'plan.yml'])
+        self.assertEqual(0, result.exit_code, result.output)
+
+        with open(span_log) as f:
+            record = json.loads(f.readline())
+
+        # The steps apply different templates; the run names none
+        self.assertEqual('run', record['command'])
+        self.assertNotIn('template', record)
+        self.assertEqual(2, record['files_rendered'])
+
+    def steps(self, *definitions: Dict[str, Any]) -> Dict[str, plan.Step]:
+        return plan.build_steps(list(definitions))
+
+    def test_dependency_order(self):
+        steps = self.steps(
+            {'name': 'c', 'template': 'cpp', 'variables': {'name': 'c'}, 'after': ['a', 'b']},
+            {'name': 'a', 'template': 'cpp', 'variables': {'name': 'a'}},
+            {'name': 'b', 'template': 'cpp', 'variables': {'name': 'b'}, 'after': 'a'},
+        )
+
+        order: List[str] = []
+        with patch.object(plan, 'run_step', side_effect=lambda step: order.append(step.name)):
+            plan.run_steps(steps, jobs=4)
+
+        self.assertEqual(['a', 'b', 'c'], order)
+
+    def test_concurrent_steps(self):
+        steps = self.steps(*({'name': n, 'template': 'cpp', 'variables': {'name': n}} for n in ('a', 'b', 'c')))
+
+        # Every step waits for the others; completes only if the three run at the same time
+        barrier = threading.Barrier(3, timeout=10)
+        run_step = plan.run_step
+
+        def wait_for_others(step: plan.Step) -> None:
+            barrier.wait()
+            run_step(step)
+
+        with patch.object(plan, 'run_step', side_effect=wait_for_others):
+            plan.run_steps(steps, jobs=3)
+
+        self.assertEqual(['a.h', 'b.h', 'c.h'], sorted(n for n in os.listdir('.') if n.endswith('.h')))
+
+    def test_invalid_steps(self):
+        with self.assertRaisesRegex(CCXError, 'unknown step b'):
+            self.steps({'name': 'a', 'template': 'cpp', 'variables': {'name': 'a'}, 'after': 'b'})
+
+        with self.assertRaisesRegex(CCXError, 'depend on each other'):
+            self.steps(
+                {'name': 'a', 'template': 'cpp', 'variables': {'name': 'a'}, 'after': 'b'},
+                {'name': 'b', 'template': 'cpp', 'variables': {'name': 'b'}, 'after': 'a'},
+            )
+
+        with self.assertRaisesRegex(CCXError, 'Duplicate step cpp'):
+            self.steps({'template': 'cpp', 'variables': {'name': 'a'}}, {'template': 'cpp', 'variables': {'name': 'b'}})
+
+        with self.assertRaisesRegex(CCXError, 'engine applies to cookiecutter'):
+            self.steps({'template': 'cpp', 'variables': {'name': 'a'}, 'engine': 'ccx'})
+
+        with self.assertRaises(CCXError):
+            self.steps({'template': 'missing'})
+
+    def test_invalid_variables_fail_before_generating(self):
+        with open('plan.yml', 'w') as f:
+            f.write('steps:\n  - template: cpp\n    variables:\n      name: a\n  - name: b\n    template: cpp\n')
+
+        with self.assertLogs(level='ERROR') as logs:
+            result = CliRunner().invoke(cli, ['run', 'plan.yml'])
+
+        self.assertNotEqual(0, result.exit_code)
+        self.assertIn('Invalid variables of step b', logs.output[0])
+        self.assertFalse(os.path.exists('a.h'))
+
+    def test_failed_step_skips_dependents(self):
+        steps = self.steps(
+            {'name': 'a', 'template': 'cpp', 'variables': {'name': 'a'}},
+            {'name': 'b', 'template': 'cpp', 'variables': {'name': 'b'}, 'after': 'a'},
+        )
+
+        def fail_a(step: plan.Step) -> None:
+            raise CCXError(f"{step.name} exploded")
+
+        with patch.object(plan, 'run_step', side_effect=fail_a) as mock:
+            with self.assertRaisesRegex(CCXError, 'Step a failed: a exploded'):
+                plan.run_steps(steps, jobs=2)
+
+        self.assertEqual(1, mock.call_count)
@@ -0,0 +1,179 @@
+import json
+import os
+import tempfile
+import time
+from unittest import TestCase
+from unittest.mock import patch, PropertyMock
+
+from click.testing import CliRunner
+
+from cookiecutter_x import core, environment, profiler
+from cookiecutter_x.cli import cli
+from cookiecutter_x.core import CCXError
+
+
+class ProfilerTest(TestCase):
+
+    def tearDown(self) -> None:
+        profiler.stop()
+        super().tearDown()
+
+    def test_inactive(self):
+        with profiler.span('phase') as args:
+            args['files'] = 1
+
+        profiler.count('calls')
+        self.assertFalse(profiler.active())
+
+    def test_trace(self):
+        p = profiler.start()
+
+        with profiler.span('outer', template='cpp') as args:
+            with profiler.span('inner', category='io'):
+                pass
+
+            args['files'] = 2
+
+        counted = profiler.counted('filter upper', str.upper)
+        self.assertEqual('A', counted('a'))
+        counted('b')
+
+        self.assertIs(p, profiler.stop())
+        events = p.trace()['traceEvents']
+
+        spans = {e['name']: e for e in events if e['ph'] == 'X'}
+        self.assertEqual(['inner', 'outer'], sorted(spans))
+        self.assertEqual('io', spans['inner']['cat'])
+        self.assertEqual({'template', 'files', 'cpu_ms'}, set(spans['outer']['args']))
+        self.assertLessEqual(spans['outer']['ts'], spans['inner']['ts'])
+        self.assertGreaterEqual(spans['outer']['dur'], spans['inner']['dur'])
+
+        counters = [e for e in events if e['ph'] == 'C']
+        self.assertEqual([{'filter upper': 2}], [c['args'] for c in counters])
+
+    def test_merge(self):
+        daemon_run = profiler.start()
+        profiler.annotate(template='cpp', kind='simple')
+        profiler.count_file(__file__, written=False)
+        with profiler.span('render'):
+            pass
+        profiler.stop()
+
+        p = profiler.start()
+        profiler.merge(daemon_run.export(), 1000)
+        profiler.stop()
+
+        record = p.span_record()
+        self.assertEqual(('cpp', 'simple', 1), (record['template'], record['kind'], record['files_rendered']))
+        self.assertIn('render', record['stages'])
+        self.assertEqual(daemon_run.events[0]['ts'] + 1000, p.events[0]['ts'])
+
+    def test_stream_spans(self):
+        p = profiler.start()
+
+        def produce():
+            for n in range(3):
+                time.sleep(0.01)
+                yield n
+
+        with profiler.stream_spans('render', 'write', file='out.txt') as timed:
+            for _ in timed(produce()):
+                time.sleep(0.02)
+
+        spans = {e['name']: e for e in p.trace()['traceEvents'] if e['ph'] == 'X'}
+        self.assertGreaterEqual(spans['render']['dur'], 30_000)
+        self.assertGreaterEqual(spans['write']['dur'], 60_000)
+        self.assertLess(spans['render']['dur'], spans['write']['dur'])
+        self.assertEqual(spans['render']['ts'] + spans['render']['dur'], spans['write']['ts'])
+        self.assertEqual('out.txt', spans['write']['args']['file'])
+
+
+class ProfileOptionTest(TestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+
+        base = os.path.join(self.tmp, 'templates')
+        os.makedirs(os.path.join(base, 'cpp'))
+        with open(os.path.join(base, 'cpp', 'class.h'), 'w') as f:
+            f.write('class {{ name | pascal_case }} {};\n')
+        with open(os.path.join(base, 'cpp', 'ccx.yml'), 'w') as f:
+            f.write('variables:\n  name:\n    required: true\nfiles:\n  - name: class.h\n    output: "{{ name }}.h"\n')
+
+        for p in [
+            patch.object(core.config, 'cache_path', os.path.join(self.tmp, 'cache')),
+            patch.object(core.config, 'simple_template_paths', [base]),
+            # The environment is process wide; start each test with a new one
+            patch.dict(environment._environments, clear=True),
+        ]:
+            p.start()
+            self.addCleanup(p.stop)
+
+        cwd = os.getcwd()
+        os.chdir(self.tmp)
+        self.addCleanup(os.chdir, cwd)
+
+    def test_profile(self):
+        profile = os.path.join(self.tmp, 'profile.json')
+        result = CliRunner().invoke(cli, ['--profile', profile, 'simple', 'process', 'cpp', '--name', 'my_class'])
+
+        self.assertEqual(0, result.exit_code, result.output)
+        self.assertFalse(profiler.active())
+
+        with open(profile) as f:
+            trace = json.load(f)
+
+        names = {e['name'] for e in trace['traceEvents'] if e['ph'] == 'X'}
+        self.assertTrue({'resolve', 'manifest', 'build parser', 'parse arguments', 'render', 'write'} <= names)
+        self.assertEqual(1, trace['otherData']['counts']['filter pascal_case'])
+
+    def test_filters_counted_in_existing_environment(self):
+        # The environment is created by a run that is not profiled
+        result = CliRunner().invoke(cli, ['simple', 'process', 'cpp', '--name', 'first'])
+        self.assertEqual(0, result.exit_code, result.output)
+
+        profile = os.path.join(self.tmp, 'profile.json')
+        result = CliRunner().invoke(cli, ['--profile', profile, 'simple', 'process', 'cpp', '--name', 'second'])
+        self.assertEqual(0, result.exit_code, result.output)
+
+        with open(profile) as f:
+            self.assertEqual(1, json.load(f)['otherData']['counts']['filter pascal_case'])
+
+    def test_span_log(self):
+        span_log = os.path.join(self.tmp, 'logs', 'spans.jsonl')
+
+        with patch.object(core.config, 'configs', {'span_log': {'path': span_log}}), \
+                patch.dict(os.environ, {profiler.TRACE_ID_ENV: 'ci-job-1'}):
+            result = CliRunner().invoke(cli, ['simple', 'process', 'cpp', '--name', 'my_class'])
+            self.assertEqual(0, result.exit_code, result.output)
+
+            result = CliRunner().invoke(cli, ['simple', 'process', 'missing'])
+            self.assertNotEqual(0, result.exit_code)
+
+        with open(span_log) as f:
+            records = [json.loads(line) for line in f]
+
+        self.assertEqual(2, len(records))
+        record = records[0]
+        self.assertEqual('ci-job-1', record['trace_id'])
+        self.assertEqual('simple process', record['command'])
+        self.assertEqual(('cpp', 'simple', 'ok'), (record['template'], record['kind'], record['status']))
+        self.assertEqual(1, record['files_rendered'])
+        self.assertEqual(os.path.getsize(os.path.join(self.tmp, 'my_class.h')), record['bytes_written'])
+        self.assertIn('render', record['stages'])
+
+        self.assertEqual('error', records[1]['status'])
+        self.assertEqual('Template missing not found', records[1]['error'])
+
+    def test_span_log_other_commands(self):
+        # Commands not generating files don't read the configuration for the span log
+        with patch.object(type(core.config), 'span_log_path', new_callable=PropertyMock, side_effect=CCXError('bad')):
+            result = CliRunner().invoke(cli, ['completion', 'script', 'bash'])
+            self.assertEqual(0, result.exit_code, result.output)
+
+            result = CliRunner().invoke(cli, ['simple', 'process', 'cpp', '--name', 'my_class'])
+            self.assertNotEqual(0, result.exit_code)
+            self.assertFalse(profiler.active())
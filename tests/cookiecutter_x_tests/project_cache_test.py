@@ -0,0 +1,163 @@
+import json
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from cookiecutter.main import cookiecutter
+
+from cookiecutter_x import core
+from cookiecutter_x.cookiecutter_templates import CookiecutterTemplateProcessor
+from cookiecutter_x.core import TemplateResolver
+from cookiecutter_x.project_cache import ProjectCache, template_fingerprint
+
+
+class ProjectCacheTests(TestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+
+    def generator(self, name: str, size: int = 10):
+        def generate(output_dir: str) -> str:
+            project_dir = os.path.join(output_dir, name)
+            os.makedirs(os.path.join(project_dir, 'src'))
+            with open(os.path.join(project_dir, 'src', 'main.py'), 'w') as f:
+                f.write('x' * size)
+
+            return project_dir
+
+        return generate
+
+    def test_store_and_materialize(self):
+        cache = ProjectCache(os.path.join(self.tmp, 'cache'), link='hardlink')
+        self.assertIsNone(cache.lookup('key'))
+
+        tree = cache.store('key', self.generator('demo'))
+        self.assertEqual(tree, cache.lookup('key'))
+
+        output_dir = os.path.join(self.tmp, 'out')
+        self.assertEqual([os.path.join(output_dir, 'demo')], cache.materialize(tree, output_dir, False))
+
+        cached_file = os.path.join(tree, 'demo', 'src', 'main.py')
+        output_file = os.path.join(output_dir, 'demo', 'src', 'main.py')
+        self.assertTrue(os.path.samefile(cached_file, output_file))
+
+        from cookiecutter.exceptions import OutputDirExistsException
+        with self.assertRaises(OutputDirExistsException):
+            cache.materialize(tree, output_dir, False)
+
+        cache.materialize(tree, output_dir, True)
+
+    def test_copy(self):
+        cache = ProjectCache(os.path.join(self.tmp, 'cache'), link='copy')
+        tree = cache.store('key', self.generator('demo'))
+        cache.materialize(tree, self.tmp, False)
+
+        self.assertFalse(os.path.samefile(os.path.join(tree, 'demo', 'src', 'main.py'),
+                                          os.path.join(self.tmp, 'demo', 'src', 'main.py')))
+
+    def test_lru_eviction(self):
+        cache = ProjectCache(os.path.join(self.tmp, 'cache'), max_size=250)
+
+        for n, key in enumerate(['a', 'b', 'c']):
+            cache.store(key, self.generator(key, 100))
+            os.utime(os.path.join(cache.path, key, 'meta.json'), (n, n))
+
+        # The least recently used entry is evicted first
+        self.assertIsNone(cache.lookup('a'))
+        self.assertIsNotNone(cache.lookup('b'))
+        os.utime(os.path.join(cache.path, 'b', 'meta.json'), (10, 10))
+
+        cache.store('d', self.generator('d', 100))
+        self.assertIsNone(cache.lookup('c'))
+        self.assertIsNotNone(cache.lookup('b'))
+        self.assertIsNotNone(cache.lookup('d'))
+
+    def test_key(self):
+        context = {'name': 'demo', '_output_dir': '/a'}
+        self.assertEqual(ProjectCache.key('f', context), ProjectCache.key('f', dict(context, _output_dir='/b')))
+        self.assertNotEqual(ProjectCache.key('f', context), ProjectCache.key('f', dict(context, name='other')))
+        self.assertNotEqual(ProjectCache.key('f', context), ProjectCache.key('g', context))
+
+
+class CachedProcessTests(TestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+
+        config_file = os.path.join(self.tmp, 'cookiecutter-config.yml')
+        with open(config_file, 'w') as f:
+            f.write(f"cookiecutters_dir: {self.tmp}/cookiecutters\nreplay_dir: {self.tmp}/replay\n")
+
+        for p in [
+            patch.dict(os.environ, {'COOKIECUTTER_CONFIG': config_file}),
+            patch.object(core.config, 'cache_path', os.path.join(self.tmp, 'cache')),
+            patch.object(core.config, 'project_cache', ProjectCache(os.path.join(self.tmp, 'cache', 'projects'))),
+        ]:
+            p.start()
+            self.addCleanup(p.stop)
+
+        self.base = os.path.join(self.tmp, 'templates')
+        os.makedirs(os.path.join(self.base, 'python', '{{cookiecutter.app_name}}'))
+        with open(os.path.join(self.base, 'python', 'cookiecutter.json'), 'w') as f:
+            json.dump({'app_name': 'demo'}, f)
+        with open(os.path.join(self.base, 'python', '{{cookiecutter.app_name}}', 'setup.py'), 'w') as f:
+            f.write('name = "{{ cookiecutter.app_name }}"\n')
+
+        cwd = os.getcwd()
+        os.chdir(self.tmp)
+        self.addCleanup(os.chdir, cwd)
+
+    def process(self, app_name: str, overwrite: bool = False):
+        CookiecutterTemplateProcessor('python', TemplateResolver([self.base])) \
+            .build_parser() \
+            .overwrite(overwrite) \
+            .cache(True) \
+            .process(['--app_name', app_name])
+
+    def test_cache_hit(self):
+        with patch('cookiecutter_x.cookiecutter_templates.cookiecutter', side_effect=cookiecutter) as mock:
+            self.process('first')
+            self.process('first', overwrite=True)
+            self.assertEqual(1, mock.call_count)
+
+            self.process('second')
+            self.assertEqual(2, mock.call_count)
+
+        with open(os.path.join(self.tmp, 'second', 'setup.py')) as f:
+            self.assertEqual('name = "second"\n', f.read())
+
+    def test_empty_directories(self):
+        os.makedirs(os.path.join(self.base, 'python', '{{cookiecutter.app_name}}', 'emptydir'))
+
+        # Generated on a miss, materialized from the cache on a hit
+        self.process('first')
+        self.process('first', overwrite=True)
+        self.assertTrue(os.path.isdir(os.path.join(self.tmp, 'first', 'emptydir')))
+
+        self.process('second')
+        self.assertTrue(os.path.isdir(os.path.join(self.tmp, 'second', 'emptydir')))
+
+    def test_max_size(self):
+        with patch.object(core.config, 'configs', {'project_cache': {'max_size_mb': 0.5}}):
+            self.assertEqual(1 << 19, core.CCXConfig.project_cache.func(core.config).max_size)
+
+    def test_template_changed(self):
+        fingerprint = template_fingerprint(os.path.join(self.base, 'python'))
+        self.process('first')
+
+        setup_file = os.path.join(self.base, 'python', '{{cookiecutter.app_name}}', 'setup.py')
+        with open(setup_file, 'a') as f:
+            f.write('version = "1.0"\n')
+
+        self.assertNotEqual(fingerprint, template_fingerprint(os.path.join(self.base, 'python')))
+
+        self.process('first', overwrite=True)
+        with open(os.path.join(self.tmp, 'first', 'setup.py')) as f:
+            self.assertEqual('name = "first"\nversion = "1.0"\n', f.read())
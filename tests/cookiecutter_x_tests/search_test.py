@@ -0,0 +1,113 @@
+import json
+import os
+from unittest.mock import patch
+
+# pyfakefs unloads the modules first imported while patching; reloading yaml breaks its C loader
+import yaml  # noqa: F401
+from click.testing import CliRunner
+from pyfakefs.fake_filesystem_unittest import TestCase
+
+from cookiecutter_x import core
+from cookiecutter_x.cli import cli
+from cookiecutter_x.search import SearchIndex, update_search_index
+from cookiecutter_x.template_index import TemplateIndex
+
+
+class SearchIndexTest(TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.setUpPyfakefs()
+
+        self.simple_base = '/ccx-templates/simple'
+        self.cc_base = '/ccx-templates/cookiecutter'
+
+        self.fs.create_file(f"{self.simple_base}/bash/ccx.yml", contents='''
+description: Bash script for managing multiple commands
+post_gen: chmod the script
+variables:
+  filename:
+    default: run.sh
+''')
+        self.fs.create_file(f"{self.simple_base}/cpp_class/ccx.yml", contents='''
+description: C++ class with a header
+variables:
+  className:
+    required: true
+''')
+        self.fs.create_file(f"{self.cc_base}/python_package/cookiecutter.json", contents=json.dumps({
+            'app_name': 'demo', 'base_class': 'object', 'python_version': '3.9', '_extensions': []
+        }))
+        self.fs.create_file(f"{self.cc_base}/python_package/ccx.yml", contents='description: Python package\n')
+
+        for p in [
+            patch.object(core.config, 'simple_template_paths', [self.simple_base]),
+            patch.object(core.config, 'cookiecutter_template_paths', [self.cc_base]),
+            patch.object(core.config, 'template_index', TemplateIndex('/cache/template-index.json')),
+        ]:
+            p.start()
+            self.addCleanup(p.stop)
+
+        self.index_path = '/cache/search-index.json'
+        self.index = SearchIndex(self.index_path)
+        update_search_index(self.index)
+
+    def tearDown(self) -> None:
+        super().tearDown()
+
+    def names(self, query: str, **kwargs):
+        return [r.name for r in self.index.search(query, **kwargs)]
+
+    def test_fields(self):
+        self.assertEqual(['bash'], self.names('bash'))
+        self.assertEqual(['bash'], self.names('chmod'))
+        self.assertEqual(['cpp_class'], self.names('header'))
+        self.assertEqual(['python_package'], self.names('version'))
+        self.assertEqual([], self.names('extensions'))
+
+    def test_ranking(self):
+        # All words must match; name matches rank above variable and description matches
+        self.assertEqual(['cpp_class', 'python_package'], self.names('class'))
+        self.assertEqual(['cpp_class'], self.names('cl head'))
+
+    def test_kinds(self):
+        self.assertEqual(['python_package'], self.names('class', kinds=('cc',)))
+        self.assertEqual(['cpp_class'], self.names('class', kinds=('simple',)))
+
+    def test_persisted(self):
+        self.assertTrue(os.path.exists(self.index_path))
+
+        index = SearchIndex(self.index_path)
+        with patch.object(SearchIndex, 'read_fields', side_effect=AssertionError) as read_fields:
+            update_search_index(index)
+
+        read_fields.assert_not_called()
+        self.assertEqual(['bash'], [r.name for r in index.search('bash')])
+
+    def test_incremental_update(self):
+        with open(f"{self.simple_base}/bash/ccx.yml", 'w') as f:
+            f.write('description: Zsh script\n')
+
+        with patch.object(SearchIndex, 'read_fields', wraps=SearchIndex.read_fields) as read_fields:
+            update_search_index(self.index)
+
+        read_fields.assert_called_once_with('simple', 'bash', f"{self.simple_base}/bash")
+        self.assertEqual(['bash'], self.names('zsh'))
+        self.assertEqual([], self.names('chmod'))
+        self.assertNotIn('chmod', self.index.postings)
+
+    def test_removed_template(self):
+        self.fs.remove_object(f"{self.simple_base}/bash")
+
+        # pyfakefs does not update the directory mtime on changes; real filesystems do
+        st = os.stat(self.simple_base)
+        os.utime(self.simple_base, ns=(st.st_atime_ns, st.st_mtime_ns + 1))
+
+        update_search_index(self.index)
+        self.assertEqual([], self.names('bash'))
+
+    def test_command(self):
+        with patch.object(core.config, 'search_index', self.index):
+            result = CliRunner().invoke(cli, "search python")
+
+        self.assertEqual(0, result.exit_code, result.output)
+        self.assertEqual('python_package  cc      Python package\n', result.output)
@@ -1,10 +1,17 @@
+import json
 import os
+import posixpath
 from unittest.mock import patch, PropertyMock
 
+# pyfakefs unloads the modules first imported while patching; reloading yaml breaks its C loader
+import yaml  # noqa: F401
+
+from jinja2 import Template
 from pyfakefs.fake_filesystem_unittest import TestCase
 
 from cookiecutter_x.core import TemplateResolver
-from cookiecutter_x.simple_templates import SimpleTemplateProcessor
+from cookiecutter_x.lockfile import LOCK_FILENAME
+from cookiecutter_x.simple_templates import SimpleTemplateProcessor, read_manifest
 
 
 class SimpleTemplateProcessorTests(TestCase):
@@ -100,6 +107,37 @@ echo "run.sh"
         with open('run.sh') as f:
             self.assertEqual(self.expected_output, f.read())
 
+    def test_process_only_changed(self):
+        self.fs.create_file('run.sh', contents=self.expected_output)
+        os.utime('run.sh', ns=(0, 0))
+
+        with self.assertLogs(level='INFO') as logs:
+            self.template_processor.only_changed(True).process(['--filename', 'run.sh'])
+
+        self.assertIn("INFO:root:Unchanged ./run.sh", logs.output)
+        self.assertIn("INFO:root:0 files written, 1 unchanged files skipped", logs.output)
+        self.assertEqual(0, os.stat('run.sh').st_mtime_ns)
+        # No temporary files left behind
+        self.assertListEqual([], [f for f in os.listdir('.') if f.startswith('.')])
+
+    def test_process_only_changed_modified(self):
+        self.fs.create_file('run.sh', contents='#!/usr/bin/env bash')
+
+        with self.assertRaises(Exception) as context:
+            self.template_processor.only_changed(True).process(['--filename', 'run.sh'])
+
+        self.assertEqual("Destination file ./run.sh exists; to overwrite pass overwrite flag", str(context.exception))
+
+        with self.assertLogs(level='INFO') as logs:
+            self.template_processor.overwrite(True).process(['--filename', 'run.sh'])
+
+        self.assertIn("INFO:root:1 files written, 0 unchanged files skipped", logs.output)
+        with open('run.sh') as f:
+            self.assertEqual(self.expected_output, f.read())
+
+        # No temporary files left behind
+        self.assertListEqual([], [f for f in os.listdir('.') if f.startswith('.')])
+
 
 class SimpleTemplateProcessorWithoutVariables(TestCase):
 
@@ -124,3 +162,408 @@ class SimpleTemplateProcessorWithoutVariables(TestCase):
                 list(processor.get_variables())
 
         self.assertEqual("Template without variables; just copy the files.", str(context.exception))
+
+
+class SimpleTemplateProcessorParallelTests(TestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.setUpPyfakefs()
+
+        self.base = '/ccx-templates/simple-templates'
+        self.count = 20
+
+        files = ''.join(
+            f'''  - name: file.txt
+    output: "{{{{ prefix }}}}-{i}.txt"
+''' for i in range(self.count)
+        )
+
+        self.fs.create_file(f"{self.base}/many/file.txt", contents='{{ prefix }}')
+        self.fs.create_file(f"{self.base}/many/ccx.yml", contents=f'''name: many
+variables:
+  prefix:
+    required: true
+    type: string
+
+files:
+{files}''')
+
+        self.resolver = TemplateResolver([self.base])
+
+    def test_process_parallel(self):
+        with self.assertLogs(level='INFO') as logs:
+            SimpleTemplateProcessor("many", self.resolver).jobs(4).process(['--prefix', 'out'])
+
+        for i in range(self.count):
+            with open(f'out-{i}.txt') as f:
+                self.assertEqual('out', f.read())
+
+        # Logged in the order of the files
+        self.assertListEqual([f"INFO:root:Writing ./out-{i}.txt" for i in range(self.count)], logs.output)
+
+    def test_process_parallel_error(self):
+        self.fs.create_file('out-3.txt')
+        self.fs.create_file('out-7.txt')
+
+        with self.assertRaises(Exception) as context:
+            SimpleTemplateProcessor("many", self.resolver).jobs(4).process(['--prefix', 'out'])
+
+        self.assertEqual("Destination file ./out-3.txt exists; to overwrite pass overwrite flag", str(context.exception))
+
+    def test_process_parallel_error_finishes_written_files(self):
+        self.fs.create_file('out-3.txt')
+
+        with self.assertLogs(level='INFO') as logs, self.assertRaises(Exception):
+            SimpleTemplateProcessor("many", self.resolver).jobs(4).process(['--prefix', 'out'])
+
+        # Files the workers wrote around the failure are reported too; no file is started after it
+        written = [i for i in range(self.count) if i != 3 and os.path.exists(f'out-{i}.txt')]
+        self.assertListEqual([f"INFO:root:Writing ./out-{i}.txt" for i in written], logs.output)
+        self.assertEqual([0, 1, 2], written[:3])
+        self.assertLess(max(written), 3 + 2 * 4)
+
+
+class SimpleTemplateProcessorBatchTests(TestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.setUpPyfakefs()
+
+        self.base = '/ccx-templates/simple-templates'
+        self.fs.create_file(f"{self.base}/config/config.yml", contents='tenant: {{ tenant }}\nlogs: {{ logs }}\n')
+        self.fs.create_file(f"{self.base}/config/ccx.yml", contents='''name: config
+variables:
+  tenant:
+    required: true
+    type: string
+  logs:
+    required: false
+    default: false
+
+files:
+  - name: config.yml
+    output: "{{ tenant }}.yml"
+''')
+
+        self.resolver = TemplateResolver([self.base])
+
+    def check_outputs(self, tenants):
+        for tenant, logs in tenants:
+            with open(f'{tenant}.yml') as f:
+                self.assertEqual(f'tenant: {tenant}\nlogs: {logs}', f.read())
+
+    def test_jsonl_manifest(self):
+        self.fs.create_file('rows.jsonl', contents='{"tenant": "acme"}\n\n{"tenant": "globex", "logs": true}\n')
+
+        count = SimpleTemplateProcessor("config", self.resolver) \
+            .jobs(2) \
+            .process_batch(read_manifest('rows.jsonl'))
+
+        self.assertEqual(2, count)
+        self.check_outputs([('acme', False), ('globex', True)])
+
+    def test_csv_manifest(self):
+        self.fs.create_file('rows.csv', contents='tenant,logs\nacme,\nglobex,true\n')
+
+        count = SimpleTemplateProcessor("config", self.resolver) \
+            .process_batch(read_manifest('rows.csv'), ['--logs', 'true'])
+
+        self.assertEqual(2, count)
+        self.check_outputs([('acme', True), ('globex', True)])
+
+    def test_invalid_row(self):
+        rows = [{'tenant': 'acme'}, {'logs': True}]
+
+        with self.assertRaises(Exception) as context:
+            SimpleTemplateProcessor("config", self.resolver).process_batch(rows)
+
+        self.assertEqual("Invalid row 2: the following arguments are required: --tenant", str(context.exception))
+
+    def test_non_scalar_value(self):
+        self.fs.create_file('rows.jsonl', contents='{"tenant": "acme"}\n{"tenant": ["a", "b"]}\n')
+
+        with self.assertRaises(Exception) as context:
+            SimpleTemplateProcessor("config", self.resolver).process_batch(read_manifest('rows.jsonl'))
+
+        self.assertEqual(
+            "Invalid row 2: value of tenant must be a string, number or boolean, not list", str(context.exception)
+        )
+
+
+class SimpleTemplateProcessorStreamingTests(TestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.setUpPyfakefs()
+
+        self.base = '/ccx-templates/simple-templates'
+        self.fs.create_file(
+            f"{self.base}/table/table.txt",
+            contents='{% for i in range(size) %}{{ i }},{{ i * i }}\n{% endfor %}'
+        )
+        self.fs.create_file(f"{self.base}/table/ccx.yml", contents='''name: table
+variables:
+  size:
+    required: true
+    type: number
+
+files:
+  - name: table.txt
+    output: "table.csv"
+''')
+
+        self.resolver = TemplateResolver([self.base])
+
+    def test_stream_large_output(self):
+        size = 10000
+
+        render = Template.render
+
+        def render_names_only(template, *args, **kwargs):
+            # Only the output name may be rendered in memory
+            self.assertEqual('<template>', template.filename)
+            return render(template, *args, **kwargs)
+
+        with patch.object(Template, 'render', autospec=True, side_effect=render_names_only):
+            SimpleTemplateProcessor("table", self.resolver).process_files({'size': size})
+
+        with open('table.csv') as f:
+            self.assertEqual(''.join(f"{i},{i * i}\n" for i in range(size)), f.read())
+
+    def test_render_error_keeps_existing_file(self):
+        with open(f"{self.base}/table/table.txt", 'a') as f:
+            f.write('{{ missing.attribute }}')
+        self.fs.create_file('table.csv', contents='previous\n')
+
+        with self.assertRaises(Exception):
+            SimpleTemplateProcessor("table", self.resolver).overwrite(True).process_files({'size': 10})
+
+        with open('table.csv') as f:
+            self.assertEqual('previous\n', f.read())
+        self.assertListEqual(['table.csv'], [n for n in os.listdir('.') if 'table' in n])
+
+
+class SimpleTemplateProcessorIncrementalTests(TestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.setUpPyfakefs()
+
+        self.base = '/ccx-templates/simple-templates'
+        self.fs.create_file(f"{self.base}/pair/a.txt", contents='a={{ a }}')
+        self.fs.create_file(f"{self.base}/pair/b.txt", contents='b={{ b }}')
+        self.fs.create_file(f"{self.base}/pair/ccx.yml", contents='''name: pair
+variables:
+  a:
+    required: true
+    type: string
+  b:
+    required: true
+    type: string
+
+files:
+  - name: a.txt
+    output: "a.txt"
+  - name: b.txt
+    output: "b.txt"
+''')
+
+        self.resolver = TemplateResolver([self.base])
+
+    def process(self, a: str, b: str, overwrite: bool = False):
+        with self.assertLogs(level='INFO') as logs:
+            SimpleTemplateProcessor("pair", self.resolver) \
+                .incremental(True) \
+                .overwrite(overwrite) \
+                .process(['--a', a, '--b', b])
+
+        return logs.output
+
+    def test_first_run(self):
+        logs = self.process('1', '1')
+
+        self.assertIn("INFO:root:2 files written, 0 unchanged files skipped", logs)
+        with open(LOCK_FILENAME) as f:
+            lock = json.load(f)
+
+        self.assertListEqual(['a'], lock['files']['a.txt']['referenced'])
+        self.assertDictEqual({'a': '1'}, lock['files']['a.txt']['variables'])
+        self.assertDictEqual({'a': '1', 'b': '1'}, lock['templates']['pair']['variables'])
+
+    def test_only_affected_files(self):
+        self.process('1', '1')
+        os.utime('b.txt', ns=(0, 0))
+
+        logs = self.process('2', '1')
+
+        self.assertIn("INFO:root:Writing ./a.txt", logs)
+        self.assertIn("INFO:root:Unchanged ./b.txt", logs)
+        self.assertEqual(0, os.stat('b.txt').st_mtime_ns)
+        with open('a.txt') as f:
+            self.assertEqual('a=2', f.read())
+
+    def test_template_source_changed(self):
+        self.process('1', '1')
+
+        with open(f"{self.base}/pair/b.txt", 'w') as f:
+            f.write('B={{ b }}')
+
+        logs = self.process('1', '1')
+
+        self.assertIn("INFO:root:Unchanged ./a.txt", logs)
+        self.assertIn("INFO:root:Writing ./b.txt", logs)
+        with open('b.txt') as f:
+            self.assertEqual('B=1', f.read())
+
+    def test_modified_output(self):
+        self.process('1', '1')
+
+        with open('a.txt', 'w') as f:
+            f.write('edited')
+
+        with self.assertRaises(Exception) as context:
+            self.process('2', '1')
+
+        self.assertEqual("Destination file ./a.txt exists; to overwrite pass overwrite flag", str(context.exception))
+
+        self.process('2', '1', overwrite=True)
+        with open('a.txt') as f:
+            self.assertEqual('a=2', f.read())
+
+    def test_failure_keeps_written_records(self):
+        self.fs.create_file('b.txt', contents='not generated')
+
+        with self.assertRaises(Exception):
+            self.process('1', '1')
+
+        with open(LOCK_FILENAME) as f:
+            lock = json.load(f)
+
+        self.assertListEqual(['a.txt'], list(lock['files']))
+        self.assertNotIn('pair', lock['templates'])
+
+
+class SimpleTemplateProcessorLiteralFilesTests(TestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.setUpPyfakefs()
+
+        self.base = '/ccx-templates/simple-templates'
+        self.binary = bytes(range(256)) + b'\r\n'
+        self.fs.create_file(f"{self.base}/assets/logo.png", contents=self.binary)
+        self.fs.create_file(f"{self.base}/assets/LICENSE", contents='Copyright\r\n\r\n')
+        self.fs.create_file(f"{self.base}/assets/helper.sh", contents='echo "{{ not a template }}"\n')
+        self.fs.create_file(f"{self.base}/assets/ccx.yml", contents='''name: assets
+variables:
+  name:
+    required: true
+    type: string
+
+files:
+  - name: logo.png
+    output: "{{ name }}.png"
+  - name: LICENSE
+    output: "LICENSE"
+  - name: helper.sh
+    output: "helper.sh"
+    render: false
+''')
+
+        self.resolver = TemplateResolver([self.base])
+
+    def test_copy_literal_files(self):
+        with patch('jinja2.Environment.get_template', side_effect=AssertionError("rendered")):
+            SimpleTemplateProcessor("assets", self.resolver).process(['--name', 'logo'])
+
+        with open('logo.png', 'rb') as f:
+            self.assertEqual(self.binary, f.read())
+
+        with open('LICENSE', 'rb') as f:
+            self.assertEqual(b'Copyright\r\n\r\n', f.read())
+
+        with open('helper.sh') as f:
+            self.assertEqual('echo "{{ not a template }}"\n', f.read())
+
+    def test_copy_literal_only_changed(self):
+        SimpleTemplateProcessor("assets", self.resolver).process(['--name', 'logo'])
+        os.utime('logo.png', ns=(0, 0))
+
+        with self.assertLogs(level='INFO') as logs:
+            SimpleTemplateProcessor("assets", self.resolver).only_changed(True).process(['--name', 'logo'])
+
+        self.assertIn("INFO:root:0 files written, 3 unchanged files skipped", logs.output)
+        self.assertEqual(0, os.stat('logo.png').st_mtime_ns)
+
+
+class SimpleTemplateProcessorTreeTests(TestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.setUpPyfakefs()
+
+        self.base = '/ccx-templates/simple-templates'
+        self.fs.create_file(f"{self.base}/pkg/src/__init__.py", contents='NAME = "{{ name }}"\n')
+        self.fs.create_file(f"{self.base}/pkg/src/sub/module.py", contents='# module\n')
+        self.fs.create_file(f"{self.base}/pkg/src/notes.txt", contents='notes\n')
+        self.fs.create_file(f"{self.base}/pkg/bin/run.sh", contents='echo {{ name }}\n')
+        self.fs.create_file(f"{self.base}/pkg/ccx.yml", contents='''name: pkg
+variables:
+  name:
+    required: true
+    type: string
+
+files:
+  - glob: "src/**/*.py"
+    output: "{{ name }}"
+  - name: bin
+    output: "scripts"
+    executable: true
+''')
+
+        self.resolver = TemplateResolver([self.base])
+
+    def test_expand_entries(self):
+        files = list(SimpleTemplateProcessor("pkg", self.resolver).template_files())
+
+        self.assertEqual([
+            {'name': 'src/__init__.py', 'output': '{{ name }}/__init__.py'},
+            {'name': 'src/sub/module.py', 'output': '{{ name }}/sub/module.py'},
+            {'name': 'bin/run.sh', 'output': 'scripts/run.sh', 'executable': True},
+        ], files)
+
+    def test_process_tree(self):
+        with self.assertLogs(level='INFO') as logs:
+            SimpleTemplateProcessor("pkg", self.resolver).jobs(2).process(['--name', 'demo'])
+
+        self.assertEqual([
+            "INFO:root:Writing ./demo/__init__.py",
+            "INFO:root:Writing ./demo/sub/module.py",
+            "INFO:root:Writing ./scripts/run.sh",
+            "INFO:root:Making file executable: ./scripts/run.sh",
+        ], logs.output)
+
+        with open('demo/__init__.py') as f:
+            self.assertEqual('NAME = "demo"', f.read())
+
+        self.assertFalse(os.path.exists('demo/notes.txt'))
+        self.assertTrue(os.access('scripts/run.sh', os.X_OK))
+
+    def test_template_directory_entry(self):
+        for name in ['.', './']:
+            self.fs.create_file(f"{self.base}/all/ccx.yml", contents=f'''name: all
+variables:
+  name:
+    required: true
+
+files:
+  - name: "{name}"
+    output: out
+''')
+            self.fs.create_file(f"{self.base}/all/README.md", contents='{{ name }}\n')
+
+            files = list(SimpleTemplateProcessor("all", self.resolver).template_files())
+            self.assertEqual(['README.md'], [posixpath.normpath(f['name']) for f in files])
+
+            self.fs.remove_object(f"{self.base}/all")
@@ -0,0 +1,102 @@
+import json
+import os
+from unittest.mock import patch
+
+from click.testing import CliRunner
+from pyfakefs.fake_filesystem_unittest import TestCase
+
+from cookiecutter_x import template_index
+from cookiecutter_x.cli import cli
+from cookiecutter_x.core import TemplateResolver, config
+from cookiecutter_x.template_index import TemplateIndex
+
+
+class TemplateIndexTest(TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.setUpPyfakefs()
+
+        self.base = '/ccx-templates/python'
+        self.fs.create_dir(f"{self.base}/package_structure1")
+        self.fs.create_dir(f"{self.base}/package_structure2")
+
+        self.index_path = '/cache/template-index.json'
+        self.index = TemplateIndex(self.index_path)
+        self.resolver = TemplateResolver([self.base], self.index)
+
+    def tearDown(self) -> None:
+        super().tearDown()
+
+    @staticmethod
+    def touch(path: str):
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1))
+
+    def test_list(self):
+        self.assertDictEqual(
+            {
+                'package_structure1': '/ccx-templates/python/package_structure1',
+                'package_structure2': '/ccx-templates/python/package_structure2'
+            }, self.resolver.list()
+        )
+
+    def test_get_path(self):
+        self.assertEqual('/ccx-templates/python/package_structure1', self.resolver.get_path('package_structure1'))
+
+        with self.assertRaises(Exception) as context:
+            self.resolver.get_path('random')
+
+        self.assertEqual("Template random not found", str(context.exception))
+
+    def test_persisted(self):
+        self.resolver.get_path('package_structure1')
+        self.assertTrue(os.path.exists(self.index_path))
+
+        with open(self.index_path) as f:
+            data = json.load(f)
+
+        self.assertSetEqual(
+            {'package_structure1', 'package_structure2'},
+            set(data['dirs'][self.base]['templates'])
+        )
+
+        # A fresh index reads the persisted entries without scanning the directory
+        resolver = TemplateResolver([self.base], TemplateIndex(self.index_path))
+        with self.assertRaises(AssertionError):
+            with self.assertLogs(level='DEBUG'):
+                resolver.get_path('package_structure2')
+
+    def test_failed_save(self):
+        with patch.object(template_index.os, 'replace', side_effect=OSError('disk full')):
+            with self.assertLogs(level='WARNING'):
+                self.resolver.list()
+
+        # No temporary file is left behind
+        self.assertEqual([], os.listdir(os.path.dirname(self.index_path)))
+
+    def test_rescan_on_change(self):
+        self.assertNotIn('package_structure3', self.resolver.list())
+
+        # pyfakefs does not update the directory mtime on changes; real filesystems do
+        self.fs.create_dir(f"{self.base}/package_structure3")
+        self.touch(self.base)
+        self.assertEqual('/ccx-templates/python/package_structure3', self.resolver.get_path('package_structure3'))
+
+        self.fs.remove_object(f"{self.base}/package_structure1")
+        self.touch(self.base)
+        self.assertNotIn('package_structure1', self.resolver.list())
+
+    def test_first_path_wins(self):
+        other = '/ccx-templates/other'
+        self.fs.create_dir(f"{other}/package_structure1")
+
+        resolver = TemplateResolver([other, self.base], self.index)
+        self.assertEqual(f"{other}/package_structure1", resolver.get_path('package_structure1'))
+
+    def test_rebuild_command(self):
+        self.fs.create_dir(f"{config.simple_template_paths[0]}/cpp")
+
+        result = CliRunner().invoke(cli, "index rebuild")
+
+        self.assertEqual(0, result.exit_code)
+        self.assertTrue(os.path.exists(config.template_index.index_path))
@@ -0,0 +1,111 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from pyfakefs.fake_filesystem_unittest import TestCase
+
+from cookiecutter_x.template_watcher import WatchingTemplateResolver
+
+
+class WatchingTemplateResolverTest(TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.setUpPyfakefs()
+
+        self.python = '/ccx-templates/python'
+        self.gradle = '/ccx-templates/gradle'
+        self.fs.create_dir(f"{self.python}/package_structure1")
+        self.fs.create_dir(f"{self.python}/package_structure2")
+        self.fs.create_dir(f"{self.gradle}/package_structure1")
+
+        self.resolver = WatchingTemplateResolver([self.python, self.gradle])
+
+    def tearDown(self) -> None:
+        super().tearDown()
+
+    @staticmethod
+    def touch(path: str):
+        # pyfakefs does not update the directory mtime on changes; real filesystems do
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1))
+
+    def test_get_path(self):
+        self.assertEqual('/ccx-templates/python/package_structure1', self.resolver.get_path('package_structure1'))
+        self.assertEqual('/ccx-templates/python/package_structure2', self.resolver.get_path('package_structure2'))
+
+        with self.assertRaises(Exception) as context:
+            self.resolver.get_path('random')
+
+        self.assertEqual("Template random not found", str(context.exception))
+
+    def test_refresh(self):
+        self.fs.create_dir(f"{self.gradle}/application")
+        self.touch(self.gradle)
+
+        self.resolver.refresh()
+        self.assertEqual('/ccx-templates/gradle/application', self.resolver.get_path('application'))
+
+        self.fs.remove_object(f"{self.python}/package_structure1")
+        self.touch(self.python)
+
+        self.resolver.refresh()
+        self.assertEqual('/ccx-templates/gradle/package_structure1', self.resolver.get_path('package_structure1'))
+
+    def test_incremental_updates(self):
+        self.resolver.added(self.gradle, 'application')
+        self.assertEqual('/ccx-templates/gradle/application', self.resolver.get_path('application'))
+
+        self.resolver.removed(self.gradle, 'application')
+        self.assertNotIn('application', self.resolver.list())
+
+        self.resolver.removed(self.python, 'package_structure1')
+        self.assertEqual('/ccx-templates/gradle/package_structure1', self.resolver.get_path('package_structure1'))
+
+
+class WatchingTemplateResolverNotificationsTest(unittest.TestCase):
+
+    def wait_for(self, resolver: WatchingTemplateResolver, name: str, present: bool):
+        for _ in range(100):
+            if (name in resolver.list()) == present:
+                return
+
+            time.sleep(0.05)
+
+        self.fail(f"Template {name} {'not added' if present else 'not removed'}")
+
+    def check_notifications(self, poll_interval: float):
+        with tempfile.TemporaryDirectory() as base:
+            with WatchingTemplateResolver([base], poll_interval=poll_interval) as resolver:
+                os.mkdir(os.path.join(base, 'cpp'))
+                self.wait_for(resolver, 'cpp', True)
+                self.assertEqual(os.path.join(base, 'cpp'), resolver.get_path('cpp'))
+
+                os.rmdir(os.path.join(base, 'cpp'))
+                self.wait_for(resolver, 'cpp', False)
+
+    def check_created_source(self, poll_interval: float):
+        with tempfile.TemporaryDirectory() as base:
+            source = os.path.join(base, 'templates')
+            with WatchingTemplateResolver([source], poll_interval=poll_interval) as resolver:
+                os.makedirs(os.path.join(source, 'cpp'))
+                self.wait_for(resolver, 'cpp', True)
+
+                # Watched once created
+                os.mkdir(os.path.join(source, 'java'))
+                self.wait_for(resolver, 'java', True)
+
+    def test_polling(self):
+        with patch.object(WatchingTemplateResolver, '_start_observer', side_effect=ImportError):
+            self.check_notifications(0.05)
+            self.check_created_source(0.05)
+
+    def test_watchdog(self):
+        try:
+            import watchdog
+        except ImportError:
+            self.skipTest("watchdog is not installed")
+
+        self.check_notifications(60)
+        self.check_created_source(0.05)
@@ -0,0 +1,161 @@
+# Import before any pyfakefs test patches the file system; worker processes need the real os module
+import concurrent.futures.process  # noqa: F401
+import os
+import tempfile
+import threading
+import time
+from unittest.case import TestCase
+
+from cookiecutter_x import utils
+
+
+def square(x: int) -> int:
+    # Later items finish first
+    time.sleep((10 - x) / 1000)
+    return x * x
+
+
+def fail_on_odd(x: int) -> int:
+    if x % 2:
+        raise ValueError(f"odd {x}")
+
+    return x
+
+
+class OrderedMapTest(TestCase):
+
+    def test_serial(self):
+        self.assertListEqual([0, 1, 4, 9], list(utils.ordered_map(square, range(4))))
+
+    def test_threads(self):
+        self.assertListEqual([x * x for x in range(10)], list(utils.ordered_map(square, range(10), jobs=4)))
+
+    def test_processes(self):
+        self.assertListEqual(
+            [x * x for x in range(10)], list(utils.ordered_map(square, range(10), jobs=2, processes=True))
+        )
+
+    def test_lazy_items(self):
+        consumed = []
+
+        def items():
+            for x in range(100):
+                consumed.append(x)
+                yield x
+
+        results = utils.ordered_map(square, items(), jobs=2)
+        next(results)
+
+        # Only a bounded window of items is in flight
+        self.assertLessEqual(len(consumed), 5)
+        results.close()
+
+    def test_first_error(self):
+        results = []
+        with self.assertRaises(ValueError) as context:
+            for result in utils.ordered_map(fail_on_odd, range(10), jobs=4):
+                results.append(result)
+
+        self.assertEqual("odd 1", str(context.exception))
+        self.assertEqual(0, results[0])
+
+    def test_results_after_error(self):
+        started = []
+        others_done = threading.Semaphore(0)
+
+        def fail_first(x):
+            started.append(x)
+            if x == 0:
+                # Fails once the rest of the window is done
+                for _ in range(3):
+                    others_done.acquire()
+                raise ValueError("first")
+
+            others_done.release()
+            return x
+
+        results = []
+        with self.assertRaises(ValueError):
+            for result in utils.ordered_map(fail_first, range(100), jobs=2):
+                results.append(result)
+
+        # The items started before the failure are still reported, no item is started after it
+        self.assertEqual([1, 2, 3], results)
+        self.assertEqual([0, 1, 2, 3], sorted(started))
+
+
+class TemplateMarkupTest(TestCase):
+
+    def check(self, content: bytes) -> bool:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'file')
+            with open(path, 'wb') as f:
+                f.write(content)
+
+            return utils.has_template_markup(path, chunk_size=4)
+
+    def test_markers(self):
+        self.assertTrue(self.check(b'Hello {{ name }}'))
+        self.assertTrue(self.check(b'{% if x %}{% endif %}'))
+        self.assertTrue(self.check(b'{# comment #}'))
+        self.assertFalse(self.check(b'int main() { return 0; }'))
+        self.assertFalse(self.check(bytes(range(256))))
+
+    def test_marker_across_chunks(self):
+        self.assertTrue(self.check(b'abc{{ x }}'))
+        self.assertFalse(self.check(b'abc{ {x }'))
+
+
+class GlobFilesTest(TestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+        for path in ['ccx.yml', 'src/a.py', 'src/b.txt', 'src/pkg/c.py', 'src/pkg/deep/d.py', 'docs/index.md']:
+            full_path = os.path.join(self.tmp.name, path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            open(full_path, 'w').close()
+
+    def test_walk_files(self):
+        self.assertEqual(
+            ['a.py', 'b.txt', 'pkg/c.py', 'pkg/deep/d.py'],
+            list(utils.walk_files(os.path.join(self.tmp.name, 'src')))
+        )
+
+    def test_walk_files_symlink_cycle(self):
+        os.symlink('..', os.path.join(self.tmp.name, 'src', 'pkg', 'parent'))
+        os.symlink(os.path.join(self.tmp.name, 'docs'), os.path.join(self.tmp.name, 'src', 'docs'))
+
+        self.assertEqual(
+            ['a.py', 'b.txt', 'docs/index.md', 'pkg/c.py', 'pkg/deep/d.py'],
+            list(utils.walk_files(os.path.join(self.tmp.name, 'src')))
+        )
+
+    def test_glob_match(self):
+        self.assertTrue(utils.glob_match('src/**/*.py', 'src/a.py'))
+        self.assertTrue(utils.glob_match('src/**/*.py', 'src/pkg/deep/d.py'))
+        self.assertFalse(utils.glob_match('src/*.py', 'src/pkg/c.py'))
+        self.assertTrue(utils.glob_match('**', 'src/pkg/c.py'))
+        self.assertTrue(utils.glob_match('src/[!b]?py', 'src/a.py'))
+        self.assertFalse(utils.glob_match('src/[!b].txt', 'src/b.txt'))
+
+    def test_glob_files(self):
+        self.assertEqual(
+            [('src/a.py', 'a.py'), ('src/pkg/c.py', 'pkg/c.py'), ('src/pkg/deep/d.py', 'pkg/deep/d.py')],
+            list(utils.glob_files(self.tmp.name, 'src/**/*.py'))
+        )
+        self.assertEqual([('src/a.py', 'a.py')], list(utils.glob_files(self.tmp.name, 'src/*.py')))
+        self.assertEqual([('src/pkg/c.py', 'c.py')], list(utils.glob_files(self.tmp.name, 'src/pkg/[a-c].py')))
+        self.assertEqual([], list(utils.glob_files(self.tmp.name, 'missing/*.py')))
+
+
+class WordsTest(TestCase):
+
+    def test_split_words(self):
+        self.assertEqual(['class', 'name', 'run', 'sh'], utils.split_words('className run.sh'))
+        self.assertEqual(['http', 'server', 'v2'], utils.split_words('HTTPServer_v2'))
+
+    def test_mark_case_changes(self):
+        self.assertEqual('Hello_World', utils.mark_case_changes('HelloWorld', '_'))